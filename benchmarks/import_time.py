@@ -0,0 +1,119 @@
+"""Measures how long importing ipyc takes in a fresh interpreter, and checks that each entry point
+only imports the standard library modules it needs.
+
+    python benchmarks/import_time.py [--runs 20] [--max-ms 50] [--python python3.6] [--check]
+
+The time reported for each scenario is the median wall clock time of a fresh ``python -c`` process
+running it, minus the median time of a process that imports nothing. The script exits with a non-zero
+status when an entry point imports a module it must not, or, with ``--max-ms``, when a scenario is slower
+than the given budget, so it can guard against regressions in CI.
+
+``--python`` runs the scenarios with another interpreter, and ``--check`` only checks which modules
+are loaded, without timing anything. Interpreters before Python 3.7 have no module level
+``__getattr__`` and import every submodule up front, so there the check is instead that every public
+name is importable, apart from those of submodules that need a newer version.
+
+Bytecode should be compiled beforehand (``python -m compileall ipyc``), otherwise every run measures
+compiling the package as well.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Scenario name, code to run, modules the scenario must not import
+SCENARIOS = [
+    ('import ipyc', 'import ipyc', ['asyncio', 'multiprocessing', 'json']),
+    ('blocking client', 'from ipyc import IPyCClient', ['asyncio', 'multiprocessing']),
+    ('blocking host', 'from ipyc import IPyCHost', ['asyncio', 'multiprocessing']),
+    ('async client', 'from ipyc import AsyncIPyCClient', ['multiprocessing']),
+    ('async host', 'from ipyc import AsyncIPyCHost', ['multiprocessing']),
+]
+
+# Submodules and the version they need, which older interpreters leave out of the package
+VERSIONED_SUBMODULES = {'ipyc.transports': (3, 7)}
+
+REPORT = "import sys; print(' '.join(sorted(sys.modules)))"
+
+
+def _output(python: str, code: str) -> str:
+    return subprocess.run([python, '-c', code], check=True, cwd=ROOT,
+                          stdout=subprocess.PIPE, universal_newlines=True).stdout
+
+
+def _run(python: str, code: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([python, '-c', code], check=True, cwd=ROOT)
+    return time.perf_counter() - start
+
+
+def _median_ms(python: str, code: str, runs: int) -> float:
+    return statistics.median(_run(python, code) for _ in range(runs)) * 1000
+
+
+def _imported_modules(python: str, code: str) -> set:
+    return set(_output(python, f'{code}; {REPORT}').split())
+
+
+def _check_lazy(python: str) -> list:
+    """Check that importing the package alone loads none of its submodules."""
+    submodules = [module for module in _imported_modules(python, 'import ipyc') if module.startswith('ipyc.')]
+    return [f'import ipyc loads {", ".join(submodules)}'] if submodules else []
+
+
+def _check_eager(python: str, version: tuple) -> list:
+    """Check that every public name is importable, and submodules needing a newer version are left out."""
+    failures = []
+    code = 'from ipyc import *; import ipyc; ' \
+           'print(len([name for name in ipyc.__all__ if not hasattr(ipyc, name)]))'
+    missing = int(_output(python, code))
+    if missing:
+        failures.append(f'{missing} names of ipyc.__all__ are missing')
+    imported = _imported_modules(python, 'import ipyc')
+    for module, needed in VERSIONED_SUBMODULES.items():
+        if version < needed and module in imported:
+            failures.append(f'import ipyc loads {module}, which needs Python {".".join(map(str, needed))}')
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=20, help='number of processes to time per scenario')
+    parser.add_argument('--max-ms', type=float, default=None, help='fail when a scenario takes longer than this')
+    parser.add_argument('--python', default=sys.executable, help='interpreter to run the scenarios with')
+    parser.add_argument('--check', action='store_true', help='only check the modules loaded, without timing')
+    arguments = parser.parse_args()
+
+    python = arguments.python
+    version = tuple(map(int, _output(python, 'import sys; print(*sys.version_info[:2])').split()))
+    lazy = version >= (3, 7)
+    print(f'python {".".join(map(str, version))}, submodules loaded {"lazily" if lazy else "up front"}')
+    failures = _check_lazy(python) if lazy else _check_eager(python, version)
+
+    baseline = None if arguments.check else _median_ms(python, 'pass', arguments.runs)
+    if baseline is not None:
+        print(f'interpreter startup: {baseline:.1f} ms')
+    for name, code, forbidden in SCENARIOS:
+        imported = _imported_modules(python, code)
+        if baseline is None:
+            print(f'{name:>16}: {len(imported)} modules loaded')
+        else:
+            elapsed = _median_ms(python, code, arguments.runs) - baseline
+            print(f'{name:>16}: {elapsed:6.1f} ms, {len(imported)} modules loaded')
+            if arguments.max_ms is not None and elapsed > arguments.max_ms:
+                failures.append(f'{name} took {elapsed:.1f} ms, over the {arguments.max_ms:.1f} ms budget')
+        unexpected = [module for module in forbidden if module in imported]
+        if lazy and unexpected:
+            failures.append(f'{name} imports {", ".join(unexpected)}')
+
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""Measures the memory each idle connection costs, and what sending and receiving a message allocates.
+
+    python benchmarks/memory.py [--connections 2000] [--messages 20000] [--engine all]
+
+For each engine, the given number of connections is opened over socket pairs and wrapped in a link, the
+way a host does for the connections it accepts, and the memory traced by :mod:`tracemalloc` while
+creating them is divided by their number. The socket objects themselves are created beforehand and
+are not counted, nor is anything the kernel holds for them.
+
+Messages are then sent back and forth over one link of each engine. CPython does not count
+allocations outside of debug builds, so two figures stand in for them: the peak memory a message
+needs in flight, from serializing it to deserializing it, and the memory blocks that are still
+allocated afterwards, which should be zero.
+"""
+import argparse
+import asyncio
+import socket
+import sys
+import tracemalloc
+
+from ipyc.links import IPyCLink
+from ipyc.asynclinks import AsyncIPyCLink, AsyncIPyCProtocolLink
+from ipyc.transports import IPyCBufferedProtocol
+
+ENGINES = ('blocking', 'streams', 'protocol')
+
+MESSAGES = ['hello world', {'sensor': 'temperature', 'value': 21.5, 'ok': True}, 12345]
+
+
+class _Client:
+    # Stands in for the host or client a link reports to
+    def __init__(self):
+        self.connections = []
+
+
+def _traced() -> int:
+    return tracemalloc.get_traced_memory()[0]
+
+
+def _blocking_links(pairs: list) -> list:
+    client = _Client()
+    return [(IPyCLink(near, client), IPyCLink(far, client)) for near, far in pairs]
+
+
+async def _async_links(pairs: list, engine: str) -> list:
+    client, loop = _Client(), asyncio.get_event_loop()
+    links = []
+    for pair in pairs:
+        ends = []
+        for sock in pair:
+            if engine == 'streams':
+                reader, writer = await asyncio.open_connection(sock=sock)
+                ends.append(AsyncIPyCLink(reader, writer, client))
+            else:
+                _, protocol = await loop.connect_accepted_socket(IPyCBufferedProtocol, sock)
+                ends.append(AsyncIPyCProtocolLink(protocol, client))
+        links.append(tuple(ends))
+    return links
+
+
+def _per_message(send_and_receive, count: int) -> tuple:
+    # Returns the average peak bytes in flight per message and the blocks left allocated per message
+    for message in MESSAGES:
+        send_and_receive(message)
+    peaks, blocks = 0, sys.getallocatedblocks()
+    for index in range(count):
+        start = _traced()
+        tracemalloc.reset_peak()
+        send_and_receive(MESSAGES[index % len(MESSAGES)])
+        peaks += tracemalloc.get_traced_memory()[1] - start
+    return peaks / count, (sys.getallocatedblocks() - blocks) / count
+
+
+def _measure_blocking(connections: int, messages: int) -> tuple:
+    pairs = [socket.socketpair() for _ in range(connections)]
+    start = _traced()
+    links = _blocking_links(pairs)
+    idle = (_traced() - start) / connections / 2
+    near, far = links[0]
+
+    def send_and_receive(message):
+        near.send(message)
+        far.receive()
+
+    peak, blocks = _per_message(send_and_receive, messages)
+    for pair in pairs:
+        for sock in pair:
+            sock.close()
+    return idle, peak, blocks
+
+
+def _measure_async(engine: str, connections: int, messages: int) -> tuple:
+    async def measure():
+        pairs = [socket.socketpair() for _ in range(connections)]
+        start = _traced()
+        links = await _async_links(pairs, engine)
+        idle = (_traced() - start) / connections / 2
+        near, far = links[0]
+
+        # Same as _per_message, with the link awaited from within the running loop
+        for message in MESSAGES:
+            await near.send(message)
+            await far.receive()
+        peaks, blocks = 0, sys.getallocatedblocks()
+        for index in range(messages):
+            start = _traced()
+            tracemalloc.reset_peak()
+            await near.send(MESSAGES[index % len(MESSAGES)])
+            await far.receive()
+            peaks += tracemalloc.get_traced_memory()[1] - start
+        blocks = (sys.getallocatedblocks() - blocks) / messages
+        for pair in links:
+            for link in pair:
+                link._writer.close()
+        await asyncio.sleep(0)
+        return idle, peaks / messages, blocks
+
+    return asyncio.new_event_loop().run_until_complete(measure())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--connections', type=int, default=2000, help='number of idle connections per engine')
+    parser.add_argument('--messages', type=int, default=20000, help='number of messages to measure')
+    parser.add_argument('--engine', choices=ENGINES + ('all',), default='all', help='engine to measure')
+    arguments = parser.parse_args()
+
+    tracemalloc.start()
+    print(f"{'engine':<10} {'bytes per idle connection':>26} {'peak bytes per message':>23} {'blocks left per message':>24}")
+    for engine in ENGINES if arguments.engine == 'all' else (arguments.engine,):
+        if engine == 'blocking':
+            idle, peak, blocks = _measure_blocking(arguments.connections, arguments.messages)
+        else:
+            idle, peak, blocks = _measure_async(engine, arguments.connections, arguments.messages)
+        print(f'{engine:<10} {idle:>26,.0f} {peak:>23,.0f} {blocks:>24.3f}')
+
+
+if __name__ == '__main__':
+    main()
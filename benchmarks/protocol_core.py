@@ -0,0 +1,149 @@
+"""Benchmarks the protocol core on its own, without sockets, and fuzzes its parser.
+
+    python benchmarks/protocol_core.py [--messages 100000] [--interning] [--fuzz 0] [--seed 0]
+
+The benchmark encodes a mix of messages with :class:`~ipyc.protocol.IPyCProtocol`, then feeds the bytes
+to a second protocol in pieces the size of typical socket reads, and reports the rate of each direction.
+
+With ``--fuzz``, the given number of rounds is run after the benchmark. Each round cuts a valid stream
+at random points and checks that it decodes to the same messages as when fed whole, then feeds the
+parser a stream with random bytes overwritten, inserted, or removed, which it must survive without
+raising. Batches of records whose columns are on the edge of each column kind are checked to decode
+to the records they were made from as well. The script exits with a non-zero status when a check fails.
+"""
+import argparse
+import array
+import logging
+import random
+import sys
+import time
+
+from ipyc.batches import RecordBatch
+from ipyc.framing import FrameSplitter
+from ipyc.protocol import IPyCProtocol
+
+READ_SIZES = (1, 7, 512, 4096, 65536)
+
+MESSAGES = [
+    'hello world',
+    12345,
+    3.25,
+    {'sensor': 'temperature', 'value': 21.5, 'ok': True},
+    b'\x00\x01\n\x02' * 64,
+    array.array('d', range(128)),
+]
+
+# Columns that must keep every value exactly: integers too large for int64, integers too large for a
+# double next to floats, and small integers next to floats
+BATCHES = [
+    [{'a': 2 ** 70}, {'a': 2 ** 53 + 1}],
+    [{'a': 2 ** 53 + 1}, {'a': 0.5}],
+    [{'a': -2 ** 63}, {'a': 2 ** 63 - 1}],
+    [{'a': 2 ** 53}, {'a': 0.5}, {'a': -3}],
+    [{'a': True, 'b': 'text', 'c': None}, {'a': False, 'b': '', 'c': [1]}],
+]
+
+
+def _encode(protocol: IPyCProtocol, messages: list) -> bytes:
+    chunks = []
+    for message in messages:
+        frame, buffer = protocol.encode(message)
+        chunks.append(frame)
+        if buffer is not None:
+            chunks.append(bytes(buffer))
+    return b''.join(chunks)
+
+
+def _normalized(message):
+    return bytes(message) if isinstance(message, memoryview) else message
+
+
+def _decode(protocol: IPyCProtocol, stream: bytes, cuts) -> list:
+    received, start = [], 0
+    for end in list(cuts) + [len(stream)]:
+        received.extend(_normalized(message) for message, _, _ in protocol.receive_data(stream[start:end]))
+        start = end
+    return received
+
+
+def _benchmark(count: int, interning: bool):
+    messages = [MESSAGES[index % len(MESSAGES)] for index in range(count)]
+    sender = IPyCProtocol(interning=interning)
+    start = time.perf_counter()
+    stream = _encode(sender, messages)
+    encoding = time.perf_counter() - start
+    print(f'encode: {count / encoding:,.0f} msg/s, {len(stream) / encoding / 1e6:,.1f} MB/s')
+    for read_size in READ_SIZES[2:]:
+        receiver = IPyCProtocol(interning=interning)
+        start = time.perf_counter()
+        received = _decode(receiver, stream, range(read_size, len(stream), read_size))
+        decoding = time.perf_counter() - start
+        assert len(received) == count
+        print(f'decode ({read_size:>5} byte reads): {count / decoding:,.0f} msg/s, {len(stream) / decoding / 1e6:,.1f} MB/s')
+
+
+def _fuzz(rounds: int, interning: bool, generator: random.Random) -> int:
+    failures = 0
+    for round_number in range(rounds):
+        messages = [generator.choice(MESSAGES) for _ in range(generator.randint(1, 32))]
+        stream = _encode(IPyCProtocol(interning=interning), messages)
+        expected = _decode(IPyCProtocol(interning=interning), stream, [])
+        cuts = sorted(generator.sample(range(1, len(stream)), min(len(stream) - 1, generator.randint(1, 64))))
+        if _decode(IPyCProtocol(interning=interning), stream, cuts) != expected:
+            print(f'round {round_number}: splitting the stream changed the messages decoded')
+            failures += 1
+
+        damaged = bytearray(stream)
+        for _ in range(generator.randint(1, 8)):
+            position = generator.randrange(len(damaged))
+            action = generator.randrange(3)
+            if action == 0:
+                damaged[position] = generator.randrange(256)
+            elif action == 1:
+                damaged.insert(position, generator.choice(b'\x01\x02\x03\n' + bytes([generator.randrange(256)])))
+            elif len(damaged) > 1:
+                del damaged[position]
+        # Only splitting and parsing are fuzzed, since deserializing evaluates the type names it is sent
+        protocol, splitter = IPyCProtocol(interning=interning), FrameSplitter()
+        try:
+            for line, _ in splitter.feed(bytes(damaged)):
+                protocol.parse(line)
+        except Exception as error:
+            print(f'round {round_number}: parsing a damaged stream raised {error!r}')
+            failures += 1
+    return failures
+
+
+def _check_batches() -> int:
+    failures = 0
+    for records in BATCHES:
+        stream = _encode(IPyCProtocol(), [RecordBatch(records)])
+        received = list(_decode(IPyCProtocol(), stream, [])[0])
+        # Integers of a float column come back as floats, which compare equal only when none was rounded
+        if received != records:
+            print(f'batch {records} decoded to {received}')
+            failures += 1
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=100000, help='number of messages to benchmark with')
+    parser.add_argument('--interning', action='store_true', help='enable interning on both protocols')
+    parser.add_argument('--fuzz', type=int, default=0, help='number of fuzzing rounds to run')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the fuzzing rounds')
+    arguments = parser.parse_args()
+
+    _benchmark(arguments.messages, arguments.interning)
+    if arguments.fuzz:
+        # Damaged streams reference unknown interned names on purpose, which the protocol warns about
+        logging.getLogger(IPyCProtocol.__name__).setLevel(logging.ERROR)
+        failures = _fuzz(arguments.fuzz, arguments.interning, random.Random(arguments.seed))
+        print(f'fuzzing: {arguments.fuzz} rounds, {failures} failures')
+        batch_failures = _check_batches()
+        print(f'batches: {len(BATCHES)} checked, {batch_failures} failures')
+        sys.exit(1 if failures or batch_failures else 0)
+
+
+if __name__ == '__main__':
+    main()
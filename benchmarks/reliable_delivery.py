@@ -0,0 +1,73 @@
+"""Compares the throughput of the reliable mode of a resilient client with sending without it, and with
+confirming every message with a reply before sending the next.
+
+    python benchmarks/reliable_delivery.py [--messages 100000] [--window 1024] [--port 9999]
+
+Each run sends the given number of small messages from an :class:`~ipyc.IPyCResilientClient` to an
+:class:`~ipyc.IPyCSelectorHost` in another process, and reports the rate until the host has handled
+the last one, and for the reliable mode, until the client has received its acknowledgement.
+"""
+import argparse
+import multiprocessing
+import time
+
+from ipyc import IPyCResilientClient, IPyCSelectorHost
+
+MODES = ('unreliable', 'reliable', 'reply')
+
+MESSAGE = {'sensor': 'temperature', 'value': 21.5, 'ok': True}
+
+
+def _serve(mode: str, count: int, port: int, ready):
+    host = IPyCSelectorHost(port=port)
+    remaining = [count]
+
+    @host.on_message
+    def on_message(link, message):
+        remaining[0] -= 1
+        if mode == 'reply' or not remaining[0]:
+            link.send(True)
+        if not remaining[0]:
+            host.close()
+
+    ready.set()
+    host.serve_forever()
+
+
+def _run(mode: str, count: int, window: int, port: int) -> float:
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=_serve, args=(mode, count, port, ready))
+    server.start()
+    ready.wait()
+    client = IPyCResilientClient(port=port, reliable=mode == 'reliable', window=window)
+    client.connect()
+
+    start = time.perf_counter()
+    for _ in range(count):
+        client.send(MESSAGE)
+        if mode == 'reply':
+            client.receive()
+    if mode != 'reply':
+        # The host replies once it has handled the last message, which comes after its acknowledgement
+        client.receive()
+    elapsed = time.perf_counter() - start
+
+    client.close()
+    server.join()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=100000, help='number of messages to send in each mode')
+    parser.add_argument('--window', type=int, default=1024, help='window of unacknowledged messages of the reliable mode')
+    parser.add_argument('--port', type=int, default=9999, help='port of the host')
+    arguments = parser.parse_args()
+
+    for mode in MODES:
+        elapsed = _run(mode, arguments.messages, arguments.window, arguments.port)
+        print(f'{mode:>10}: {arguments.messages / elapsed:,.0f} msg/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Replays a capture recorded with ``link.start_capture`` against a running host and reports the
+throughput and latency it sustained.
+
+    python benchmarks/replay_capture.py traffic.ipyc [--host localhost] [--port 9999] [--speed 1]
+                                        [--direction sent] [--replies] [--asynchronous] [--interning]
+
+``--speed`` scales the original timing, ``2`` replaying twice as fast and ``0`` as fast as possible.
+Use ``--asynchronous`` for an :class:`~ipyc.AsyncIPyCHost` and leave it out for an :class:`~ipyc.IPyCHost`.
+With ``--replies``, the host is expected to answer every frame, and latency is measured up to the answer.
+"""
+import argparse
+import asyncio
+
+from ipyc import AsyncIPyCClient, IPyCClient
+from ipyc.capture import RECEIVED, SENT, replay, replay_async
+
+
+def _print(report):
+    print(f'{report.frames} frames, {report.bytes / 1e6:.2f} MB in {report.duration:.3f} s '
+          f'({report.skipped} file transfers skipped)')
+    print(f'throughput: {report.frames_per_second:,.0f} frames/s, {report.bytes_per_second / 1e6:,.2f} MB/s')
+    print(f'latency: p50 {report.latency_p50 * 1e6:,.1f} us, p99 {report.latency_p99 * 1e6:,.1f} us, '
+          f'max {report.latency_max * 1e6:,.1f} us')
+
+
+async def _replay_async(arguments, direction):
+    client = AsyncIPyCClient(arguments.host, arguments.port, interning=arguments.interning)
+    link = await client.connect()
+    try:
+        return await replay_async(link, arguments.capture, arguments.speed, direction, arguments.replies)
+    finally:
+        await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('capture', help='the capture file to replay')
+    parser.add_argument('--host', default='localhost', help='the address of the host under test')
+    parser.add_argument('--port', type=int, default=9999, help='the port of the host under test')
+    parser.add_argument('--speed', type=float, default=1.0, help='timing scale, 0 for as fast as possible')
+    parser.add_argument('--direction', choices=('sent', 'received'), default='sent',
+                        help='replay the frames the capturing link sent or those it received')
+    parser.add_argument('--replies', action='store_true', help='wait for a reply to every frame')
+    parser.add_argument('--asynchronous', action='store_true', help='the host is an AsyncIPyCHost')
+    parser.add_argument('--interning', action='store_true', help='the host has interning enabled')
+    arguments = parser.parse_args()
+
+    direction = SENT if arguments.direction == 'sent' else RECEIVED
+    if arguments.asynchronous:
+        report = asyncio.get_event_loop().run_until_complete(_replay_async(arguments, direction))
+    else:
+        client = IPyCClient(arguments.host, arguments.port, interning=arguments.interning)
+        link = client.connect()
+        try:
+            report = replay(link, arguments.capture, arguments.speed, direction, arguments.replies)
+        finally:
+            client.close()
+    _print(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -17,15 +17,102 @@ __license__ = 'MIT'
 __copyright__ = 'Copyright 2020-present dovedevic'
 __version__ = '1.1.1'
 
-__path__ = __import__('pkgutil').extend_path(__path__, __name__)
-
 from collections import namedtuple
+from importlib import import_module
 import logging
+import os
+import sys
+
+
+def _has_other_portions():
+    own = {os.path.realpath(path) for path in __path__}
+    for entry in sys.path:
+        if not isinstance(entry, str):
+            continue
+        portion = os.path.join(entry or os.curdir, __name__)
+        if os.path.isdir(portion) and os.path.realpath(portion) not in own:
+            return True
+        if os.path.isfile(portion + '.pkg'):
+            return True
+    return False
+
+
+# pkgutil is slow to import, so the package path is only extended when another portion of it exists
+if _has_other_portions():
+    __path__ = __import__('pkgutil').extend_path(__path__, __name__)
+
+# Public names and the submodule defining them. Submodules are imported on first access, so a
+# blocking client never imports asyncio and the asynchronous classes never import multiprocessing.
+_LAZY_ATTRIBUTES = {
+    'IPyCHost': 'blocking',
+    'IPyCMaster': 'blocking',
+    'IPyCSelectorHost': 'blocking',
+    'IPyCClient': 'blocking',
+    'IPyCSlave': 'blocking',
+    'IPyCResilientClient': 'blocking',
+    'IPyCResilientSlave': 'blocking',
+    'IPyCShardedClient': 'blocking',
+    'IPyCShardedSlave': 'blocking',
+    'AsyncIPyCHost': 'asynchronous',
+    'AsyncIPyCMaster': 'asynchronous',
+    'AsyncIPyCClient': 'asynchronous',
+    'AsyncIPyCSlave': 'asynchronous',
+    'AsyncIPyCResilientClient': 'asynchronous',
+    'AsyncIPyCResilientSlave': 'asynchronous',
+    'AsyncIPyCShardedClient': 'asynchronous',
+    'AsyncIPyCShardedSlave': 'asynchronous',
+    'IPyCLink': 'links',
+    'IPyCSelectorLink': 'links',
+    'AsyncIPyCLink': 'asynclinks',
+    'AsyncIPyCProtocolLink': 'asynclinks',
+    'RecordBatch': 'batches',
+    'ChannelMultiplexer': 'channels',
+    'AsyncChannelMultiplexer': 'channels',
+    'Channel': 'channels',
+    'AsyncChannel': 'channels',
+    'IPyCBufferedProtocol': 'transports',
+    'IPyCProtocol': 'protocol',
+    'HashRing': 'sharding',
+    'SpillQueue': 'spill',
+    'ReliableSender': 'reliability',
+    'ReliableReceiver': 'reliability',
+    'TokenBucket': 'limits',
+    'RateLimiter': 'limits',
+    'HostStatistics': 'limits',
+    'CaptureWriter': 'capture',
+    'CaptureReader': 'capture',
+    'IPyCSerialization': 'serialization',
+    'IPyCProfiling': 'profiling',
+}
+
+# Public names that refer to a whole submodule
+_LAZY_MODULES = {'IPyCSerialization', 'IPyCProfiling'}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = import_module(f'.{_LAZY_ATTRIBUTES[name]}', __name__)
+    value = module if name in _LAZY_MODULES else getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
 
-from .blocking import IPyCHost, IPyCMaster, IPyCClient, IPyCSlave
-from .asynchronous import AsyncIPyCHost, AsyncIPyCMaster, AsyncIPyCClient, AsyncIPyCSlave
-from .links import IPyCLink, AsyncIPyCLink
-from . import serialization as IPyCSerialization
+if sys.version_info < (3, 7):
+    # Module level __getattr__ only exists from Python 3.7 onwards. Submodules needing a newer
+    # version raise ImportError, and their names are left out.
+    for _name in list(_LAZY_ATTRIBUTES):
+        try:
+            __getattr__(_name)
+        except ImportError:
+            del _LAZY_ATTRIBUTES[_name]
+            __all__.remove(_name)
 
 VersionInfo = namedtuple('VersionInfo', 'major minor micro releaselevel serial')
 version_info = VersionInfo(major=1, minor=1, micro=1, releaselevel='release', serial=0)
@@ -0,0 +1,150 @@
+import array
+import json
+
+
+def _numpy():
+    # numpy is optional and slow to import, so it is only imported once an ndarray is sent or received
+    import numpy
+    return numpy
+
+
+def _byte_view(view: memoryview) -> memoryview:
+    try:
+        return view.cast('B')
+    except (TypeError, ValueError):
+        # Formats memoryview cannot cast (non-native, multi-character) are packed into a fresh buffer
+        return memoryview(view.tobytes())
+
+
+def _c_strides(shape, itemsize: int):
+    strides = []
+    for dimension in reversed(shape):
+        strides.insert(0, itemsize)
+        itemsize *= dimension
+    return strides
+
+
+def serialize_buffer(buffer_object: object):
+    """Serialize any object that supports the buffer protocol into a small header and
+    its raw contiguous buffer. The header describes the ``format``, ``shape``, and ``strides``
+    of the buffer so the receiving end can rebuild it without parsing the payload.
+
+    Parameters
+    ------------
+    buffer_object: :class:`object`
+        Any object supporting the buffer protocol, such as :class:`bytes`, :class:`bytearray`,
+        :class:`memoryview`, or :class:`array.array`.
+
+    Returns
+    --------
+    Tuple[:class:`str`, :class:`memoryview`]
+        The header describing the buffer and a flat byte view of the buffer itself.
+    """
+    view = memoryview(buffer_object)
+    if view.c_contiguous:
+        payload = _byte_view(view)
+    else:
+        # Non-contiguous views (slices with a step, transposes...) must be packed before going on the wire
+        payload = memoryview(view.tobytes(order='C'))
+    header = json.dumps({
+        'format': view.format,
+        'itemsize': view.itemsize,
+        'shape': list(view.shape),
+        'strides': _c_strides(view.shape, view.itemsize),
+    })
+    return header, payload
+
+
+def deserialize_memoryview(header: str, buffer: memoryview) -> memoryview:
+    """Rebuild a :class:`memoryview` from a header produced by :func:`serialize_buffer`.
+    The returned view references the received buffer directly; no copy is made.
+
+    Parameters
+    ------------
+    header: :class:`str`
+        The header sent along with the buffer.
+    buffer: :class:`memoryview`
+        The raw received buffer.
+
+    Returns
+    --------
+    :class:`memoryview`
+        A view shaped and typed like the one that was sent. If the sent format is not a native
+        format :meth:`memoryview.cast` understands, a flat byte view is returned instead.
+    """
+    description = json.loads(header)
+    buffer = memoryview(buffer).cast('B')
+    if description.get('format', 'B') == 'B' and len(description.get('shape', [None])) == 1:
+        return buffer
+    try:
+        return buffer.cast(description['format'], description['shape'])
+    except (TypeError, ValueError):
+        return buffer
+
+
+def deserialize_bytes(header: str, buffer: memoryview) -> bytes:
+    """Rebuild a :class:`bytes` object from a header produced by :func:`serialize_buffer`."""
+    return bytes(buffer)
+
+
+def deserialize_bytearray(header: str, buffer: memoryview) -> bytearray:
+    """Rebuild a :class:`bytearray` object from a header produced by :func:`serialize_buffer`."""
+    return bytearray(buffer)
+
+
+def serialize_array(array_object: array.array):
+    """Serialize an :class:`array.array` into a small header and its raw buffer.
+    See :func:`serialize_buffer` for details.
+    """
+    header, view = serialize_buffer(array_object)
+    return json.dumps(dict(json.loads(header), typecode=array_object.typecode)), view
+
+
+def deserialize_array(header: str, buffer: memoryview) -> array.array:
+    """Rebuild an :class:`array.array` from a header produced by :func:`serialize_array`.
+
+    .. note::
+        :class:`array.array` always owns its memory, so the received buffer is copied
+        once into the new array. Use :class:`memoryview` or numpy arrays to avoid this copy.
+    """
+    rebuilt = array.array(json.loads(header)['typecode'])
+    rebuilt.frombytes(buffer)
+    return rebuilt
+
+
+def serialize_ndarray(ndarray_object):
+    """Serialize a :class:`numpy.ndarray` into a small header containing its ``dtype``,
+    ``shape``, and ``strides``, and its raw buffer. C and Fortran ordered arrays are sent as-is,
+    any other layout is packed into C order first.
+
+    Requires numpy to be installed.
+    """
+    numpy = _numpy()
+    if not (ndarray_object.flags.c_contiguous or ndarray_object.flags.f_contiguous):
+        ndarray_object = numpy.ascontiguousarray(ndarray_object)
+    header = json.dumps({
+        'dtype': ndarray_object.dtype.str,
+        'shape': list(ndarray_object.shape),
+        'strides': list(ndarray_object.strides),
+    })
+    order = 'C' if ndarray_object.flags.c_contiguous else 'F'
+    return header, memoryview(ndarray_object.reshape(-1, order=order).view(numpy.uint8))
+
+
+def deserialize_ndarray(header: str, buffer: memoryview):
+    """Rebuild a :class:`numpy.ndarray` from a header produced by :func:`serialize_ndarray`.
+    The returned array references the received buffer directly; no copy is made.
+
+    If numpy is not installed, a flat byte :class:`memoryview` of the buffer is returned instead.
+    """
+    try:
+        numpy = _numpy()
+    except ImportError:
+        return memoryview(buffer).cast('B')
+    description = json.loads(header)
+    return numpy.ndarray(
+        shape=description['shape'],
+        dtype=numpy.dtype(description['dtype']),
+        buffer=buffer,
+        strides=description['strides'],
+    )
@@ -1,9 +1,44 @@
 import asyncio
+import collections
 import logging
+import random
 import signal
 import sys
 
-from .links import AsyncIPyCLink
+from .asynclinks import AsyncIPyCLink, AsyncIPyCProtocolLink
+from .limits import HostStatistics, TokenBucket
+from .packets import Acknowledgement
+from .reliability import DEFAULT_WINDOW, ReliableSender
+from .sharding import DEFAULT_REPLICAS, HashRing
+
+if hasattr(asyncio, 'BufferedProtocol'):
+    from .transports import IPyCBufferedProtocol
+else:
+    # asyncio.BufferedProtocol, which the protocol engine is built on, only exists from Python 3.7 onwards
+    IPyCBufferedProtocol = None
+
+ENGINES = ('streams', 'protocol')
+
+_DRAIN_INTERVAL = 0.1
+# How often a sender waiting for acknowledgements checks whether it should read them itself
+_ACKNOWLEDGEMENT_POLL_INTERVAL = 0.05
+# How long a connection must stay up, unless it received something, for reconnecting to start over at the initial backoff
+_STABLE_CONNECTION_TIME = 1.0
+
+
+def _stream_protocol(loop, client_connected_cb=None, reader=None) -> asyncio.StreamReaderProtocol:
+    # asyncio.start_server and asyncio.open_connection no longer take a loop from Python 3.10 onwards,
+    # so streams are set up on the loop directly, as those functions do themselves
+    reader = asyncio.StreamReader(loop=loop) if reader is None else reader
+    return asyncio.StreamReaderProtocol(reader, client_connected_cb, loop=loop)
+
+
+def _check_engine(engine: str):
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}', expected one of {', '.join(ENGINES)}")
+    if engine == 'protocol' and IPyCBufferedProtocol is None:
+        raise RuntimeError(f"The 'protocol' engine requires Python 3.7 or newer, "
+                           f"this is Python {sys.version_info.major}.{sys.version_info.minor}")
 
 
 class AsyncIPyCHost:
@@ -24,30 +59,194 @@ class AsyncIPyCHost:
         The :class:`asyncio.AbstractEventLoop` to use for asynchronous operations.
         Defaults to ``None``, in which case the default event loop is used via
         :func:`asyncio.get_event_loop()`.
+    concurrent_handlers: Optional[:class:`bool`]
+        Whether the registered :meth:`on_connect` handlers of a new connection run concurrently
+        rather than one after another. This defaults to ``False``.
+    max_workers: Optional[:class:`int`]
+        The maximum number of :meth:`on_message` handler invocations that may run at once across
+        all connections. This defaults to ``None``, meaning there is no global limit.
+    max_workers_per_connection: Optional[:class:`int`]
+        The maximum number of :meth:`on_message` handler invocations that may run at once for a
+        single connection. This defaults to ``1``, which processes each connection's messages one
+        at a time. ``None`` removes the per-connection limit.
+    ordered: Optional[:class:`bool`]
+        Whether the messages of a connection must be handled in the order they were received. When
+        set, ``max_workers_per_connection`` is ignored and each connection has a single worker,
+        while different connections are still handled in parallel. This defaults to ``False``.
+    interning: Optional[:class:`bool`]
+        Whether the :class:`AsyncIPyCLink` connections this host creates intern repeated type names,
+        dictionary keys, and strings. Clients must enable it as well. See :class:`AsyncIPyCLink` for
+        details. This defaults to ``False``.
+    engine: Optional[:class:`str`]
+        The transport engine of the connections. ``streams`` reads and writes through asyncio's
+        :class:`asyncio.StreamReader` and :class:`asyncio.StreamWriter`. ``protocol`` uses an
+        :class:`IPyCBufferedProtocol`, which splits frames as they arrive without a coroutine or a copy
+        per read and sustains higher message rates. Both engines speak the same wire format, so clients
+        may use either. The ``protocol`` engine requires Python 3.7 or newer. This defaults to ``streams``.
+    shutdown_timeout: Optional[:class:`float`]
+        The number of seconds :meth:`close` lets in-flight messages finish and connections close gracefully
+        when it is not given a timeout of its own, including when :meth:`run` is stopped. This defaults to
+        ``None``, waiting as long as it takes.
+    handoff_path: Optional[:class:`str`]
+        The path of a Unix socket where the host being replaced waits in :meth:`hand_off`, or in
+        :meth:`IPyCSelectorHost.hand_off`. If one is found, :meth:`start` takes over its listener and
+        the connections it handed over instead of binding to the address. This defaults to ``None``,
+        always binding.
+    handoff_timeout: Optional[:class:`float`]
+        The number of seconds to keep trying to reach the host at ``handoff_path`` before binding to the
+        address instead. This defaults to ``0``, trying once.
+    max_connections: Optional[:class:`int`]
+        The number of connections the host serves at once, including those waiting to be admitted.
+        Connections past it are closed as soon as they are accepted. This defaults to ``None``, unlimited.
+    backlog: Optional[:class:`int`]
+        The number of connections the listener queues until they are accepted, and the number that may
+        wait to be admitted under ``accept_rate``. Connections past it are closed as soon as they are
+        accepted. This defaults to ``100``.
+    accept_rate: Optional[:class:`float`]
+        The number of connections admitted per second. Connections accepted faster wait, in turn, before
+        their :meth:`on_connect` handlers run. This defaults to ``None``, unlimited.
+    accept_burst: Optional[:class:`float`]
+        The number of connections admitted at once after the host was idle, see :class:`~ipyc.limits.TokenBucket`.
+        This defaults to one second worth of ``accept_rate``.
+    messages_per_second: Optional[:class:`float`]
+        The number of messages each connection may send per second. Past it, the host stops reading from
+        the connection for a while, which slows the client down in turn. See :meth:`AsyncIPyCLink.limit_rate`.
+        This defaults to ``None``, unlimited.
+    bytes_per_second: Optional[:class:`float`]
+        The number of bytes each connection may send per second, in the same way. This defaults to ``None``, unlimited.
+    message_burst: Optional[:class:`float`]
+        The number of messages a connection may send at once after it was idle. This defaults to one second worth.
+    byte_burst: Optional[:class:`float`]
+        The number of bytes a connection may send at once after it was idle. This defaults to one second worth.
+    read_budget: Optional[:class:`int`]
+        The number of messages read from a connection in a row, out of what it has already sent, before
+        the connections ready next get their turn. This bounds how long a flood from one client delays the
+        messages of the others, whether they are read by :meth:`on_message` or by :meth:`on_connect`
+        handlers. See :meth:`AsyncIPyCLink.set_read_budget`, and :attr:`AsyncIPyCLink.loop_time` for the
+        time each connection kept the event loop busy. This defaults to ``None``, unlimited.
+    read_budget_bytes: Optional[:class:`int`]
+        The number of bytes read from a connection in a row in the same way. This defaults to ``None``, unlimited.
 
     Attributes
     -----------
     loop: :class:`asyncio.AbstractEventLoop`
         The event loop that the client uses for asynchronous events.
     """
-    def __init__(self, ip_address: str='localhost', port:  int=9999, loop=None):
+    def __init__(self, ip_address: str='localhost', port:  int=9999, loop=None, concurrent_handlers=False,
+                 max_workers=None, max_workers_per_connection=1, ordered=False, interning=False, engine='streams',
+                 shutdown_timeout=None, handoff_path=None, handoff_timeout=0.0, max_connections=None, backlog=100,
+                 accept_rate=None, accept_burst=None, messages_per_second=None, bytes_per_second=None,
+                 message_burst=None, byte_burst=None, read_budget=None, read_budget_bytes=None):
+        _check_engine(engine)
         self._ip_address = ip_address
         self._port = port
         self._logger = logging.getLogger(self.__class__.__name__)
         self.loop = asyncio.get_event_loop() if loop is None else loop
-        self._server = None
+        self._servers = []
+        self._handoff_path = handoff_path
+        self._handoff_timeout = handoff_timeout
         self._closed = False
         self._connections = set()
         self._handlers = {
-            'connect': set()
+            'connect': set(),
+            'message': []
         }
         self._on_close = asyncio.Event()
+        self._concurrent_handlers = concurrent_handlers
+        self._max_workers_per_connection = 1 if ordered else max_workers_per_connection
+        self._worker_slots = asyncio.Semaphore(max_workers) if max_workers else None
+        self._workers = set()
+        self._interning = interning
+        self._engine = engine
+        self._shutdown_timeout = shutdown_timeout
+        self._max_connections = max_connections
+        self._backlog = backlog
+        self._accept_bucket = None if accept_rate is None else TokenBucket(accept_rate, accept_burst)
+        self._admitting = 0
+        self._rate_limits = (messages_per_second, bytes_per_second, message_burst, byte_burst)
+        self._read_budget = (read_budget, read_budget_bytes)
+        self._statistics = HostStatistics()
 
     async def __handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
-        new_connection = AsyncIPyCLink(reader, writer, self)
+        await self.__serve(AsyncIPyCLink(reader, writer, self, interning=self._interning))
+
+    async def __handle_protocol(self, protocol: 'IPyCBufferedProtocol'):
+        await self.__serve(AsyncIPyCProtocolLink(protocol, self, interning=self._interning))
+
+    async def __reject(self, connection: AsyncIPyCLink, reason: str) -> bool:
+        self._statistics.rejected += 1
+        self._logger.warning(f"Rejected a connection, {reason}")
+        await connection.close()
+        return False
+
+    async def __admit(self, connection: AsyncIPyCLink) -> bool:
+        if self._max_connections is not None and len(self.connections) > self._max_connections:
+            return await self.__reject(connection, f"the host has {self._max_connections} connections already")
+        if self._accept_bucket is not None:
+            # Every connection takes its token at once, so those waiting are admitted one after the other
+            self._accept_bucket.take()
+            delay = self._accept_bucket.wait_time()
+            if delay:
+                if self._admitting >= self._backlog:
+                    self._accept_bucket.take(-1)
+                    return await self.__reject(connection, f"{self._admitting} connections are waiting to be admitted already")
+                self._statistics.delayed += 1
+                self._admitting += 1
+                try:
+                    await asyncio.sleep(delay)
+                finally:
+                    self._admitting -= 1
+                if not connection.is_active():
+                    # The host was closed in the meantime, closing the connection as well
+                    return False
+        self._statistics.accepted += 1
+        return True
+
+    async def __serve(self, new_connection: AsyncIPyCLink):
         self.connections.add(new_connection)
-        for handle in self._handlers['connect']:
-            await handle(new_connection)
+        if not await self.__admit(new_connection):
+            return
+        new_connection.limit_rate(*self._rate_limits, statistics=self._statistics)
+        new_connection.set_read_budget(*self._read_budget)
+        if self._concurrent_handlers:
+            await asyncio.gather(*(handle(new_connection) for handle in self._handlers['connect']))
+        else:
+            for handle in self._handlers['connect']:
+                await handle(new_connection)
+        if self._handlers['message']:
+            await self.__dispatch_messages(new_connection)
+
+    async def __dispatch_messages(self, connection: AsyncIPyCLink):
+        connection_slots = asyncio.Semaphore(self._max_workers_per_connection) if self._max_workers_per_connection else None
+        connection_workers = set()
+        while connection.is_active():
+            message = await connection.receive()
+            if message is None or self._closed:
+                # Messages still arriving while the host shuts down are not handled anymore
+                continue
+            # Stop reading from this connection while it, or the host, has no free workers
+            if connection_slots:
+                await connection_slots.acquire()
+            if self._worker_slots:
+                await self._worker_slots.acquire()
+            worker = asyncio.ensure_future(self.__handle_message(connection, message, connection_slots), loop=self.loop)
+            for workers in (connection_workers, self._workers):
+                workers.add(worker)
+                worker.add_done_callback(workers.discard)
+        if connection_workers:
+            await asyncio.gather(*connection_workers, return_exceptions=True)
+
+    async def __handle_message(self, connection: AsyncIPyCLink, message: object, connection_slots: asyncio.Semaphore):
+        try:
+            for handle in self._handlers['message']:
+                await handle(connection, message)
+        except Exception:
+            self._logger.exception(f'An on_message handler raised while handling a {type(message).__name__}')
+        finally:
+            if connection_slots:
+                connection_slots.release()
+            if self._worker_slots:
+                self._worker_slots.release()
 
     def _cleanup_loop(self, loop):
         try:
@@ -120,6 +319,58 @@ class AsyncIPyCHost:
         self._logger.debug(f'[IPyCHost] {coro.__name__} has successfully been registered as an on_connect event')
         return coro
 
+    def on_message(self, coro):
+        """A decorator that registers a coroutine to execute for every message received on any connection.
+
+        The decorated function must be a :ref:`coroutine <coroutine>` and possess two parameters, one for the
+        :class:`AsyncIPyCLink` connection link the message arrived on and one for the received message; if not,
+        a :exc:`TypeError` is raised.
+
+        When at least one message handler is registered, the host receives from each connection itself once
+        its :meth:`on_connect` handlers have returned, and fans the messages out to worker tasks bounded by
+        ``max_workers`` and ``max_workers_per_connection``. The :meth:`on_connect` handlers must then not
+        consume messages from the link themselves.
+
+        Parameters
+        ------------
+        coro: :ref:`coroutine <coroutine>`
+            The coroutine handler to be called when a message is received
+        Example
+        ---------
+        .. code-block:: python3
+
+            host = AsyncIPyCHost(max_workers=64, max_workers_per_connection=8)
+
+            @host.on_message
+            async def messageReceived(link: AsyncIPyCLink, message):
+                await link.send(await process(message))
+        Raises
+        --------
+        TypeError
+            The coroutine passed is not actually a coroutine or does not contain enough arguments.
+        """
+        if not asyncio.iscoroutinefunction(coro):
+            raise TypeError('@on_message must register a coroutine function')
+
+        if coro.__code__.co_argcount not in [2, 3]:
+            raise TypeError('@on_message coroutines must allow for a Link and a message argument')
+
+        if coro not in self._handlers['message']:
+            self._handlers['message'].append(coro)
+        self._logger.debug(f'[IPyCHost] {coro.__name__} has successfully been registered as an on_message event')
+        return coro
+
+    def remove_message_handler(self, coro):
+        """Removes a message handler from the internal message dispatcher.
+
+        Parameters
+        ------------
+        coro: :ref:`coroutine <coroutine>`
+            The coroutine handler to be removed.
+        """
+        if coro in self._handlers['message']:
+            self._handlers['message'].remove(coro)
+
     def add_connection_handler(self, coro):
         """Wrapped decorator for the :meth:`on_connect` method.
 
@@ -154,16 +405,113 @@ class AsyncIPyCHost:
         """:class:`set`: Returns the set of all active :class:`AsyncIPyCLink` connections the host is handling."""
         return self._connections
 
+    @property
+    def statistics(self):
+        """:class:`~ipyc.limits.HostStatistics`: The counters of the connections admitted, rejected, and delayed,
+        and of the throttling of connections over their rate. Each connection keeps its own in
+        :attr:`AsyncIPyCLink.rate_limiter` as well."""
+        return self._statistics
+
     async def start(self, *args):
         """|coro|
 
         A shorthand coroutine for :func:`asyncio.start_server`. Any
-        arguments supplied are passed to :func:`asyncio.start_server()`
-        and afterward to :func:`asyncio.loop.create_server()`. See the asyncio
-        documentation for these arguments and their use.
+        arguments supplied are passed to :func:`asyncio.loop.create_server()`.
+        See the asyncio documentation for these arguments and their use.
 
+        With a ``handoff_path``, the listener taken over from the host being replaced is served instead,
+        and the arguments are not used.
         """
-        self._server = await asyncio.start_server(self.__handle_connection, host=self._ip_address, port=self._port, loop=self.loop, *args)
+        listeners, adopted = [], []
+        if self._handoff_path is not None:
+            listeners, adopted = await self.__take_over()
+        if not listeners:
+            self._servers.append(await self.__serve_listener(None, *args))
+        for listener in listeners:
+            self._servers.append(await self.__serve_listener(listener))
+        for sock in adopted:
+            if self._engine == 'protocol':
+                await self.loop.connect_accepted_socket(lambda: IPyCBufferedProtocol(self.__handle_protocol), sock)
+            else:
+                await self.loop.connect_accepted_socket(lambda: _stream_protocol(self.loop, self.__handle_connection), sock)
+
+    async def __take_over(self) -> tuple:
+        from .handoff import take_over_sockets
+
+        taken = await self.loop.run_in_executor(None, take_over_sockets, self._handoff_path, self._handoff_timeout)
+        if taken is None:
+            self._logger.info(f"No host to take over from at {self._handoff_path}")
+            return [], []
+        listeners, connections = taken
+        self._logger.info(f"Took over {len(listeners)} listeners and {len(connections)} connections from {self._handoff_path}")
+        return listeners, connections
+
+    async def __serve_listener(self, listener, *args):
+        if self._engine == 'protocol':
+            if listener is not None:
+                return await self.loop.create_server(lambda: IPyCBufferedProtocol(self.__handle_protocol), sock=listener,
+                                                     backlog=self._backlog)
+            return await self.loop.create_server(
+                lambda: IPyCBufferedProtocol(self.__handle_protocol), self._ip_address, self._port, *args, backlog=self._backlog)
+        if listener is not None:
+            return await self.loop.create_server(lambda: _stream_protocol(self.loop, self.__handle_connection), sock=listener,
+                                                 backlog=self._backlog)
+        return await self.loop.create_server(
+            lambda: _stream_protocol(self.loop, self.__handle_connection), self._ip_address, self._port, *args,
+            backlog=self._backlog)
+
+    async def hand_off(self, path: str, timeout=None, drain_timeout=None) -> bool:
+        """|coro|
+
+        Wait for a successor host, created with the same ``path`` as its ``handoff_path``, and hand it
+        the listener, so that new clients connect to the successor without ever being refused. This host
+        then keeps serving the connections it has until their clients close them, and closes as
+        :meth:`close` does once none are left or the drain timeout runs out.
+
+        Established connections are not handed over, since their streams may already hold data read from
+        the socket. To hand them over as well, see :meth:`IPyCSelectorHost.hand_off`.
+
+        Parameters
+        ------------
+        path: :class:`str`
+            The path of the Unix socket to wait on. An existing file at that path is replaced.
+        timeout: Optional[:class:`float`]
+            The number of seconds to wait for a successor. Defaults to ``None``, waiting forever.
+        drain_timeout: Optional[:class:`float`]
+            The number of seconds to let the remaining connections run before closing the host.
+            Defaults to ``None``, waiting until their clients close them.
+
+        Returns
+        --------
+        :class:`bool`
+            Whether the listener was handed over. If not, this host keeps serving as before.
+        """
+        if self._closed or not self._servers:
+            return False
+        from .handoff import hand_off_sockets
+
+        listeners = [listener for server in self._servers for listener in server.sockets]
+        self._logger.info(f"Waiting for a successor at {path}")
+        if not await self.loop.run_in_executor(None, hand_off_sockets, path, listeners, (), timeout):
+            self._logger.info(f"No successor took over the listener")
+            return False
+        # Connections accepted just before are still being set up, and fail if their server closes first
+        for listener in listeners:
+            self.loop.remove_reader(listener.fileno())
+        await asyncio.sleep(0)
+        # Closing this process' copies of the listeners leaves the successor's open
+        for server in self._servers:
+            server.close()
+        self._servers = []
+        self._logger.info(f"Handed the listener over, draining {len(self.connections)} connections")
+        deadline = None if drain_timeout is None else self.loop.time() + drain_timeout
+        while True:
+            # Those connections are only added once their handler task has started
+            await asyncio.sleep(_DRAIN_INTERVAL)
+            if not self.connections or self._closed or (deadline is not None and self.loop.time() >= deadline):
+                break
+        await self.close()
+        return True
 
     def run(self, *args):
         """A blocking call that begins server listening and abstracts
@@ -216,16 +564,53 @@ class AsyncIPyCHost:
             except KeyboardInterrupt:
                 return None
 
-    async def close(self):
+    def _remaining(self, deadline):
+        return None if deadline is None else max(deadline - self.loop.time(), 0)
+
+    async def close(self, timeout=None):
         """|coro|
 
-        Closes all :class:`AsyncIPyCLink` connections and stops the internal listener.
+        Stops the internal listener and closes all :class:`AsyncIPyCLink` connections.
+
+        The host stops accepting connections and dispatching newly received messages, then waits for the
+        :meth:`on_message` handlers already running to finish. Every connection is then closed at once,
+        each sending EOF and waiting for what it has buffered to be written. Connections that have not
+        closed when the timeout runs out are aborted, and handlers still running are cancelled.
+
+        Parameters
+        ------------
+        timeout: Optional[:class:`float`]
+            The number of seconds the whole shutdown may take before connections are aborted.
+            Defaults to ``None``, in which case the ``shutdown_timeout`` of the host is used.
         """
         if self._closed:
             return
         self._closed = True
-        for connection in list(self.connections):
-            await connection.close()
+        timeout = self._shutdown_timeout if timeout is None else timeout
+        deadline = None if timeout is None else self.loop.time() + timeout
+        for server in self._servers:
+            server.close()
+        for connection in self.connections:
+            # Messages arriving from now on are not handled, reliable senders must send them again
+            connection._accepting = False
+
+        if self._workers:
+            self._logger.debug(f"Waiting for {len(self._workers)} message handlers to finish")
+            await asyncio.wait(set(self._workers), timeout=self._remaining(deadline))
+        closing = {asyncio.ensure_future(connection.close(), loop=self.loop): connection for connection in list(self.connections)}
+        if closing:
+            self._logger.debug(f"Closing {len(closing)} connections")
+            _, pending = await asyncio.wait(list(closing), timeout=self._remaining(deadline))
+            if pending:
+                self._logger.warning(f"Aborting {len(pending)} connections that did not close within {timeout} seconds")
+                for task in pending:
+                    closing[task].abort()
+                await asyncio.wait(pending)
+            for task in closing:
+                if not task.cancelled() and task.exception() is not None:
+                    self._logger.debug(f"A connection failed to close", exc_info=task.exception())
+        for worker in list(self._workers):
+            worker.cancel()
         self._on_close.set()
 
 
@@ -249,17 +634,27 @@ class AsyncIPyCClient:
         The :class:`asyncio.AbstractEventLoop` to use for asynchronous operations.
         Defaults to ``None``, in which case the default event loop is used via
         :func:`asyncio.get_event_loop()`.
+    interning: Optional[:class:`bool`]
+        Whether the :class:`AsyncIPyCLink` connection interns repeated type names, dictionary keys,
+        and strings. The host must enable it as well. See :class:`AsyncIPyCLink` for details.
+        This defaults to ``False``.
+    engine: Optional[:class:`str`]
+        The transport engine of the connection, ``streams`` or ``protocol``. See :class:`AsyncIPyCHost`.
+        This defaults to ``streams``.
 
     Attributes
     -----------
     loop: :class:`asyncio.AbstractEventLoop`
         The event loop that the client uses for asynchronous events.
     """
-    def __init__(self, ip_address: str='localhost', port:  int=9999, loop=None):
+    def __init__(self, ip_address: str='localhost', port:  int=9999, loop=None, interning=False, engine='streams'):
+        _check_engine(engine)
         self._ip_address = ip_address
         self._port = port
         self._logger = logging.getLogger(self.__class__.__name__)
         self.loop = asyncio.get_event_loop() if loop is None else loop
+        self._interning = interning
+        self._engine = engine
         self._link = None
         self._closed = False
         self._handlers = {
@@ -269,17 +664,24 @@ class AsyncIPyCClient:
     async def connect(self, *args) -> AsyncIPyCLink:
         """|coro|
 
-        A shorthand coroutine for :func:`asyncio.open_connection`. Any
-        arguments supplied are directly passed to this method; See the
-        asyncio documentation for these arguments and their use.
+        A shorthand coroutine for :func:`asyncio.open_connection`. Any arguments supplied are directly
+        passed to :meth:`asyncio.loop.create_connection`; See the asyncio documentation for these
+        arguments and their use.
 
         Returns
         -------
         :class:`AsyncIPyCLink`
             The connection that has been established with a :class:`AsyncIPyCHost`.
         """
-        reader, writer = await asyncio.open_connection(host=self._ip_address, port=self._port, loop=self.loop, *args)
-        self._link = AsyncIPyCLink(reader, writer, self)
+        if self._engine == 'protocol':
+            _, protocol = await self.loop.create_connection(IPyCBufferedProtocol, self._ip_address, self._port, *args)
+            self._link = AsyncIPyCProtocolLink(protocol, self, interning=self._interning)
+            return self._link
+        reader = asyncio.StreamReader(loop=self.loop)
+        transport, protocol = await self.loop.create_connection(
+            lambda: _stream_protocol(self.loop, reader=reader), self._ip_address, self._port, *args)
+        writer = asyncio.StreamWriter(transport, protocol, reader, self.loop)
+        self._link = AsyncIPyCLink(reader, writer, self, interning=self._interning)
         return self._link
 
     async def close(self):
@@ -304,3 +706,710 @@ class AsyncIPyCClient:
 class AsyncIPyCSlave(AsyncIPyCClient):
     """Pseudo-class for AsyncIPyCClient"""
     pass
+
+
+class AsyncIPyCResilientClient(AsyncIPyCClient):
+    """Represents a :class:`AsyncIPyCClient` that survives host restarts. When the connection
+    to the host is lost, the client reconnects in the background with jittered exponential
+    backoff. Messages sent in the meantime are buffered and replayed in order once the
+    connection is back.
+    A number of options can be passed to the :class:`AsyncIPyCResilientClient`.
+
+    .. note::
+        A message written to the socket just before the host went away can still be lost;
+        only messages sent once the loss is noticed are buffered. The ``reliable`` mode
+        delivers every message at least once instead.
+
+    Parameters
+    -----------
+    ip_address: Optional[:class:`str`]
+        The IP address to connect to. This defaults to ``localhost``.
+    port: Optional[:class:`int`]
+        The port to target at the host IP address. This defaults to ``9999``.
+    loop: Optional[:class:`asyncio.AbstractEventLoop`]
+        The :class:`asyncio.AbstractEventLoop` to use for asynchronous operations.
+        Defaults to ``None``, in which case the default event loop is used via
+        :func:`asyncio.get_event_loop()`.
+    interning: Optional[:class:`bool`]
+        Whether the :class:`AsyncIPyCLink` connection interns repeated type names, dictionary keys,
+        and strings. The tables start over on every reconnection. This defaults to ``False``.
+    engine: Optional[:class:`str`]
+        The transport engine of the connection, ``streams`` or ``protocol``. See :class:`AsyncIPyCHost`.
+        This defaults to ``streams``.
+    max_buffered_messages: Optional[:class:`int`]
+        The number of messages kept while disconnected. Once full, the oldest buffered message is
+        dropped for every new one. Not used in ``reliable`` mode. This defaults to ``1024``.
+    initial_backoff: Optional[:class:`float`]
+        The upper bound, in seconds, of the delay before every reconnection attempt. Every attempt
+        doubles it, including those that connected but lost the connection again right away, such as
+        when the host rejects the connection. It only starts over once a connection stayed up for a
+        second or received a message. The actual delay is drawn uniformly between zero and the bound so
+        that clients of the same host do not reconnect in lockstep. This defaults to ``0.1``.
+    max_backoff: Optional[:class:`float`]
+        The largest upper bound, in seconds, the delay between attempts can grow to. This defaults to ``30``.
+    reliable: Optional[:class:`bool`]
+        Whether to deliver every message at least once, as described in :mod:`ipyc.reliability`. Each
+        message carries a sequence number, and the host acknowledges them in batches. The messages it has
+        not acknowledged are kept and sent again once reconnected, and it suppresses the copies it had
+        already received. :meth:`send` waits while ``window`` messages are unacknowledged, reading the
+        acknowledgements itself unless :meth:`receive` is running. Any host can receive from a
+        reliable client. This defaults to ``False``.
+    window: Optional[:class:`int`]
+        The number of unacknowledged messages kept in ``reliable`` mode. This defaults to ``1024``.
+
+    Attributes
+    -----------
+    loop: :class:`asyncio.AbstractEventLoop`
+        The event loop that the client uses for asynchronous events.
+    """
+    def __init__(self, ip_address: str='localhost', port:  int=9999, loop=None, interning=False,
+                 max_buffered_messages=1024, initial_backoff=0.1, max_backoff=30.0, engine='streams',
+                 reliable=False, window=DEFAULT_WINDOW):
+        super().__init__(ip_address, port, loop=loop, interning=interning, engine=engine)
+        self._buffer = collections.deque()
+        self._max_buffered_messages = max_buffered_messages
+        self._initial_backoff = initial_backoff
+        self._max_backoff = max_backoff
+        self._attempt = 0
+        self._connected_since = None
+        self._connected = asyncio.Event()
+        self._reconnector = None
+        self._dropped = 0
+        self._links = set()
+        self._sender = ReliableSender(window) if reliable else None
+        # Messages read while waiting for acknowledgements, which receive returns first
+        self._inbox = collections.deque()
+        self._reading = asyncio.Lock()
+        self._acknowledged = asyncio.Event()
+
+    @property
+    def connections(self):
+        """:class:`set`: Returns the set of all :class:`AsyncIPyCLink` connections the client has open.
+        Besides the current connection, this may briefly include one that was lost and is being closed.
+        """
+        return self._links
+
+    @property
+    def buffered(self):
+        """:class:`int`: The number of messages waiting for the connection to come back."""
+        return len(self._buffer)
+
+    @property
+    def dropped(self):
+        """:class:`int`: The number of buffered messages dropped because the buffer was full."""
+        return self._dropped
+
+    @property
+    def unacknowledged(self):
+        """:class:`int`: In ``reliable`` mode, the number of messages sent that the host has not acknowledged yet."""
+        return 0 if self._sender is None else self._sender.in_flight
+
+    @property
+    def acknowledged(self):
+        """:class:`int`: In ``reliable`` mode, the sequence number of the last message the host acknowledged,
+        along with every message before it. :meth:`send` returns the sequence number of each message."""
+        return 0 if self._sender is None else self._sender.acknowledged
+
+    def is_connected(self):
+        """:class:`bool`: Indicates if the client currently has a usable connection to the host."""
+        return self._connected.is_set()
+
+    async def _resend(self, link: AsyncIPyCLink):
+        # Messages wrapped while resending are not sent by send, and are resent in turn
+        sequence = 0
+        while True:
+            messages = [message for message in self._sender.unacknowledged if message.sequence > sequence]
+            if not messages:
+                return
+            for message in messages:
+                await link.send(message)
+                if not link.is_active():
+                    raise ConnectionResetError
+                sequence = message.sequence
+
+    def _backoff(self) -> float:
+        delay = random.uniform(0, min(self._max_backoff, self._initial_backoff * 2 ** self._attempt))
+        self._attempt += 1
+        return delay
+
+    def _received(self):
+        # A connection that carried traffic was a working one, the next reconnection starts over
+        self._attempt = 0
+
+    async def _reconnect(self, *args, wait=True):
+        # A connection lost right after it was made does not count as working, so backoff keeps growing
+        if self._connected_since is not None and self.loop.time() - self._connected_since >= _STABLE_CONNECTION_TIME:
+            self._attempt = 0
+        self._connected_since = None
+        while not self._closed:
+            if wait:
+                delay = self._backoff()
+                self._logger.debug(f"Reconnecting to the host in {delay:.2f}s")
+                await asyncio.sleep(delay)
+            wait = True
+            previous = self._link
+            try:
+                link = await AsyncIPyCClient.connect(self, *args)
+            except OSError:
+                self._logger.debug(f"Could not reach the host")
+                continue
+            self._links.add(link)
+            if previous is not None:
+                await previous.close()
+            try:
+                if self._sender is not None:
+                    # The host suppresses the copies of the messages it had already received
+                    await self._resend(link)
+                # Messages sent while replaying are appended to the buffer and replayed in turn
+                while self._buffer:
+                    serializable_object, kwargs = self._buffer[0]
+                    await link.send(serializable_object, **kwargs)
+                    if not link.is_active():
+                        raise ConnectionResetError
+                    self._buffer.popleft()
+            except OSError:
+                self._logger.debug(f"Lost the connection while replaying buffered messages")
+                continue
+            self._logger.info(f"Connected to the host")
+            self._connected_since = self.loop.time()
+            self._connected.set()
+            return
+
+    def _start_reconnecting(self):
+        self._connected.clear()
+        if self._closed or (self._reconnector and not self._reconnector.done()):
+            return
+        self._reconnector = asyncio.ensure_future(self._reconnect(), loop=self.loop)
+
+    async def connect(self, *args) -> AsyncIPyCLink:
+        """|coro|
+
+        Connects to the host, retrying with backoff until it accepts the connection. Any
+        arguments supplied are passed to :meth:`asyncio.loop.create_connection` on every attempt.
+
+        Returns
+        -------
+        :class:`AsyncIPyCLink`
+            The connection that has been established with a :class:`AsyncIPyCHost`. The link is
+            replaced on every reconnection, so prefer the client's own :meth:`send` and :meth:`receive`.
+        """
+        await self._reconnect(*args, wait=False)
+        return self._link
+
+    async def close(self):
+        """|coro|
+
+        Stops reconnecting, closes the :class:`AsyncIPyCLink` connection, and drops any buffered messages.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._connected.set()
+        if self._reconnector and not self._reconnector.done():
+            self._reconnector.cancel()
+        for link in list(self._links):
+            await link.close()
+        self._link = None
+        self._buffer.clear()
+        self._acknowledged.set()
+
+    def _buffer_message(self, serializable_object: object, kwargs: dict):
+        if len(self._buffer) >= self._max_buffered_messages:
+            self._buffer.popleft()
+            self._dropped += 1
+            self._logger.warning(f"The reconnection buffer is full, dropped the oldest message")
+        self._buffer.append((serializable_object, kwargs))
+
+    def _handle_acknowledgement(self, acknowledgement: Acknowledgement):
+        self._sender.acknowledge(acknowledgement)
+        self._acknowledged.set()
+
+    async def _wait_for_acknowledgements(self):
+        # Acknowledgements arrive among the messages of the host, which are kept for receive
+        if self._reading.locked():
+            # receive is running, and handles the acknowledgements it reads
+            self._acknowledged.clear()
+            try:
+                await asyncio.wait_for(self._acknowledged.wait(), _ACKNOWLEDGEMENT_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            return
+        async with self._reading:
+            await self._connected.wait()
+            link = self._link
+            if self._closed or link is None:
+                return
+            message = await link.receive()
+            if message is not None:
+                self._received()
+            if isinstance(message, Acknowledgement):
+                self._handle_acknowledgement(message)
+            elif message is not None or link.is_active():
+                self._inbox.append(message)
+            elif link is self._link:
+                self._start_reconnecting()
+
+    async def _send_reliably(self, serializable_object: object, kwargs: dict) -> int:
+        while not self._closed:
+            if not self._sender.full:
+                message = self._sender.wrap(serializable_object, kwargs.get('encoding', 'utf-8'))
+                if self._connected.is_set() and self._link and self._link.is_active():
+                    try:
+                        # Sequenced messages are written before the first await, so they stay in order
+                        await self._link.send(message, **kwargs)
+                        return message.sequence
+                    except OSError:
+                        self._logger.debug(f"Lost the connection to the host while sending")
+                # The message stays in the window and is sent once reconnected
+                self._start_reconnecting()
+                return message.sequence
+            await self._wait_for_acknowledgements()
+        return None
+
+    async def send(self, serializable_object: object, **kwargs):
+        """|coro|
+
+        Send a serializable object to the host, or buffer it if the client is disconnected.
+        Any keyword arguments are passed to :meth:`AsyncIPyCLink.send`.
+
+        Parameters
+        ------------
+        serializable_object: :class:`object`
+            The object to be sent to the host.
+
+        Returns
+        --------
+        Optional[:class:`int`]
+            In ``reliable`` mode, the sequence number of the message, which is acknowledged once
+            :attr:`acknowledged` reaches it.
+        """
+        if self._closed:
+            self._logger.debug(f"Attempted to send data when the client is closed! Ignoring.")
+            return
+        if self._sender is not None:
+            return await self._send_reliably(serializable_object, kwargs)
+        if self._connected.is_set() and not self._buffer and self._link and self._link.is_active():
+            try:
+                await self._link.send(serializable_object, **kwargs)
+                return
+            except OSError:
+                self._logger.debug(f"Lost the connection to the host while sending")
+        self._buffer_message(serializable_object, kwargs)
+        self._start_reconnecting()
+
+    async def receive(self, **kwargs):
+        """|coro|
+
+        Receive a serializable object from the host. If the connection is lost, waits for the
+        client to reconnect and receives from the new connection. Any keyword arguments are passed
+        to :meth:`AsyncIPyCLink.receive`.
+
+        Returns
+        --------
+        Optional[:class:`object`]
+            The object that was sent from the host, or ``None`` if the client was closed or
+            ``return_on_error`` was set and an invalid packet was received.
+        """
+        while not self._closed:
+            if self._sender is None:
+                await self._connected.wait()
+                link = self._link
+                if self._closed or link is None:
+                    continue
+                message = await link.receive(**kwargs)
+            else:
+                async with self._reading:
+                    if self._inbox:
+                        return self._inbox.popleft()
+                    await self._connected.wait()
+                    link = self._link
+                    if self._closed or link is None:
+                        continue
+                    message = await link.receive(**kwargs)
+                if isinstance(message, Acknowledgement):
+                    self._received()
+                    self._handle_acknowledgement(message)
+                    continue
+            if message is not None:
+                self._received()
+            if message is not None or link.is_active():
+                return message
+            if link is self._link:
+                self._start_reconnecting()
+        return None
+
+
+class AsyncIPyCResilientSlave(AsyncIPyCResilientClient):
+    """Pseudo-class for AsyncIPyCResilientClient"""
+    pass
+
+
+class AsyncIPyCShardedClient:
+    """Represents a client connected to several :class:`AsyncIPyCHost` hosts at once, spreading
+    messages across them by key. Every host is placed on a :class:`~ipyc.sharding.HashRing`,
+    and :meth:`send` delivers a message to the host owning its key, so messages with the same
+    key always reach the same host while that host stays healthy.
+
+    When a host is added or removed, or fails a health check, the ring is rebalanced: only the
+    keys of the hosts gained or lost move, every other key keeps its host. A host that failed is
+    reconnected on later health checks and takes its keys back once it is reachable again.
+    A number of options can be passed to the :class:`AsyncIPyCShardedClient`.
+
+    Parameters
+    -----------
+    hosts: Iterable[Tuple[:class:`str`, :class:`int`]]
+        The ``(ip_address, port)`` pairs of the hosts to connect to.
+    loop: Optional[:class:`asyncio.AbstractEventLoop`]
+        The :class:`asyncio.AbstractEventLoop` to use for asynchronous operations.
+        Defaults to ``None``, in which case the default event loop is used via
+        :func:`asyncio.get_event_loop()`.
+    interning: Optional[:class:`bool`]
+        Whether the :class:`AsyncIPyCLink` connections intern repeated type names, dictionary keys,
+        and strings. The hosts must enable it as well. See :class:`AsyncIPyCLink` for details.
+        This defaults to ``False``.
+    engine: Optional[:class:`str`]
+        The transport engine of the connections, ``streams`` or ``protocol``. See :class:`AsyncIPyCHost`.
+        This defaults to ``streams``.
+    replicas: Optional[:class:`int`]
+        The number of points each host has on the ring. See :class:`~ipyc.sharding.HashRing`.
+        This defaults to ``128``.
+    health_check: Optional[Callable[[:class:`AsyncIPyCLink`], Coroutine]]
+        A coroutine function awaited with the link of every host during :meth:`check_health`, in
+        addition to checking that the link is still active, returning whether the host is healthy.
+        For example, it could send a ping and wait for the reply. Exceptions count as a failed check.
+        This defaults to ``None``.
+    health_check_interval: Optional[:class:`float`]
+        The number of seconds between health checks run by a background task once connected.
+        This defaults to ``None``, in which case health is only checked when :meth:`check_health`
+        is called or a send fails.
+
+    Attributes
+    -----------
+    loop: :class:`asyncio.AbstractEventLoop`
+        The event loop that the client uses for asynchronous events.
+    """
+    def __init__(self, hosts, loop=None, interning=False, engine='streams', replicas=DEFAULT_REPLICAS,
+                 health_check=None, health_check_interval=None):
+        _check_engine(engine)
+        self._hosts = [(ip_address, port) for ip_address, port in hosts]
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self.loop = asyncio.get_event_loop() if loop is None else loop
+        self._interning = interning
+        self._engine = engine
+        self._health_check = health_check
+        self._health_check_interval = health_check_interval
+        self._ring = HashRing(replicas=replicas)
+        self._clients = {}
+        # The task reading the reply to the last scatter_gather round, by link, while it runs
+        self._replies = {}
+        self._checker = None
+        self._closed = False
+
+    @property
+    def hosts(self):
+        """:class:`list`: Returns the ``(ip_address, port)`` pairs of every host, healthy or not."""
+        return list(self._hosts)
+
+    @property
+    def healthy_hosts(self):
+        """:class:`frozenset`: Returns the ``(ip_address, port)`` pairs of the hosts currently on the ring."""
+        return self._ring.nodes
+
+    @property
+    def connections(self):
+        """:class:`set`: Returns the set of all :class:`AsyncIPyCLink` connections the client has open."""
+        return {client._link for client in self._clients.values() if client._link}
+
+    async def _connect_host(self, host) -> bool:
+        client = AsyncIPyCClient(*host, loop=self.loop, interning=self._interning, engine=self._engine)
+        try:
+            await client.connect()
+        except OSError:
+            self._logger.debug(f"Could not reach the host {host[0]}:{host[1]}")
+            return False
+        # The host may have been removed or connected while this connection was being made
+        if self._closed or host not in self._hosts or host in self._clients:
+            await client.close()
+            return host in self._clients
+        self._clients[host] = client
+        self._ring.add(host)
+        self._logger.info(f"Connected to the host {host[0]}:{host[1]}")
+        return True
+
+    async def _drop_host(self, host):
+        self._ring.remove(host)
+        client = self._clients.pop(host, None)
+        if client is not None:
+            # Closing the client forgets its link, which any reply still owed is kept under, and ends its read
+            reply = self._replies.pop(client._link, None)
+            await client.close()
+            if reply is not None:
+                await asyncio.wait([reply])
+
+    async def _discard_late_replies(self, link: AsyncIPyCLink):
+        reply = self._replies.get(link)
+        if reply is not None:
+            await asyncio.wait([reply])
+            if self._replies.get(link) is reply:
+                del self._replies[link]
+
+    async def _receive_reply(self, link: AsyncIPyCLink, previous, encoding: str):
+        # Replies are read one after another, so a reply arriving after its round timed out is read by
+        # that round's task and never taken for the reply of a later one
+        if previous is not None:
+            await asyncio.wait([previous])
+        return await link.receive(encoding=encoding)
+
+    async def _mark_unhealthy(self, host, link: AsyncIPyCLink):
+        client = self._clients.get(host)
+        # The host may have been reconnected since the link failed
+        if client is not None and client._link is link:
+            self._logger.warning(f"The host {host[0]}:{host[1]} failed, rebalancing its keys")
+            await self._drop_host(host)
+
+    async def _is_healthy(self, link: AsyncIPyCLink) -> bool:
+        if not link.is_active():
+            return False
+        if self._health_check is None:
+            return True
+        try:
+            return bool(await self._health_check(link))
+        except Exception:
+            self._logger.exception(f"The health check raised an exception")
+            return False
+
+    async def _check_periodically(self):
+        while not self._closed:
+            await asyncio.sleep(self._health_check_interval)
+            await self.check_health()
+
+    async def connect(self):
+        """|coro|
+
+        Connects to every host concurrently. Hosts that cannot be reached are left off the ring
+        until a later :meth:`check_health` reaches them.
+
+        Returns
+        -------
+        :class:`frozenset`
+            The ``(ip_address, port)`` pairs of the hosts that were connected to.
+        """
+        self._logger.info("Starting to connect to the hosts...")
+        await asyncio.gather(*(self._connect_host(host) for host in self.hosts if host not in self._clients))
+        if self._health_check_interval is not None and self._checker is None:
+            self._checker = asyncio.ensure_future(self._check_periodically(), loop=self.loop)
+        return self._ring.nodes
+
+    async def add_host(self, ip_address: str, port: int) -> bool:
+        """|coro|
+
+        Adds a host and connects to it. Once connected, it takes over its share of the keys.
+
+        Returns
+        --------
+        :class:`bool`
+            ``True`` if the host was connected to, ``False`` if it will be retried on a later health check.
+        """
+        host = (ip_address, port)
+        if host not in self._hosts:
+            self._hosts.append(host)
+        return await self._connect_host(host)
+
+    async def remove_host(self, ip_address: str, port: int):
+        """|coro|
+
+        Removes a host and closes its connection. Its keys move to the remaining hosts.
+        """
+        host = (ip_address, port)
+        if host in self._hosts:
+            self._hosts.remove(host)
+        await self._drop_host(host)
+
+    async def _check_host(self, host, link):
+        if link is None:
+            await self._connect_host(host)
+        elif not await self._is_healthy(link):
+            await self._mark_unhealthy(host, link)
+
+    async def check_health(self):
+        """|coro|
+
+        Checks every host concurrently, taking the failed ones off the ring and reconnecting to
+        the ones that failed before.
+
+        Returns
+        --------
+        :class:`frozenset`
+            The ``(ip_address, port)`` pairs of the hosts that are healthy.
+        """
+        if not self._closed:
+            links = [(host, self._clients[host]._link if host in self._clients else None) for host in self._hosts]
+            await asyncio.gather(*(self._check_host(host, link) for host, link in links))
+        return self._ring.nodes
+
+    def host_for(self, key):
+        """Returns the ``(ip_address, port)`` pair of the host a key is routed to.
+
+        Raises
+        -------
+        ConnectionError
+            No host is healthy.
+        """
+        host = self._ring.get(key)
+        if host is None:
+            raise ConnectionError('None of the hosts are connected')
+        return host
+
+    def link_for(self, key) -> AsyncIPyCLink:
+        """Returns the :class:`AsyncIPyCLink` connection of the host a key is routed to.
+
+        Raises
+        -------
+        ConnectionError
+            No host is healthy.
+        """
+        return self._clients[self.host_for(key)]._link
+
+    async def send(self, key, serializable_object: object, **kwargs):
+        """|coro|
+
+        Send a serializable object to the host a key is routed to. If that host turns out to
+        have failed, it is taken off the ring and the object is sent to the key's new host.
+        Any keyword arguments are passed to :meth:`AsyncIPyCLink.send`.
+
+        Parameters
+        ------------
+        key: :class:`object`
+            The routing key. See :meth:`~ipyc.sharding.HashRing.get`.
+        serializable_object: :class:`object`
+            The object to be sent to the host.
+
+        Returns
+        --------
+        Tuple[:class:`str`, :class:`int`]
+            The ``(ip_address, port)`` pair of the host the object was sent to.
+
+        Raises
+        -------
+        ConnectionError
+            No host is healthy.
+        """
+        while True:
+            host = self.host_for(key)
+            link = self._clients[host]._link
+            if link.is_active():
+                try:
+                    await link.send(serializable_object, **kwargs)
+                    return host
+                except OSError:
+                    self._logger.debug(f"Lost the connection to the host {host[0]}:{host[1]} while sending")
+            await self._mark_unhealthy(host, link)
+
+    async def receive(self, key, **kwargs):
+        """|coro|
+
+        Receive a serializable object from the host a key is routed to. Replies the host still owes
+        to a :meth:`scatter_gather` that timed out are read and discarded first.
+        Any keyword arguments are passed to :meth:`AsyncIPyCLink.receive`.
+
+        Returns
+        --------
+        Optional[:class:`object`]
+            The object that was sent from the host. See :meth:`AsyncIPyCLink.receive`.
+        """
+        link = self.link_for(key)
+        await self._discard_late_replies(link)
+        return await link.receive(**kwargs)
+
+    async def _send_to(self, host, link: AsyncIPyCLink, serializable_object: object, kwargs: dict) -> bool:
+        if link.is_active():
+            try:
+                await link.send(serializable_object, **kwargs)
+                return True
+            except OSError:
+                self._logger.debug(f"Lost the connection to the host {host[0]}:{host[1]} while broadcasting")
+        await self._mark_unhealthy(host, link)
+        return False
+
+    async def _broadcast(self, serializable_object: object, kwargs: dict) -> list:
+        targets = [(host, self._clients[host]._link) for host in self._ring.nodes]
+        sent = await asyncio.gather(*(self._send_to(host, link, serializable_object, kwargs) for host, link in targets))
+        return [target for target, success in zip(targets, sent) if success]
+
+    async def broadcast(self, serializable_object: object, **kwargs):
+        """|coro|
+
+        Send a serializable object to every healthy host concurrently. Hosts that fail while sending
+        are taken off the ring. Any keyword arguments are passed to :meth:`AsyncIPyCLink.send`.
+
+        Returns
+        --------
+        :class:`list`
+            The ``(ip_address, port)`` pairs of the hosts the object was sent to.
+        """
+        return [host for host, _ in await self._broadcast(serializable_object, kwargs)]
+
+    async def scatter_gather(self, serializable_object: object, timeout=None, encoding='utf-8', **kwargs):
+        """|coro|
+
+        Send a serializable object to every healthy host and collect one reply from each.
+        The replies are awaited concurrently, so the whole exchange takes as long as the slowest
+        host rather than the sum of all of them. Any keyword arguments are passed to :meth:`AsyncIPyCLink.send`.
+
+        Parameters
+        ------------
+        serializable_object: :class:`object`
+            The object to be sent to the hosts.
+        timeout: Optional[:class:`float`]
+            The number of seconds to wait for the replies. Hosts that have not replied by then are
+            left out of the result, but stay on the ring. Their replies are still read, without
+            interrupting a read midway, and discarded once they arrive, so they are never taken for
+            the reply to another object. Defaults to ``None``, waiting for every host.
+        encoding: Optional[:class:`str`]
+            The encoding used to send and receive. See :meth:`AsyncIPyCLink.send`. Defaults to ``utf-8``.
+
+        Returns
+        --------
+        :class:`dict`
+            The replies, keyed by the ``(ip_address, port)`` pair of the host that sent them.
+            Hosts that closed their connection instead of replying are taken off the ring.
+        """
+        kwargs['encoding'] = encoding
+        targets = {}
+        for host, link in await self._broadcast(serializable_object, kwargs):
+            previous = self._replies.get(link)
+            task = asyncio.ensure_future(self._receive_reply(link, previous, encoding), loop=self.loop)
+            self._replies[link] = task
+            targets[task] = (host, link)
+        if not targets:
+            return {}
+        # Replies still pending are left to their task, cancelling it could stop it in the middle of a frame
+        done, _ = await asyncio.wait(targets, timeout=timeout)
+        replies = {}
+        for task in done:
+            host, link = targets[task]
+            if self._replies.get(link) is task:
+                del self._replies[link]
+            reply = task.result()
+            if reply is None and not link.is_active():
+                await self._mark_unhealthy(host, link)
+                continue
+            replies[host] = reply
+        return replies
+
+    async def close(self):
+        """|coro|
+
+        Stops checking health and closes the connections to every host.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._checker is not None:
+            self._checker.cancel()
+        await asyncio.gather(*(self._drop_host(host) for host in list(self._clients)))
+
+
+class AsyncIPyCShardedSlave(AsyncIPyCShardedClient):
+    """Pseudo-class for AsyncIPyCShardedClient"""
+    pass
@@ -0,0 +1,772 @@
+import asyncio
+import logging
+import sys
+import time
+
+from .capture import CaptureWriter, SENT, RECEIVED, OMITTED
+from .framing import payload_size
+from .packets import BufferPacket, SequencedMessage
+from .interning import DEFAULT_TABLE_SIZE
+from .limits import RateLimiter
+from .links import FILE_CLASS_NAME, FILE_CHUNK_SIZE, _open_file, _file_header, _file_count, _write_all
+from .protocol import IPyCProtocol
+from . import reliability
+from . import serialization
+
+
+class _SpillingWriter:
+    # Stands in for the writer of a link with spilling enabled. Writes go to the spill queue and
+    # return at once, and a task hands the queued frames to the real writer as the peer reads them.
+    def __init__(self, writer, spill, logger: logging.Logger):
+        self._writer = writer
+        self._spill = spill
+        self._logger = logger
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._eof = False
+        self._error = None
+        self._task = asyncio.ensure_future(self._drain_loop())
+
+    @property
+    def transport(self):
+        return self._writer.transport
+
+    async def _drain_loop(self):
+        try:
+            while True:
+                frames = self._spill.take()
+                if not frames:
+                    self._idle.set()
+                    if self._eof:
+                        self._writer.write_eof()
+                        return
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+                for frame in frames:
+                    self._writer.write(frame)
+                await self._writer.drain()
+                self._spill.ack(len(frames))
+        except ConnectionError as error:
+            self._logger.debug(f"The spiller failed to write to the connection")
+            self._error = error
+            # The peer is gone, so nothing queued can be delivered anymore
+            self._spill.close()
+            self._idle.set()
+
+    def write(self, data):
+        if self._error is None:
+            self._spill.put(data)
+            self._idle.clear()
+            self._wakeup.set()
+
+    def writelines(self, data):
+        for chunk in data:
+            self.write(chunk)
+
+    def can_write_eof(self):
+        return self._writer.can_write_eof()
+
+    def write_eof(self):
+        # The EOF is written once everything queued before it has been
+        self._eof = True
+        self._wakeup.set()
+
+    async def drain(self):
+        if self._eof:
+            await asyncio.shield(self._task)
+        if self._error is not None:
+            raise self._error
+
+    async def flush(self):
+        await self._idle.wait()
+        if self._error is not None:
+            raise self._error
+        await self._writer.drain()
+
+    def close(self):
+        if not self._task.done():
+            self._task.cancel()
+        self._writer.close()
+        self._spill.close()
+
+    async def wait_closed(self):
+        await self._writer.wait_closed()
+
+
+class AsyncIPyCLink:
+    """Represents an abstracted async socket connection that handles
+    communication between a :class:`AsyncIPyCHost` and a :class:`AsyncIPyCClient`
+    This class is internally managed and typically should not be instantiated on
+    its own.
+
+    Parameters
+    -----------
+    reader: :class:`asyncio.StreamReader`
+        The managed inbound data reader.
+    writer: :class:`asyncio.StreamWriter`
+        The managed outbound data writer
+    client: Union[:class:`AsyncIPyCHost`, :class:`AsyncIPyCClient`]
+        The communication object that is responsible for managing this connection.
+    interning: Optional[:class:`bool`]
+        Whether to intern type names, dictionary key sets, and short strings on this link. Each side
+        keeps a bounded table of what it has already sent, and later occurrences are sent as a short
+        index instead. Both ends of the link must enable it. The tables start empty on every new link.
+        Defaults to ``False``.
+    intern_table_size: Optional[:class:`int`]
+        The number of entries each interning table holds before it is cleared. Both ends of the link
+        must use the same size.
+        Defaults to ``4096``.
+    """
+    # Links hold no __dict__ and share their class logger, as hosts may keep tens of thousands of them
+    __slots__ = ('_reader', '_writer', '_active', '_client', '_protocol', '_spill', '_capture', '_received_frame',
+                 '_acknowledging', '_accepting', '_limiter', '_received_bytes', '_read_budget', '_turn_messages',
+                 '_turn_bytes', '_turn_over', '_watch', '_waited', '_loop_time')
+
+    _logger = logging.getLogger('AsyncIPyCLink')
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, client, interning=False,
+                 intern_table_size=DEFAULT_TABLE_SIZE):
+        self._reader = reader
+        self._writer = writer
+        self._logger.debug(f"Established link")
+        self._active = True
+        self._client = client
+        self._protocol = IPyCProtocol(interning=interning, intern_table_size=intern_table_size)
+        self._spill = None
+        self._capture = None
+        self._received_frame = None
+        self._acknowledging = None
+        self._accepting = True
+        self._limiter = None
+        self._received_bytes = 0
+        self._read_budget = None
+        self._turn_messages = 0
+        self._turn_bytes = 0
+        self._turn_over = False
+        self._watch = None
+        self._waited = False
+        self._loop_time = 0.0
+
+    async def close(self):
+        """|coro|
+
+        Closes all communication channels with a peer and attempts to send them EOF.
+        Informs the parent :class:`AsyncIPyCHost` or :class:`AsyncIPyCClient` of the
+        closed connection. Closing a link that is already closed, or being closed, does nothing.
+        """
+        if self._reader is None:
+            return
+        self._logger.debug(f"Beginning to close link")
+        self._reader = None
+        if self._writer.can_write_eof():
+            self._writer.write_eof()
+            try:
+                await self._writer.drain()
+            except ConnectionError:
+                pass
+        self._writer.close()
+        if sys.version_info >= (3, 7):
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                # The peer reset the connection, which is closed all the same
+                pass
+        self._writer = None
+        self._active = False
+        self.stop_capture()
+        self._client.connections.remove(self)
+        self._logger.debug(f"Closed link")
+
+    def abort(self):
+        """Closes the connection at once, discarding anything that has not been written to it yet.
+        A :meth:`close` in progress, waiting for a slow peer, then completes right away; otherwise
+        the link still has to be closed with :meth:`close`. Aborting a closed link does nothing.
+        """
+        if self._writer is None:
+            return
+        self._logger.debug(f"Aborting link")
+        self._active = False
+        self._writer.transport.abort()
+
+    def enable_spilling(self, max_memory=None, directory=None, segment_size=None):
+        """Queue outbound frames instead of writing them to the connection directly, so that
+        :meth:`send` never waits for a slow peer, even with ``drain_immediately`` set. Frames are
+        held in memory up to ``max_memory`` bytes and spilled to memory-mapped segment files past
+        that. A background task writes them to the connection in order as the peer reads, and
+        deletes each segment file once all of its frames are written. Frames still queued when the
+        link is closed are written before it closes.
+
+        This must be called from a coroutine running on the link's event loop. Enabling it again
+        does nothing.
+
+        Parameters
+        ------------
+        max_memory: Optional[:class:`int`]
+            The number of bytes of frames held in memory. Defaults to 64 MiB.
+        directory: Optional[:class:`str`]
+            The directory of the segment files. Defaults to a temporary directory.
+        segment_size: Optional[:class:`int`]
+            The size of each segment file. Defaults to 64 MiB.
+
+        Returns
+        --------
+        :class:`SpillQueue`
+            The queue of the link, whose properties show how much is queued and where.
+        """
+        if self._spill is not None:
+            return self._spill
+        from .spill import SpillQueue, DEFAULT_MAX_MEMORY, DEFAULT_SEGMENT_SIZE
+
+        self._spill = SpillQueue(max_memory=DEFAULT_MAX_MEMORY if max_memory is None else max_memory,
+                                 directory=directory,
+                                 segment_size=DEFAULT_SEGMENT_SIZE if segment_size is None else segment_size)
+        self._writer = _SpillingWriter(self._writer, self._spill, self._logger)
+        return self._spill
+
+    async def flush(self):
+        """|coro|
+
+        Wait until every frame sent so far has been handed to the connection and its write buffer
+        has drained. With spilling enabled, this includes every frame still queued.
+        """
+        if self._spill is not None:
+            await self._writer.flush()
+        else:
+            await self._writer.drain()
+
+    def is_active(self):
+        """:class:`bool`: Indicates if the communication channels are closed, at EOF, or no longer viable."""
+        # Quickly check if the state of the reader changed from the remote
+        if not self._reader or self._reader.at_eof() or not self._writer:
+            self._active = False
+        return self._active
+
+    @staticmethod
+    def _should_offload(class_name, size=0):
+        if class_name in serialization.IPYC_OFFLOADED_SERIALIZATIONS:
+            return True
+        return serialization.IPYC_OFFLOAD_THRESHOLD is not None and size >= serialization.IPYC_OFFLOAD_THRESHOLD
+
+    @staticmethod
+    async def _offload(function, *args):
+        return await asyncio.get_event_loop().run_in_executor(serialization.IPYC_OFFLOAD_EXECUTOR, function, *args)
+
+    async def _parse(self, data: bytes, encoding: str):
+        # Without interning, parsing touches no state of the link and can run in another thread
+        if not self._protocol.interning and self._should_offload(None, len(data)):
+            return await self._offload(self._protocol.parse, data, encoding)
+        return self._protocol.parse(data, encoding=encoding)
+
+    async def send(self, serializable_object: object, drain_immediately=True, encoding='utf-8'):
+        """|coro|
+
+        Send a serializable object to the receiving end. If the object is not a custom
+        serializable object, python's builtins will be used. If the object is a custom
+        serializable, the receiving end must also have this object in their list of custom
+        deserializers.
+
+        .. warning::
+            After the result of serialization, either via custom or builtin, the bytes ``0x01`` and ``0x02``
+            must not appear anywhere. If your payload does contain these bytes or chars, you must
+            substitute them prior to this function call. Objects with a registered buffer serialization,
+            such as :class:`bytes` or :class:`array.array`, are sent as raw bytes and are not subject to this rule.
+
+        Parameters
+        ------------
+        serializable_object: :class:`object`
+            The object to be sent to the receiving end.
+        drain_immediately: Optional[:class:`bool`]
+            Whether to flush the output buffer right now or not.
+            Defaults to ``True``.
+        encoding: Optional[:class:`str`]
+            The encoding schema of the serialization. If your object serialization results
+            in non UTF-8 encoding characters, a different encoding scheme must be used. The
+            receiving end must also use this same encoding to decode properly.
+            Defaults to ``utf-8``.
+
+        """
+        if not self.is_active():
+            self._logger.debug(f"Attempted to send data when the writer or link is closed! Ignoring.")
+            return
+
+        class_name = type(serializable_object).__name__
+        if self._protocol.interns(class_name):
+            # Interning tables must see frames in the exact order they are written, so nothing is awaited from here to the write
+            frame, buffer = self._protocol.encode(serializable_object, encoding=encoding)
+        else:
+            if self._should_offload(class_name):
+                class_name, serialization_string, buffer = await self._offload(self._protocol.serialize, serializable_object)
+            else:
+                class_name, serialization_string, buffer = self._protocol.serialize(serializable_object)
+            if buffer is None and not self._protocol.interning and self._should_offload(None, len(serialization_string)):
+                frame = await self._offload(self._protocol.frame, class_name, serialization_string, None, encoding)
+            else:
+                frame = self._protocol.frame(class_name, serialization_string, None if buffer is None else buffer.nbytes, encoding)
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug(f"Sending {len(frame) if buffer is None else buffer.nbytes} bytes of '{class_name}'")
+        if self._capture is not None:
+            self._capture.record(SENT, frame, buffer)
+        self._writer.write(frame)
+        if buffer is not None:
+            self._writer.write(buffer)
+        if drain_immediately:
+            self._logger.debug(f"Draining the writer")
+            await self._writer.drain()
+
+    async def _send_raw(self, frame: bytes, payload=None):
+        # Sends a frame exactly as given, bypassing serialization, to replay captured traffic
+        if self._capture is not None:
+            self._capture.record(SENT, frame, payload)
+        self._writer.write(frame)
+        if payload is not None:
+            self._writer.write(payload)
+        await self._writer.drain()
+
+    def _record_received(self, payload=None, flags=0):
+        if self._capture is not None and self._received_frame is not None:
+            self._capture.record(RECEIVED | flags, self._received_frame, payload)
+        self._received_frame = None
+
+    def start_capture(self, file) -> CaptureWriter:
+        """Start recording every frame this link sends and receives, with its timing, to a capture
+        file that :func:`~ipyc.capture.replay_async` can play back against a host. Starting a capture
+        while one is running stops the running one first.
+
+        Parameters
+        ------------
+        file: Union[:class:`str`, :class:`os.PathLike`, :term:`file object`]
+            A path, which is created or truncated, or a file object opened for writing in binary mode.
+
+        Returns
+        --------
+        :class:`CaptureWriter`
+            The writer of the capture.
+        """
+        self.stop_capture()
+        self._capture = CaptureWriter(file)
+        return self._capture
+
+    def stop_capture(self):
+        """Stop recording and close the capture file. Stopping when no capture is running does nothing."""
+        capture, self._capture = self._capture, None
+        if capture is not None:
+            capture.close()
+
+    @property
+    def received_bytes(self):
+        """:class:`int`: The number of bytes of the frames received on the link, payloads included."""
+        return self._received_bytes
+
+    @property
+    def rate_limiter(self):
+        """Optional[:class:`~ipyc.limits.RateLimiter`]: The limits set with :meth:`limit_rate`, along with how
+        often and how long the link was paused for them."""
+        return self._limiter
+
+    def limit_rate(self, messages_per_second=None, bytes_per_second=None, message_burst=None, byte_burst=None,
+                   statistics=None):
+        """Limit the rate at which :meth:`receive` reads messages. Once over either limit, it waits before
+        reading the next message, leaving the data in the socket so that the peer is slowed down in turn.
+        A message is never split: one larger than the byte burst is read, and then waited for as long as
+        it costs. Setting no limit removes them.
+
+        Parameters
+        ------------
+        messages_per_second: Optional[:class:`float`]
+            The number of messages that may be received per second. Defaults to ``None``, unlimited.
+        bytes_per_second: Optional[:class:`float`]
+            The number of bytes, frames and payloads included, that may be received per second.
+            Defaults to ``None``, unlimited.
+        message_burst: Optional[:class:`float`]
+            The number of messages that may be received at once after the link was idle.
+            Defaults to one second worth.
+        byte_burst: Optional[:class:`float`]
+            The number of bytes that may be received at once after the link was idle.
+            Defaults to one second worth.
+        statistics: Optional[:class:`~ipyc.limits.HostStatistics`]
+            Statistics the throttling of the link is counted in as well. Defaults to ``None``.
+        """
+        if messages_per_second is None and bytes_per_second is None:
+            self._limiter = None
+            return
+        self._limiter = RateLimiter(messages_per_second, bytes_per_second, message_burst, byte_burst, statistics)
+
+    @property
+    def loop_time(self):
+        """:class:`float`: The number of seconds the event loop spent reading and decoding messages of the link
+        that had already been received, with a read budget set by :meth:`set_read_budget`. Reads that let the loop
+        run other tasks, such as those waiting for data, are not counted, so this is the time the link kept the
+        loop busy, and every other link waiting."""
+        return self._loop_time
+
+    def set_read_budget(self, messages=None, size=None):
+        """Limit how much :meth:`receive` reads in a row from data already received. While data is buffered,
+        reading never waits, so a link flooded by its peer would otherwise keep the event loop to itself for as
+        long as the flood lasts. Once over its budget, :meth:`receive` lets every other task ready to run go
+        first, links with data of their own included, then starts a new turn. This also starts counting
+        :attr:`loop_time`. Setting no budget removes it.
+
+        Parameters
+        ------------
+        messages: Optional[:class:`int`]
+            The number of messages read per turn. Defaults to ``None``, unlimited.
+        size: Optional[:class:`int`]
+            The number of bytes, frames and payloads included, read per turn. A message is never split, so
+            a turn ends with the message going over it. Defaults to ``None``, unlimited.
+        """
+        self._read_budget = None if messages is None and size is None else (messages, size)
+        self._turn_messages = 0
+        self._turn_bytes = 0
+        self._turn_over = False
+
+    def _note_wait(self):
+        # Scheduled before reading, it runs at the next iteration of the event loop, so while messages are
+        # read only once one of the reads let the loop run
+        self._waited = True
+
+    def _end_read(self, started: float, size: int):
+        if self._waited:
+            # Reading waited for the peer, which let everything else run, so a new turn starts with this message
+            self._watch = None
+            self._turn_messages, self._turn_bytes = 0, 0
+        else:
+            self._loop_time += time.perf_counter() - started
+        self._turn_messages += 1
+        self._turn_bytes += size
+        messages, limit = self._read_budget
+        self._turn_over = (messages is not None and self._turn_messages >= messages) or \
+            (limit is not None and self._turn_bytes >= limit)
+
+    async def _readline(self) -> bytes:
+        # Unlike readline, lines longer than the limit of the reader are read whole rather than discarded
+        chunks = []
+        while True:
+            try:
+                chunks.append(await self._reader.readuntil(b'\n'))
+                break
+            except asyncio.IncompleteReadError as error:
+                chunks.append(error.partial)
+                break
+            except asyncio.LimitOverrunError as error:
+                chunks.append(await self._reader.readexactly(error.consumed))
+        return chunks[0] if len(chunks) == 1 else b''.join(chunks)
+
+    async def _read_payload(self, size: int):
+        if self._reader is None:
+            raise ConnectionAbortedError('The link was closed')
+        return await self._reader.readexactly(size)
+
+    async def _read_chunk(self, size: int):
+        return await self._reader.read(size)
+
+    async def _receive_packet(self, encoding: str, return_on_error: bool):
+        self._logger.debug(f"Waiting for communication from the other side")
+        try:
+            while True:
+                data = await self._readline()
+                self._received_bytes += len(data)
+                packet = await self._parse(data, encoding)
+                if packet:
+                    break
+                if self._reader is None or self._reader.at_eof():
+                    # Either the peer closed the connection, or the link was closed while this was waiting
+                    self._logger.debug(f"The downstream writer closed the connection")
+                    await self.close()
+                    return None
+                size = payload_size(data)
+                if size:
+                    # Keep the stream in sync by reading past the payload of the discarded frame
+                    await self._read_payload(size)
+                if return_on_error:
+                    self._logger.debug(f"Packet received was not a valid communication packet, return_on_error was set to true. Returning.")
+                    return None
+                self._logger.debug(f"Packet received was not a valid communication packet... waiting for another")
+        except (asyncio.IncompleteReadError, ConnectionError):
+            self._logger.debug(f"The downstream connection was aborted")
+            await self.close()
+            return None
+        if self._capture is not None:
+            self._received_frame = data
+        return packet
+
+    async def receive(self, encoding='utf-8', return_on_error=False):
+        """|coro|
+
+        Receive a serializable object from the other end. If the object is not a custom
+        serializable object, python's builtins will be used, otherwise the custom defined
+        deserializer will be used.
+
+        Parameters
+        ------------
+        encoding: Optional[:class:`str`]
+            The encoding schema of the serialization. If your object serialization results
+            in non UTF-8 encoding characters, a different encoding scheme must be used. The
+            receiving end must also use this same encoding to decode properly.
+            Defaults to ``utf-8``.
+        return_on_error: Optional[:class:`bool`]
+            Whether to continue to listen or return if a deserialization error occurred. Otherwise,
+            wait until the next valid deserialization occurs.
+            Defaults to ``False``.
+
+        Returns
+        --------
+        Optional[:class:`object`]
+            The object that was sent from the sending end. If the deserialization was not successful
+            and ``return_on_error`` was set to ``True``, or EOF was encountered resulting in a closed
+            connection, ``None`` is returned.
+        """
+        while True:
+            if self._limiter is not None:
+                await self._limiter.throttle()
+            if not self.is_active():
+                self._logger.debug(f"Attempted to read data when the writer or link is closed! Returning nothing.")
+                return None
+
+            started = None
+            if self._read_budget is not None:
+                if self._turn_over:
+                    self._turn_over = False
+                    self._turn_messages, self._turn_bytes = 0, 0
+                    await asyncio.sleep(0)
+                    self._watch = None
+                    if not self.is_active():
+                        # Closed while other tasks ran
+                        return None
+                if self._watch is None:
+                    self._waited = False
+                    self._watch = asyncio.get_event_loop().call_soon(self._note_wait)
+                started = time.perf_counter()
+            received_bytes = self._received_bytes
+            packet = await self._receive_packet(encoding=encoding, return_on_error=return_on_error)
+            if not packet:
+                return None
+            received = await self._receive_object(packet)
+            if started is not None:
+                self._end_read(started, self._received_bytes - received_bytes)
+            if self._limiter is not None:
+                self._limiter.record(self._received_bytes - received_bytes)
+            if self._reader is not None and self._reader.at_eof():
+                # The peer closed the connection after this frame, which is still delivered
+                self._logger.debug(f"The downstream writer closed the connection")
+                await self.close()
+            if type(received) is not SequencedMessage:
+                return received
+            if not self._accepting:
+                # Neither recorded nor acknowledged, so that the sender sends it again elsewhere
+                continue
+            # Copies of messages already received are acknowledged but not delivered again
+            fresh = reliability.RECEIVER.accept(received)
+            await self._acknowledge(received.session)
+            if fresh:
+                return reliability._unwrap(received, encoding)
+
+    async def _acknowledge(self, session: str):
+        # Acknowledges a reliable sender every few messages, and once the burst of messages already
+        # read is over, which is when the loop gets to run its callbacks
+        acknowledgement = reliability.RECEIVER.acknowledgement(session)
+        if acknowledgement is not None:
+            await self._send_acknowledgement(acknowledgement)
+        if self._acknowledging is None:
+            asyncio.get_event_loop().call_soon(self._acknowledge_burst)
+        self._acknowledging = session
+
+    def _acknowledge_burst(self):
+        session, self._acknowledging = self._acknowledging, None
+        acknowledgement = reliability.RECEIVER.acknowledgement(session, force=True)
+        if acknowledgement is not None:
+            asyncio.ensure_future(self._send_acknowledgement(acknowledgement))
+
+    async def _send_acknowledgement(self, acknowledgement):
+        try:
+            await self.send(acknowledgement, drain_immediately=False)
+        except OSError:
+            # The sender sends the messages again once it has reconnected
+            self._logger.debug(f"Could not acknowledge the messages received", exc_info=True)
+
+    async def _receive_object(self, packet):
+        if isinstance(packet, BufferPacket):
+            try:
+                buffer = await self._read_payload(packet.size)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                self._logger.debug(f"The downstream connection was aborted")
+                await self.close()
+                return None
+            self._received_bytes += packet.size
+            self._record_received(buffer)
+            if self._should_offload(packet.class_name):
+                return await self._offload(self._protocol.decode, packet, buffer)
+            return self._protocol.decode(packet, buffer)
+
+        self._record_received()
+        if not self._protocol.interns(packet.class_name) and \
+                self._should_offload(packet.class_name, len(packet.object_serialization)):
+            self._logger.debug(f"Offloading the deserialization of '{packet.class_name}' to an executor")
+            return await self._offload(self._protocol.decode, packet)
+        return self._protocol.decode(packet)
+
+    async def send_file(self, file, offset=0, count=None, encoding='utf-8'):
+        """|coro|
+
+        Send the contents of a file to the receiving end. After a small header frame, the file
+        is copied to the socket by the kernel via :meth:`asyncio.loop.sendfile` where available, so
+        its contents never pass through Python. Otherwise, the file is sent in chunks.
+
+        Parameters
+        ------------
+        file: Union[:class:`str`, :class:`os.PathLike`, :class:`int`, :term:`file object`]
+            A path, an open file descriptor, or a file object opened in binary mode.
+        offset: Optional[:class:`int`]
+            The position in the file to start sending from.
+            Defaults to ``0``.
+        count: Optional[:class:`int`]
+            The number of bytes to send. If ``None``, the file is sent until EOF.
+            Defaults to ``None``.
+        encoding: Optional[:class:`str`]
+            The encoding schema of the header frame.
+            Defaults to ``utf-8``.
+
+        Returns
+        --------
+        :class:`int`
+            The number of bytes of the file that were sent.
+        """
+        if not self.is_active():
+            self._logger.debug(f"Attempted to send a file when the writer or link is closed! Ignoring.")
+            return 0
+
+        file_object, owned = _open_file(file, 'rb')
+        try:
+            count = _file_count(file_object, offset, count)
+            frame = self._protocol.frame(FILE_CLASS_NAME, _file_header(file_object), count, encoding=encoding)
+            self._logger.debug(f"Sending {count} bytes of file {file_object.name!r}")
+            if self._capture is not None:
+                self._capture.record(SENT | OMITTED, frame)
+            self._writer.write(frame)
+            await self.flush()
+            if not count:
+                return 0
+            if sys.version_info >= (3, 7):
+                return await asyncio.get_event_loop().sendfile(self._writer.transport, file_object, offset, count)
+            sent = 0
+            file_object.seek(offset)
+            while sent < count:
+                chunk = file_object.read(min(count - sent, FILE_CHUNK_SIZE))
+                if not chunk:
+                    break
+                self._writer.write(chunk)
+                await self._writer.drain()
+                sent += len(chunk)
+            return sent
+        finally:
+            if owned:
+                file_object.close()
+
+    async def receive_file(self, destination, encoding='utf-8', return_on_error=False):
+        """|coro|
+
+        Receive a file, or any other raw payload, sent with :meth:`send_file` and write it straight
+        into ``destination`` in chunks, without building the contents in memory.
+
+        .. note::
+            Calling :meth:`receive` on a file transfer reads the entire file into memory and returns
+            a :class:`memoryview` over it.
+
+        Parameters
+        ------------
+        destination: Union[:class:`str`, :class:`os.PathLike`, :class:`int`, :term:`file object`]
+            A path, a file descriptor opened for writing, or a file object opened in binary mode.
+            Paths are created or truncated.
+        encoding: Optional[:class:`str`]
+            The encoding schema of the header frame.
+            Defaults to ``utf-8``.
+        return_on_error: Optional[:class:`bool`]
+            Whether to continue to listen or return if an invalid frame was received.
+            Defaults to ``False``.
+
+        Returns
+        --------
+        Optional[:class:`int`]
+            The number of bytes written. If the next frame is not a raw payload, it is discarded and
+            ``None`` is returned. ``None`` is also returned if EOF was encountered.
+        """
+        if not self.is_active():
+            self._logger.debug(f"Attempted to read a file when the writer or link is closed! Returning nothing.")
+            return None
+
+        packet = await self._receive_packet(encoding=encoding, return_on_error=return_on_error)
+        if not packet:
+            return None
+        self._record_received(flags=OMITTED)
+        if not isinstance(packet, BufferPacket):
+            self._logger.warning(f"Expected a file transfer but received '{packet.class_name}', discarding it.")
+            return None
+
+        file_object, owned = _open_file(destination, 'wb')
+        try:
+            file_object.flush()
+            remaining = packet.size
+            while remaining:
+                chunk = await self._read_chunk(min(remaining, FILE_CHUNK_SIZE))
+                if not chunk:
+                    raise asyncio.IncompleteReadError(b'', remaining)
+                _write_all(file_object.fileno(), memoryview(chunk))
+                remaining -= len(chunk)
+                self._received_bytes += len(chunk)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            self._logger.debug(f"The downstream connection was aborted")
+            await self.close()
+            return None
+        finally:
+            if owned:
+                file_object.close()
+        self._logger.debug(f"Received {packet.size} raw bytes of '{packet.class_name}' into a file")
+        return packet.size
+
+
+class AsyncIPyCProtocolLink(AsyncIPyCLink):
+    """An :class:`AsyncIPyCLink` running on the ``protocol`` engine, an :class:`IPyCBufferedProtocol`
+    that splits frames as they arrive instead of reading them through an :class:`asyncio.StreamReader`.
+    It is used by :class:`AsyncIPyCHost` and :class:`AsyncIPyCClient` when they are created with
+    ``engine='protocol'`` and behaves exactly like :class:`AsyncIPyCLink` otherwise.
+
+    .. note::
+        The raw payload of a buffer frame is received in full before the frame is handed to the link,
+        so :meth:`receive_file` holds the whole file in memory before writing it out.
+
+    Parameters
+    -----------
+    protocol: :class:`IPyCBufferedProtocol`
+        The protocol of the managed connection, used both to read and to write.
+    client: Union[:class:`AsyncIPyCHost`, :class:`AsyncIPyCClient`]
+        The communication object that is responsible for managing this connection.
+    interning: Optional[:class:`bool`]
+        See :class:`AsyncIPyCLink`.
+    intern_table_size: Optional[:class:`int`]
+        See :class:`AsyncIPyCLink`.
+    """
+    __slots__ = ('_payload',)
+
+    _logger = logging.getLogger('AsyncIPyCProtocolLink')
+
+    def __init__(self, protocol, client, interning=False, intern_table_size=DEFAULT_TABLE_SIZE):
+        super().__init__(protocol, protocol, client, interning=interning, intern_table_size=intern_table_size)
+        self._payload = None
+
+    async def _readline(self) -> bytes:
+        line, payload = await self._reader.read_frame()
+        self._payload = None if payload is None else memoryview(payload)
+        return line
+
+    async def _read_payload(self, size: int):
+        payload, self._payload = self._payload, None
+        if payload is None or payload.nbytes != size:
+            raise asyncio.IncompleteReadError(b'', size)
+        return payload
+
+    async def _read_chunk(self, size: int):
+        if self._payload is None:
+            return b''
+        chunk, self._payload = self._payload[:size], self._payload[size:]
+        return chunk
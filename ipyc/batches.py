@@ -0,0 +1,182 @@
+import array
+import json
+
+_ALIGNMENT = 8
+_INT64_RANGE = (-2 ** 63, 2 ** 63 - 1)
+# Integers a double holds exactly, any larger one would be rounded in a float column
+_DOUBLE_EXACT = 2 ** 53
+
+
+def _column_kind(values: list) -> str:
+    if all(type(value) is bool for value in values):
+        return '?'
+    if all(type(value) is int and _INT64_RANGE[0] <= value <= _INT64_RANGE[1] for value in values):
+        return 'q'
+    if any(type(value) is float for value in values) and \
+            all(type(value) is float or type(value) is int and abs(value) <= _DOUBLE_EXACT for value in values):
+        return 'd'
+    if all(type(value) is str for value in values):
+        return 'str'
+    return 'json'
+
+
+def _pad(size: int) -> int:
+    return -size % _ALIGNMENT
+
+
+class RecordBatch:
+    """A batch of records, dictionaries that share the same keys, sent column by column in a single frame.
+
+    Sending many similar dictionaries one at a time costs one serialization, one frame, and one
+    :meth:`~AsyncIPyCLink.receive` each. A batch sends them all at once instead: numeric and boolean
+    columns travel as raw :class:`array.array` style buffers, string columns as an offset table and one
+    UTF-8 blob, and any other column as an offset table and a blob of JSON texts. Integers a numeric
+    buffer cannot hold exactly, those outside int64 or, next to floats, beyond 2**53, travel as JSON.
+
+    A received batch is lazy; nothing is decoded until a row or a column is asked for, and numeric
+    columns are returned as :class:`memoryview` objects over the received buffer without a copy.
+
+    Example
+    ---------
+    .. code-block:: python3
+
+        await link.send(RecordBatch([{'id': i, 'score': i / 10, 'name': f'user{i}'} for i in range(10000)]))
+
+        batch = await link.receive()
+        scores = batch.column('score')  # only this column is decoded
+        first = batch[0]                # {'id': 0, 'score': 0.0, 'name': 'user0'}
+
+    Parameters
+    -----------
+    records: List[:class:`dict`]
+        The records of the batch. Every record must have the same keys as the first one.
+
+    Raises
+    --------
+    ValueError
+        A record does not have the same keys as the first one.
+    """
+    def __init__(self, records: list):
+        self._records = list(records)
+        self._names = list(self._records[0]) if self._records else []
+        for record in self._records:
+            if len(record) != len(self._names) or any(name not in record for name in self._names):
+                raise ValueError('Every record of a RecordBatch must have the same keys')
+        self._layout = None
+        self._buffer = None
+        self._columns = {}
+
+    @classmethod
+    def _from_buffer(cls, layout: dict, buffer: memoryview):
+        batch = cls.__new__(cls)
+        batch._records = None
+        batch._names = [column['name'] for column in layout['columns']]
+        batch._layout = {column['name']: column for column in layout['columns']}
+        batch._rows = layout['rows']
+        batch._buffer = memoryview(buffer).cast('B')
+        batch._columns = {}
+        return batch
+
+    @property
+    def columns(self):
+        """List[:class:`str`]: The names of the columns, in the order of the keys of the first record."""
+        return list(self._names)
+
+    def __len__(self):
+        return len(self._records) if self._records is not None else self._rows
+
+    def _slice(self, offset: int, size: int) -> memoryview:
+        return self._buffer[offset:offset + size]
+
+    def _value(self, name: str, index: int):
+        column = self._layout[name]
+        kind = column['kind']
+        if kind in ('str', 'json'):
+            offsets = self._slice(column['offset'], (self._rows + 1) * 8).cast('q')
+            blob = self._slice(*column['blob'])
+            text = str(blob[offsets[index]:offsets[index + 1]], 'utf-8')
+            return text if kind == 'str' else json.loads(text)
+        return self.column(name)[index]
+
+    def column(self, name: str):
+        """Return every value of a column.
+
+        Parameters
+        ------------
+        name: :class:`str`
+            The name of the column.
+
+        Returns
+        --------
+        Union[:class:`list`, :class:`memoryview`]
+            For a received batch, numeric and boolean columns are returned as a typed :class:`memoryview`
+            over the received buffer, other columns as a :class:`list`. The result is cached.
+
+        Raises
+        --------
+        KeyError
+            The batch has no such column.
+        """
+        if self._records is not None:
+            if name not in self._names:
+                raise KeyError(name)
+            return [record[name] for record in self._records]
+        if name not in self._columns:
+            column = self._layout[name]
+            if column['kind'] in ('str', 'json'):
+                self._columns[name] = [self._value(name, index) for index in range(self._rows)]
+            else:
+                self._columns[name] = self._slice(column['offset'], column['size']).cast(column['kind'])
+        return self._columns[name]
+
+    def __getitem__(self, index: int) -> dict:
+        if self._records is not None:
+            return self._records[index]
+        if index < 0:
+            index += self._rows
+        if not 0 <= index < self._rows:
+            raise IndexError('RecordBatch index out of range')
+        return {name: self._value(name, index) for name in self._names}
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __repr__(self):
+        return f'<RecordBatch rows={len(self)} columns={self._names}>'
+
+    def serialize(self):
+        """Encode the batch into a buffer serialization, see :func:`ipyc.IPyCSerialization.add_custom_buffer_serialization`.
+
+        Returns
+        --------
+        Tuple[:class:`str`, :class:`bytearray`]
+            The header describing the layout of every column, and the column buffers back to back.
+        """
+        payload = bytearray()
+        columns = []
+        for name in self._names:
+            values = self.column(name)
+            kind = _column_kind(values)
+            column = {'name': name, 'kind': kind, 'offset': len(payload)}
+            if kind in ('str', 'json'):
+                texts = [(value if kind == 'str' else json.dumps(value)).encode('utf-8') for value in values]
+                offsets = array.array('q', [0])
+                for text in texts:
+                    offsets.append(offsets[-1] + len(text))
+                payload += offsets.tobytes()
+                payload += bytes(_pad(len(payload)))
+                column['blob'] = [len(payload), offsets[-1]]
+                payload += b''.join(texts)
+            else:
+                data = array.array('b' if kind == '?' else kind, values).tobytes()
+                column['size'] = len(data)
+                payload += data
+            payload += bytes(_pad(len(payload)))
+            columns.append(column)
+        return json.dumps({'rows': len(self), 'columns': columns}), payload
+
+    @classmethod
+    def deserialize(cls, header: str, buffer: memoryview):
+        """Rebuild a lazy batch from a header and buffer produced by :meth:`serialize`."""
+        return cls._from_buffer(json.loads(header), buffer)
@@ -1,8 +1,49 @@
+import collections
 import logging
+import os
+import random
+import selectors
+import socket
+import threading
+import time
 
-from multiprocessing.connection import Listener, Client
+from .links import IPyCLink, IPyCSelectorLink, _wait_readable
+from .packets import Acknowledgement
+from .reliability import DEFAULT_WINDOW, ReliableSender
+from .sharding import DEFAULT_REPLICAS, HashRing
 
-from .links import IPyCLink
+# How often a sender waiting for acknowledgements checks whether it should read them itself
+_ACKNOWLEDGEMENT_POLL_INTERVAL = 0.05
+# How long a connection must stay up, unless it received something, for reconnecting to start over at the initial backoff
+_STABLE_CONNECTION_TIME = 1.0
+
+
+def _listen(ip_address: str, port: int, backlog: int) -> socket.socket:
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if os.name == 'posix':
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind((ip_address, port))
+    server.listen(backlog)
+    return server
+
+
+def _take_over(path: str, timeout: float, logger: logging.Logger) -> tuple:
+    # Returns the listeners and connections of the host being replaced, which are empty if there is none
+    from .handoff import take_over_sockets
+
+    taken = take_over_sockets(path, timeout)
+    if taken is None:
+        logger.info(f"No host to take over from at {path}")
+        return [], []
+    listeners, connections = taken
+    logger.info(f"Took over {len(listeners)} listeners and {len(connections)} connections from {path}")
+    return listeners, connections
+
+
+def _configure(sock: socket.socket) -> socket.socket:
+    # Frames are written whole, so there is nothing to gain from delaying small ones, the same as asyncio does
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
 
 
 class IPyCHost:
@@ -19,13 +60,42 @@ class IPyCHost:
         your system to make sure this port is not used by another service.
         To use multiple :class:`IPyCHost` hosts, ensure the ports are
         different between instantiations.
+    thread_safe: Optional[:class:`bool`]
+        Whether the :class:`IPyCLink` connections this host creates may be sent on from
+        multiple threads at once. See :class:`IPyCLink` for details. This defaults to ``False``.
+    interning: Optional[:class:`bool`]
+        Whether the :class:`IPyCLink` connections this host creates intern repeated type names,
+        dictionary keys, and strings. Clients must enable it as well. See :class:`IPyCLink` for
+        details. This defaults to ``False``.
+    handoff_path: Optional[:class:`str`]
+        The path of a Unix socket where the host being replaced waits in :meth:`hand_off`. If one is found,
+        its listener, and the connections it handed over, are taken over instead of binding to the address,
+        so that clients are never refused during a restart. Handed over connections are returned by
+        :meth:`wait_for_client` first. This defaults to ``None``, always binding.
+    handoff_timeout: Optional[:class:`float`]
+        The number of seconds to keep trying to reach the host at ``handoff_path`` before binding to the
+        address instead. This defaults to ``0``, trying once.
     """
-    def __init__(self, ip_address: str='localhost', port:  int=9999):
+    def __init__(self, ip_address: str='localhost', port:  int=9999, thread_safe=False, interning=False,
+                 handoff_path=None, handoff_timeout=0.0):
         self._ip_address = ip_address
         self._port = port
+        self._thread_safe = thread_safe
+        self._interning = interning
         self._logger = logging.getLogger(self.__class__.__name__)
-        self._logger.info(f"Binding to address {ip_address}:{port}")
-        self._server = Listener((ip_address, port))
+        self._listeners, adopted = [], []
+        if handoff_path is not None:
+            self._listeners, adopted = _take_over(handoff_path, handoff_timeout, self._logger)
+        if not self._listeners:
+            self._logger.info(f"Binding to address {ip_address}:{port}")
+            self._listeners = [_listen(ip_address, port, socket.SOMAXCONN)]
+        for listener in self._listeners:
+            # Threads waiting for clients may be woken up for the same one, only one of them gets it
+            listener.setblocking(False)
+        self._adopted = collections.deque(adopted)
+        # Wakes up the threads waiting for clients when the host closes or hands its listener off
+        self._wakeup_receiver, self._wakeup_sender = socket.socketpair()
+        self._handed_off = False
         self._closed = False
         self._connections = set()
 
@@ -43,23 +113,95 @@ class IPyCHost:
         if self._closed:
             return
         self._closed = True
+        self._wakeup_sender.send(b'\0')
         for connection in list(self.connections):
             connection.close()
-        self._server.close()
+        for listener in self._listeners:
+            listener.close()
+        while self._adopted:
+            self._adopted.popleft().close()
+
+    def hand_off(self, path: str, timeout=None) -> bool:
+        """Wait for a successor host, created with the same ``path`` as its ``handoff_path``, and hand it
+        the listener. From then on, new clients connect to the successor without ever being refused, and
+        :meth:`wait_for_client` returns ``None`` here. The connections already established are not handed
+        over, as the threads serving them may be reading from them; they keep working until they are
+        closed, after which this host should be closed as well.
+
+        Parameters
+        ------------
+        path: :class:`str`
+            The path of the Unix socket to wait on. An existing file at that path is replaced.
+        timeout: Optional[:class:`float`]
+            The number of seconds to wait for a successor. Defaults to ``None``, waiting forever.
+
+        Returns
+        --------
+        :class:`bool`
+            Whether the listener was handed over. If not, this host keeps accepting clients.
+        """
+        if self._closed or self._handed_off:
+            return False
+        from .handoff import hand_off_sockets
+
+        self._logger.info(f"Waiting for a successor at {path}")
+        if not hand_off_sockets(path, self._listeners, timeout=timeout):
+            self._logger.info(f"No successor took over the listener")
+            return False
+        self._handed_off = True
+        self._wakeup_sender.send(b'\0')
+        # Closing this copy of the listener leaves the successor's open
+        for listener in self._listeners:
+            listener.close()
+        self._logger.info(f"Handed the listener over, {len(self._connections)} connections remain")
+        return True
+
+    def _wait_for_listener(self):
+        # Returns a listener with a client to accept, or None when woken up
+        with selectors.DefaultSelector() as selector:
+            selector.register(self._wakeup_receiver, selectors.EVENT_READ)
+            try:
+                for listener in self._listeners:
+                    selector.register(listener, selectors.EVENT_READ)
+            except (OSError, ValueError):
+                # The listener was closed in the meantime
+                return None
+            for key, _ in selector.select():
+                if key.fileobj is not self._wakeup_receiver:
+                    return key.fileobj
+        return None
 
     def wait_for_client(self) -> IPyCLink:
         """Starts listening for :class:`IPyCClient` clients to connect.
 
         Returns
         -------
-        :class:`IPyCLink`
-            The connection that has been established with a :class:`IPyCClient`.
+        Optional[:class:`IPyCLink`]
+            The connection that has been established with a :class:`IPyCClient`, or ``None`` if the host
+            was closed or handed its listener off while waiting.
         """
         self._logger.info("Starting to wait for a client...")
-        if not self.is_closed():
-            connection = IPyCLink(self._server.accept(), self)
+        while not self.is_closed() and not self._handed_off:
+            try:
+                sock = self._adopted.popleft()
+            except IndexError:
+                listener = self._wait_for_listener()
+                if listener is None:
+                    continue
+                try:
+                    sock, _ = listener.accept()
+                except (BlockingIOError, InterruptedError):
+                    # Another thread accepted the client first
+                    continue
+                except OSError:
+                    if self._closed or self._handed_off:
+                        continue
+                    raise
+                sock.setblocking(True)
+            connection = IPyCLink(_configure(sock), self, thread_safe=self._thread_safe, interning=self._interning)
             self._connections.add(connection)
             return connection
+        return None
 
 
 class IPyCMaster(IPyCHost):
@@ -67,6 +209,431 @@ class IPyCMaster(IPyCHost):
     pass
 
 
+class IPyCSelectorHost:
+    """Represents a synchronous socket listener that serves many :class:`IPyCClient` clients from a
+    single thread. Instead of a blocking :meth:`IPyCHost.wait_for_client` call and a thread per
+    connection, every socket is non-blocking and watched by a :mod:`selectors` selector (epoll on Linux)
+    in :meth:`serve_forever`, which accepts clients, reassembles the frames of each connection as they
+    arrive, and calls the registered handlers.
+
+    An idle connection costs its socket and an :class:`IPyCSelectorLink`, with no thread and no receive
+    buffer of its own: data is read into a single buffer shared by all connections and only the bytes of
+    an incomplete frame are kept per connection. Clients use the regular :class:`IPyCClient`.
+
+    .. warning::
+        Handlers run on the thread calling :meth:`serve_forever`. A handler that blocks stalls every
+        connection; hand long work off to another thread and reply with :meth:`IPyCSelectorLink.send`,
+        which may be called from any thread.
+
+    Example
+    ---------
+    .. code-block:: python3
+
+        host = IPyCSelectorHost(port=9999)
+
+        @host.on_message
+        def echo(link: IPyCSelectorLink, message):
+            link.send(message)
+
+        host.serve_forever()
+
+    Parameters
+    -----------
+    ip_address: Optional[:class:`str`]
+        The IP address start listening on. This defaults to ``localhost``.
+    port: Optional[:class:`int`]
+        The port the listener binds to. This defaults to ``9999``.
+    interning: Optional[:class:`bool`]
+        Whether the :class:`IPyCSelectorLink` connections this host creates intern repeated type names,
+        dictionary keys, and strings. Clients must enable it as well. See :class:`IPyCLink` for
+        details. This defaults to ``False``.
+    backlog: Optional[:class:`int`]
+        The number of connections the listener queues before they are accepted.
+        This defaults to :data:`socket.SOMAXCONN`.
+    receive_buffer_size: Optional[:class:`int`]
+        The size of the buffer shared by all connections for each read. This defaults to ``262144``.
+    encoding: Optional[:class:`str`]
+        The encoding schema of the received serializations. This defaults to ``utf-8``.
+    handoff_path: Optional[:class:`str`]
+        The path of a Unix socket where the host being replaced waits in :meth:`hand_off`. If one is found,
+        its listener and the connections it handed over are taken over instead of binding to the address.
+        The :meth:`on_connect` handlers are called for those connections when :meth:`serve_forever` starts.
+        This defaults to ``None``, always binding.
+    handoff_timeout: Optional[:class:`float`]
+        The number of seconds to keep trying to reach the host at ``handoff_path`` before binding to the
+        address instead. This defaults to ``0``, trying once.
+    """
+    def __init__(self, ip_address: str='localhost', port:  int=9999, interning=False, backlog=socket.SOMAXCONN,
+                 receive_buffer_size=256 * 1024, encoding='utf-8', handoff_path=None, handoff_timeout=0.0):
+        self._ip_address = ip_address
+        self._port = port
+        self._interning = interning
+        self._encoding = encoding
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._listeners, adopted = [], []
+        if handoff_path is not None:
+            self._listeners, adopted = _take_over(handoff_path, handoff_timeout, self._logger)
+        if not self._listeners:
+            self._logger.info(f"Binding to address {ip_address}:{port}")
+            self._listeners = [_listen(ip_address, port, backlog)]
+        self._wakeup_receiver, self._wakeup_sender = socket.socketpair()
+        self._wakeup_receiver.setblocking(False)
+        self._wakeup_sender.setblocking(False)
+        self._selector = selectors.DefaultSelector()
+        for listener in self._listeners:
+            listener.setblocking(False)
+            # Listeners are told apart from links by the data they are registered with
+            self._selector.register(listener, selectors.EVENT_READ)
+        self._selector.register(self._wakeup_receiver, selectors.EVENT_READ)
+        self._scratch = memoryview(bytearray(receive_buffer_size))
+        self._pending_writes = set()
+        self._pending_calls = []
+        self._pending_lock = threading.Lock()
+        self._loop_thread = None
+        self._handed_off = False
+        self._closed = False
+        self._connections = set()
+        self._adopted = [self._add_link(sock) for sock in adopted]
+        self._handlers = {
+            'connect': [],
+            'message': [],
+            'disconnect': []
+        }
+
+    def is_closed(self):
+        """:class:`bool`: Indicates if the underlying socket listener is closed or no longer listening."""
+        return self._closed
+
+    @property
+    def connections(self):
+        """:class:`set`: Returns the set of all active :class:`IPyCSelectorLink` connections the host is handling."""
+        return self._connections
+
+    def _register(self, handler, event: str, argument_counts):
+        if handler.__code__.co_argcount not in argument_counts:
+            raise TypeError(f'@on_{event} handlers must allow for a Link argument' +
+                            (' and a message argument' if event == 'message' else ''))
+        if handler not in self._handlers[event]:
+            self._handlers[event].append(handler)
+        self._logger.debug(f'{handler.__name__} has successfully been registered as an on_{event} event')
+        return handler
+
+    def on_connect(self, handler):
+        """A decorator that registers a function to call with the :class:`IPyCSelectorLink` of every
+        new connection. See :class:`IPyCSelectorHost` for where handlers run.
+
+        Raises
+        --------
+        TypeError
+            The function does not take a link argument.
+        """
+        return self._register(handler, 'connect', [1, 2])
+
+    def on_message(self, handler):
+        """A decorator that registers a function to call with the :class:`IPyCSelectorLink` and the
+        object of every message received, in the order the messages arrived on that connection.
+
+        Raises
+        --------
+        TypeError
+            The function does not take a link and a message argument.
+        """
+        return self._register(handler, 'message', [2, 3])
+
+    def on_disconnect(self, handler):
+        """A decorator that registers a function to call with the :class:`IPyCSelectorLink` of every
+        connection that was closed, by either end.
+
+        Raises
+        --------
+        TypeError
+            The function does not take a link argument.
+        """
+        return self._register(handler, 'disconnect', [1, 2])
+
+    def _call(self, event: str, *args):
+        for handler in self._handlers[event]:
+            try:
+                handler(*args)
+            except Exception:
+                self._logger.exception(f'An on_{event} handler raised')
+
+    def _wake(self):
+        try:
+            self._wakeup_sender.send(b'\0')
+        except (BlockingIOError, InterruptedError):
+            # A wake-up is already pending
+            pass
+
+    def _want_write(self, link: IPyCSelectorLink):
+        if threading.current_thread() is self._loop_thread:
+            self._flush(link)
+            return
+        with self._pending_lock:
+            self._pending_writes.add(link)
+        self._wake()
+
+    def _flush(self, link: IPyCSelectorLink):
+        if not link.is_active():
+            return
+        try:
+            remaining = link._write()
+        except OSError:
+            self._logger.debug(f"Failed to write to a connection", exc_info=True)
+            self._close_link(link)
+            return
+        events = selectors.EVENT_READ | selectors.EVENT_WRITE if remaining else selectors.EVENT_READ
+        if self._selector.get_key(link).events != events:
+            self._selector.modify(link, events, link)
+
+    def _add_link(self, sock: socket.socket) -> IPyCSelectorLink:
+        sock.setblocking(False)
+        link = IPyCSelectorLink(_configure(sock), self, interning=self._interning)
+        self._connections.add(link)
+        self._selector.register(link, selectors.EVENT_READ, link)
+        return link
+
+    def _accept(self, listener: socket.socket):
+        while True:
+            try:
+                sock, _ = listener.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            self._call('connect', self._add_link(sock))
+
+    def _read(self, link: IPyCSelectorLink):
+        try:
+            size = link._socket.recv_into(self._scratch)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            size = 0
+        if not size:
+            self._logger.debug(f"The downstream connection was closed")
+            self._close_link(link)
+            return
+        for message in link._consume(self._scratch[:size], self._encoding):
+            self._call('message', link, message)
+            if not link.is_active():
+                return
+
+    def _close_link(self, link: IPyCSelectorLink):
+        if not link._active:
+            return
+        link._active = False
+        if threading.current_thread() is not self._loop_thread and self._loop_thread is not None:
+            # Unregistering belongs to the loop, let it notice the closed link
+            with self._pending_lock:
+                self._pending_writes.add(link)
+            self._wake()
+            return
+        self._release(link)
+
+    def _release(self, link: IPyCSelectorLink):
+        try:
+            self._selector.unregister(link)
+        except (KeyError, ValueError):
+            pass
+        link._socket.close()
+        link.stop_capture()
+        self._connections.discard(link)
+        link._logger.debug(f"Closed link")
+        self._call('disconnect', link)
+
+    def serve_forever(self, poll_interval=None):
+        """Accept clients and dispatch their messages to the registered handlers until :meth:`close`
+        is called, from a handler or from another thread.
+
+        Parameters
+        ------------
+        poll_interval: Optional[:class:`float`]
+            The longest time, in seconds, to wait for socket events at once. If ``None``, wait until
+            an event occurs. Defaults to ``None``.
+        """
+        if self._closed:
+            return
+        self._loop_thread = threading.current_thread()
+        self._logger.info("Serving clients...")
+        adopted, self._adopted = self._adopted, []
+        for link in adopted:
+            self._call('connect', link)
+        try:
+            # A host that handed its listener off serves the connections it kept until they are all closed
+            while not self._closed and not (self._handed_off and not self._connections):
+                for key, events in self._selector.select(poll_interval):
+                    if key.fileobj is self._wakeup_receiver:
+                        self._wakeup()
+                    elif key.data is None:
+                        self._accept(key.fileobj)
+                    else:
+                        if events & selectors.EVENT_WRITE:
+                            self._flush(key.data)
+                        if events & selectors.EVENT_READ and key.data.is_active():
+                            self._read(key.data)
+                    if self._closed:
+                        break
+        finally:
+            self._shutdown()
+
+    def _wakeup(self):
+        try:
+            while self._wakeup_receiver.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+        with self._pending_lock:
+            links, self._pending_writes = self._pending_writes, set()
+        for link in links:
+            if link.is_active():
+                self._flush(link)
+            elif link in self._connections:
+                self._release(link)
+        self._run_calls()
+
+    def _run_calls(self):
+        with self._pending_lock:
+            calls, self._pending_calls = self._pending_calls, []
+        for future, function, args in calls:
+            try:
+                future.set_result(function(*args))
+            except Exception as error:
+                future.set_exception(error)
+
+    def _in_loop(self, function, *args):
+        # Runs a function on the serving thread, which owns the selector, and returns its result
+        from concurrent.futures import Future
+
+        future = Future()
+        with self._pending_lock:
+            queued = self._loop_thread is not None and threading.current_thread() is not self._loop_thread
+            if queued:
+                self._pending_calls.append((future, function, args))
+        if not queued:
+            return function(*args)
+        self._wake()
+        return future.result()
+
+    def _detach(self, connections: bool) -> list:
+        # Stops accepting and takes the links that can be resumed by another process out of the loop
+        if self._closed:
+            return []
+        for listener in self._listeners:
+            self._selector.unregister(listener)
+        detached = []
+        for link in list(self._connections) if connections else []:
+            # Only links between two frames, with nothing left to write and no interning tables, can be
+            # resumed elsewhere. Their sends are not sent, with a warning, until the hand-off has failed.
+            with link._write_lock:
+                if not link._active or link._protocol.interning or link._protocol.pending or link._outgoing:
+                    continue
+                link._active = False
+                link._detached = True
+            self._selector.unregister(link)
+            self._connections.discard(link)
+            detached.append(link)
+        return detached
+
+    def _finish_hand_off(self, detached: list, handed_off: bool):
+        if self._closed:
+            return
+        if not handed_off:
+            for listener in self._listeners:
+                self._selector.register(listener, selectors.EVENT_READ)
+            for link in detached:
+                link._active = True
+                link._detached = False
+                self._connections.add(link)
+                self._selector.register(link, selectors.EVENT_READ, link)
+            return
+        self._handed_off = True
+        # Closing this process' copies of the sockets leaves the successor's open
+        for listener in self._listeners:
+            listener.close()
+        for link in detached:
+            link._socket.close()
+            link.stop_capture()
+
+    def hand_off(self, path: str, connections=True, timeout=None) -> bool:
+        """Wait for a successor host, created with the same ``path`` as its ``handoff_path``, and hand it
+        the listener, so that new clients connect to the successor without ever being refused. This
+        host then serves the connections it kept until they are closed, and :meth:`serve_forever`
+        returns once none are left.
+
+        With ``connections``, established connections are handed over as well, and their clients carry
+        on with the successor without reconnecting. Only connections with no frame partly received or
+        left to write, and without interning, can be handed over; the others are kept. The
+        :meth:`on_disconnect` handlers are not called for the connections handed over. Objects sent on
+        them from the moment they are taken out of the loop are not sent, and a warning is logged
+        for each, as they would otherwise reach the client out of order with those of the successor.
+
+        Call this from another thread than the one running :meth:`serve_forever`, as waiting for the
+        successor would stall every connection otherwise.
+
+        Parameters
+        ------------
+        path: :class:`str`
+            The path of the Unix socket to wait on. An existing file at that path is replaced.
+        connections: Optional[:class:`bool`]
+            Whether to hand established connections over. Defaults to ``True``.
+        timeout: Optional[:class:`float`]
+            The number of seconds to wait for a successor. Defaults to ``None``, waiting forever.
+
+        Returns
+        --------
+        :class:`bool`
+            Whether the listener was handed over. If not, this host keeps serving as before.
+        """
+        if self._closed or self._handed_off:
+            return False
+        from .handoff import hand_off_sockets
+
+        detached = None
+
+        def detach():
+            nonlocal detached
+            detached = self._in_loop(self._detach, connections)
+            return [link._socket for link in detached]
+
+        self._logger.info(f"Waiting for a successor at {path}")
+        handed_off = hand_off_sockets(path, self._listeners, detach, timeout)
+        if detached is not None:
+            # The serving loop returns by itself if this leaves it without connections
+            self._in_loop(self._finish_hand_off, detached, handed_off)
+        if handed_off:
+            self._logger.info(f"Handed the listener and {len(detached)} connections over, "
+                              f"{len(self._connections)} connections remain")
+        else:
+            self._logger.info(f"No successor took over the listener")
+        return handed_off
+
+    def _shutdown(self):
+        for link in list(self._connections):
+            link._active = False
+            self._release(link)
+        self._closed = True
+        with self._pending_lock:
+            self._loop_thread = None
+        # Hand-offs waiting on the loop must not wait forever
+        self._run_calls()
+        self._selector.close()
+        for listener in self._listeners:
+            listener.close()
+        self._wakeup_receiver.close()
+        self._wakeup_sender.close()
+
+    def close(self):
+        """Closes all :class:`IPyCSelectorLink` connections and stops :meth:`serve_forever`. Called from another
+        thread, the connections are closed by the serving thread as it returns.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._loop_thread is None:
+            self._shutdown()
+        elif threading.current_thread() is not self._loop_thread:
+            self._wake()
+
+
 class IPyCClient:
     """Represents an abstracted synchronous socket client that connects to
     and communicates with :class:`IPyCHost` hosts.
@@ -78,10 +645,18 @@ class IPyCClient:
         The IP address to connect to. This defaults to ``localhost``.
     port: Optional[:class:`int`]
         The port to target at the host IP address. This defaults to ``9999``.
+    thread_safe: Optional[:class:`bool`]
+        Whether the :class:`IPyCLink` connection may be sent on from multiple threads at once.
+        See :class:`IPyCLink` for details. This defaults to ``False``.
+    interning: Optional[:class:`bool`]
+        Whether the :class:`IPyCLink` connection interns repeated type names, dictionary keys, and
+        strings. The host must enable it as well. See :class:`IPyCLink` for details. This defaults to ``False``.
     """
-    def __init__(self, ip_address: str='localhost', port:  int=9999):
+    def __init__(self, ip_address: str='localhost', port:  int=9999, thread_safe=False, interning=False):
         self._ip_address = ip_address
         self._port = port
+        self._thread_safe = thread_safe
+        self._interning = interning
         self._logger = logging.getLogger(self.__class__.__name__)
         self._link = None
         self._closed = False
@@ -106,8 +681,13 @@ class IPyCClient:
             The connection that has been established with a :class:`IPyCHost`.
         """
         self._logger.info("Starting to connect to the host...")
-        connection = Client((self._ip_address, self._port))
-        self._link = IPyCLink(connection, self)
+        connection = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            connection.connect((self._ip_address, self._port))
+        except OSError:
+            connection.close()
+            raise
+        self._link = IPyCLink(_configure(connection), self, thread_safe=self._thread_safe, interning=self._interning)
         return self._link
 
     @property
@@ -121,3 +701,664 @@ class IPyCClient:
 class IPyCSlave(IPyCClient):
     """Pseudo-class for IPyCClient"""
     pass
+
+
+class IPyCResilientClient(IPyCClient):
+    """Represents a :class:`IPyCClient` that survives host restarts. When the connection
+    to the host is lost, the client reconnects in the background with jittered exponential
+    backoff. Messages sent in the meantime are buffered and replayed in order once the
+    connection is back.
+    A number of options can be passed to the :class:`IPyCResilientClient`.
+
+    .. note::
+        A message written to the socket just before the host went away can still be lost;
+        only messages sent once the loss is noticed are buffered. The ``reliable`` mode
+        delivers every message at least once instead.
+
+    Parameters
+    -----------
+    ip_address: Optional[:class:`str`]
+        The IP address to connect to. This defaults to ``localhost``.
+    port: Optional[:class:`int`]
+        The port to target at the host IP address. This defaults to ``9999``.
+    thread_safe: Optional[:class:`bool`]
+        Whether the :class:`IPyCLink` connection may be sent on from multiple threads at once.
+        See :class:`IPyCLink` for details. This defaults to ``False``.
+    interning: Optional[:class:`bool`]
+        Whether the :class:`IPyCLink` connection interns repeated type names, dictionary keys, and
+        strings. The tables start over on every reconnection. This defaults to ``False``.
+    max_buffered_messages: Optional[:class:`int`]
+        The number of messages kept while disconnected. Once full, the oldest buffered message is
+        dropped for every new one. Not used in ``reliable`` mode. This defaults to ``1024``.
+    initial_backoff: Optional[:class:`float`]
+        The upper bound, in seconds, of the delay before every reconnection attempt. Every attempt
+        doubles it, including those that connected but lost the connection again right away, such as
+        when the host rejects the connection. It only starts over once a connection stayed up for a
+        second or received a message. The actual delay is drawn uniformly between zero and the bound so
+        that clients of the same host do not reconnect in lockstep. This defaults to ``0.1``.
+    max_backoff: Optional[:class:`float`]
+        The largest upper bound, in seconds, the delay between attempts can grow to. This defaults to ``30``.
+    reliable: Optional[:class:`bool`]
+        Whether to deliver every message at least once, as described in :mod:`ipyc.reliability`. Each
+        message carries a sequence number, and the host acknowledges them in batches. The messages it has
+        not acknowledged are kept and sent again once reconnected, and it suppresses the copies it had
+        already received. :meth:`send` blocks while ``window`` messages are unacknowledged, reading the
+        acknowledgements itself unless another thread is in :meth:`receive`. Any host can receive from a
+        reliable client. This defaults to ``False``.
+    window: Optional[:class:`int`]
+        The number of unacknowledged messages kept in ``reliable`` mode. This defaults to ``1024``.
+    """
+    def __init__(self, ip_address: str='localhost', port:  int=9999, thread_safe=False, interning=False,
+                 max_buffered_messages=1024, initial_backoff=0.1, max_backoff=30.0, reliable=False,
+                 window=DEFAULT_WINDOW):
+        super().__init__(ip_address, port, thread_safe=thread_safe, interning=interning)
+        self._buffer = collections.deque()
+        self._max_buffered_messages = max_buffered_messages
+        self._initial_backoff = initial_backoff
+        self._max_backoff = max_backoff
+        self._attempt = 0
+        self._connected_since = None
+        self._state_lock = threading.RLock()
+        self._connected = threading.Event()
+        self._reconnector = None
+        self._dropped = 0
+        self._links = set()
+        self._sender = ReliableSender(window) if reliable else None
+        # Messages read while waiting for acknowledgements, which receive returns first
+        self._inbox = collections.deque()
+        self._reading = threading.Lock()
+        self._acknowledged = threading.Condition()
+
+    @property
+    def buffered(self):
+        """:class:`int`: The number of messages waiting for the connection to come back."""
+        return len(self._buffer)
+
+    @property
+    def dropped(self):
+        """:class:`int`: The number of buffered messages dropped because the buffer was full."""
+        return self._dropped
+
+    @property
+    def unacknowledged(self):
+        """:class:`int`: In ``reliable`` mode, the number of messages sent that the host has not acknowledged yet."""
+        return 0 if self._sender is None else self._sender.in_flight
+
+    @property
+    def acknowledged(self):
+        """:class:`int`: In ``reliable`` mode, the sequence number of the last message the host acknowledged,
+        along with every message before it. :meth:`send` returns the sequence number of each message."""
+        return 0 if self._sender is None else self._sender.acknowledged
+
+    def is_connected(self):
+        """:class:`bool`: Indicates if the client currently has a usable connection to the host."""
+        return self._connected.is_set()
+
+    @property
+    def connections(self):
+        """:class:`set`: Returns the set of all :class:`IPyCLink` connections the client has open.
+        Besides the current connection, this may briefly include one that was lost and is being closed.
+        """
+        return self._links
+
+    def _backoff(self) -> float:
+        delay = random.uniform(0, min(self._max_backoff, self._initial_backoff * 2 ** self._attempt))
+        self._attempt += 1
+        return delay
+
+    def _received(self):
+        # A connection that carried traffic was a working one, the next reconnection starts over
+        self._attempt = 0
+
+    def _reconnect(self, wait=True):
+        # A connection lost right after it was made does not count as working, so backoff keeps growing
+        if self._connected_since is not None and time.monotonic() - self._connected_since >= _STABLE_CONNECTION_TIME:
+            self._attempt = 0
+        self._connected_since = None
+        while not self._closed:
+            if wait:
+                delay = self._backoff()
+                self._logger.debug(f"Reconnecting to the host in {delay:.2f}s")
+                time.sleep(delay)
+            wait = True
+            previous = self._link
+            try:
+                link = IPyCClient.connect(self)
+            except OSError:
+                self._logger.debug(f"Could not reach the host")
+                continue
+            self._links.add(link)
+            if previous is not None:
+                previous.close()
+            with self._state_lock:
+                try:
+                    if self._sender is not None:
+                        # The host suppresses the copies of the messages it had already received
+                        for message in self._sender.unacknowledged:
+                            link.send(message)
+                    while self._buffer:
+                        serializable_object, kwargs = self._buffer[0]
+                        link.send(serializable_object, **kwargs)
+                        self._buffer.popleft()
+                except OSError:
+                    self._logger.debug(f"Lost the connection while replaying buffered messages")
+                    link.abort()
+                    continue
+                if link.is_active():
+                    self._logger.info(f"Connected to the host")
+                    self._connected_since = time.monotonic()
+                    self._connected.set()
+                    return
+
+    def _start_reconnecting(self):
+        self._connected.clear()
+        if self._closed or (self._reconnector and self._reconnector.is_alive()):
+            return
+        if self._link:
+            # Wake up anything blocked on the lost connection, it is closed once the new one is up
+            self._link.abort()
+        self._reconnector = threading.Thread(target=self._reconnect, name='IPyCReconnector', daemon=True)
+        self._reconnector.start()
+
+    def connect(self) -> IPyCLink:
+        """Connects to the host, retrying with backoff until it accepts the connection.
+
+        Returns
+        -------
+        :class:`IPyCLink`
+            The connection that has been established with a :class:`IPyCHost`. The link is replaced
+            on every reconnection, so prefer the client's own :meth:`send` and :meth:`receive`.
+        """
+        self._logger.info("Starting to connect to the host...")
+        self._reconnect(wait=False)
+        return self._link
+
+    def close(self):
+        """Stops reconnecting, closes the :class:`IPyCLink` connection, and drops any buffered messages."""
+        if self._closed:
+            return
+        self._closed = True
+        self._connected.set()
+        for link in list(self._links):
+            link.close()
+        self._link = None
+        self._buffer.clear()
+        with self._acknowledged:
+            self._acknowledged.notify_all()
+
+    def _buffer_message(self, serializable_object: object, kwargs: dict):
+        if len(self._buffer) >= self._max_buffered_messages:
+            self._buffer.popleft()
+            self._dropped += 1
+            self._logger.warning(f"The reconnection buffer is full, dropped the oldest message")
+        self._buffer.append((serializable_object, kwargs))
+
+    def _handle_acknowledgement(self, acknowledgement: Acknowledgement):
+        with self._state_lock:
+            self._sender.acknowledge(acknowledgement)
+        with self._acknowledged:
+            self._acknowledged.notify_all()
+
+    def _wait_for_acknowledgements(self):
+        # Acknowledgements arrive among the messages of the host, which are kept for receive
+        if not self._reading.acquire(blocking=False):
+            # Another thread is receiving, and handles the acknowledgements it reads
+            with self._acknowledged:
+                self._acknowledged.wait(_ACKNOWLEDGEMENT_POLL_INTERVAL)
+            return
+        try:
+            self._connected.wait()
+            link = self._link
+            if self._closed or link is None:
+                return
+            message = link.receive()
+            if message is not None:
+                self._received()
+            if isinstance(message, Acknowledgement):
+                self._handle_acknowledgement(message)
+            elif message is not None or link.is_active():
+                self._inbox.append(message)
+            else:
+                with self._state_lock:
+                    if link is self._link:
+                        self._start_reconnecting()
+        finally:
+            self._reading.release()
+
+    def _send_reliably(self, serializable_object: object, kwargs: dict) -> int:
+        while not self._closed:
+            with self._state_lock:
+                if not self._sender.full:
+                    message = self._sender.wrap(serializable_object, kwargs.get('encoding', 'utf-8'))
+                    if self._connected.is_set() and self._link and self._link.is_active():
+                        try:
+                            self._link.send(message, **kwargs)
+                            return message.sequence
+                        except OSError:
+                            self._logger.debug(f"Lost the connection to the host while sending")
+                    # The message stays in the window and is sent once reconnected
+                    self._start_reconnecting()
+                    return message.sequence
+            self._wait_for_acknowledgements()
+        return None
+
+    def send(self, serializable_object: object, **kwargs):
+        """Send a serializable object to the host, or buffer it if the client is disconnected.
+        Any keyword arguments are passed to :meth:`IPyCLink.send`.
+
+        Parameters
+        ------------
+        serializable_object: :class:`object`
+            The object to be sent to the host.
+
+        Returns
+        --------
+        Optional[:class:`int`]
+            In ``reliable`` mode, the sequence number of the message, which is acknowledged once
+            :attr:`acknowledged` reaches it.
+        """
+        if self._closed:
+            self._logger.debug(f"Attempted to send data when the client is closed! Ignoring.")
+            return
+        if self._sender is not None:
+            return self._send_reliably(serializable_object, kwargs)
+        with self._state_lock:
+            if self._connected.is_set() and not self._buffer:
+                if self._link and self._link.is_active():
+                    try:
+                        self._link.send(serializable_object, **kwargs)
+                        return
+                    except OSError:
+                        self._logger.debug(f"Lost the connection to the host while sending")
+            self._buffer_message(serializable_object, kwargs)
+            self._start_reconnecting()
+
+    def receive(self, **kwargs):
+        """Receive a serializable object from the host. If the connection is lost, waits for the
+        client to reconnect and receives from the new connection. Any keyword arguments are passed
+        to :meth:`IPyCLink.receive`.
+
+        Returns
+        --------
+        Optional[:class:`object`]
+            The object that was sent from the host, or ``None`` if the client was closed or
+            ``return_on_error`` was set and an invalid packet was received.
+        """
+        while not self._closed:
+            if self._sender is None:
+                self._connected.wait()
+                link = self._link
+                if self._closed or link is None:
+                    continue
+                message = link.receive(**kwargs)
+            else:
+                with self._reading:
+                    if self._inbox:
+                        return self._inbox.popleft()
+                    self._connected.wait()
+                    link = self._link
+                    if self._closed or link is None:
+                        continue
+                    message = link.receive(**kwargs)
+                if isinstance(message, Acknowledgement):
+                    self._received()
+                    self._handle_acknowledgement(message)
+                    continue
+            if message is not None:
+                self._received()
+            if message is not None or link.is_active():
+                return message
+            with self._state_lock:
+                if link is self._link:
+                    self._start_reconnecting()
+        return None
+
+
+class IPyCResilientSlave(IPyCResilientClient):
+    """Pseudo-class for IPyCResilientClient"""
+    pass
+
+
+class IPyCShardedClient:
+    """Represents a client connected to several :class:`IPyCHost` hosts at once, spreading
+    messages across them by key. Every host is placed on a :class:`~ipyc.sharding.HashRing`,
+    and :meth:`send` delivers a message to the host owning its key, so messages with the same
+    key always reach the same host while that host stays healthy.
+
+    When a host is added or removed, or fails a health check, the ring is rebalanced: only the
+    keys of the hosts gained or lost move, every other key keeps its host. A host that failed is
+    reconnected on later health checks and takes its keys back once it is reachable again.
+    A number of options can be passed to the :class:`IPyCShardedClient`.
+
+    Parameters
+    -----------
+    hosts: Iterable[Tuple[:class:`str`, :class:`int`]]
+        The ``(ip_address, port)`` pairs of the hosts to connect to.
+    thread_safe: Optional[:class:`bool`]
+        Whether the :class:`IPyCLink` connections may be sent on from multiple threads at once.
+        See :class:`IPyCLink` for details. This defaults to ``False``.
+    interning: Optional[:class:`bool`]
+        Whether the :class:`IPyCLink` connections intern repeated type names, dictionary keys, and
+        strings. The hosts must enable it as well. See :class:`IPyCLink` for details. This defaults to ``False``.
+    replicas: Optional[:class:`int`]
+        The number of points each host has on the ring. See :class:`~ipyc.sharding.HashRing`.
+        This defaults to ``128``.
+    health_check: Optional[Callable[[:class:`IPyCLink`], :class:`bool`]]
+        Called with the link of every host during :meth:`check_health`, in addition to checking that
+        the link is still active, and returns whether the host is healthy. For example, it could send a
+        ping and poll for the reply. Exceptions count as a failed check. This defaults to ``None``.
+    health_check_interval: Optional[:class:`float`]
+        The number of seconds between health checks run by a background thread once connected.
+        This defaults to ``None``, in which case health is only checked when :meth:`check_health`
+        is called or a send fails.
+    """
+    def __init__(self, hosts, thread_safe=False, interning=False, replicas=DEFAULT_REPLICAS,
+                 health_check=None, health_check_interval=None):
+        self._hosts = [(ip_address, port) for ip_address, port in hosts]
+        self._thread_safe = thread_safe
+        self._interning = interning
+        self._health_check = health_check
+        self._health_check_interval = health_check_interval
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._ring = HashRing(replicas=replicas)
+        self._clients = {}
+        # Replies to scatter_gather rounds that timed out, still to be read and discarded, by link
+        self._owed = {}
+        self._state_lock = threading.RLock()
+        self._stopped = threading.Event()
+        self._checker = None
+        self._closed = False
+
+    @property
+    def hosts(self):
+        """:class:`list`: Returns the ``(ip_address, port)`` pairs of every host, healthy or not."""
+        return list(self._hosts)
+
+    @property
+    def healthy_hosts(self):
+        """:class:`frozenset`: Returns the ``(ip_address, port)`` pairs of the hosts currently on the ring."""
+        return self._ring.nodes
+
+    @property
+    def connections(self):
+        """:class:`set`: Returns the set of all :class:`IPyCLink` connections the client has open."""
+        return {client._link for client in self._clients.values() if client._link}
+
+    def _connect_host(self, host) -> bool:
+        client = IPyCClient(*host, thread_safe=self._thread_safe, interning=self._interning)
+        try:
+            client.connect()
+        except OSError:
+            self._logger.debug(f"Could not reach the host {host[0]}:{host[1]}")
+            return False
+        with self._state_lock:
+            # Connecting happens outside the lock, the host may have been removed or connected meanwhile
+            if self._closed or host not in self._hosts or host in self._clients:
+                client.close()
+                return host in self._clients
+            self._clients[host] = client
+            self._ring.add(host)
+        self._logger.info(f"Connected to the host {host[0]}:{host[1]}")
+        return True
+
+    def _drop_host(self, host):
+        self._ring.remove(host)
+        client = self._clients.pop(host, None)
+        if client is not None:
+            self._owed.pop(client._link, None)
+            client.close()
+
+    def _discard_late_replies(self, link: IPyCLink, **kwargs):
+        while self._owed.get(link) and link.is_active():
+            link.receive(**kwargs)
+            self._owed[link] -= 1
+        self._owed.pop(link, None)
+
+    def _mark_unhealthy(self, host, link: IPyCLink):
+        with self._state_lock:
+            client = self._clients.get(host)
+            # The host may have been reconnected since the link failed
+            if client is not None and client._link is link:
+                self._logger.warning(f"The host {host[0]}:{host[1]} failed, rebalancing its keys")
+                self._drop_host(host)
+
+    def _is_healthy(self, link: IPyCLink) -> bool:
+        if not link.is_active():
+            return False
+        if self._health_check is None:
+            return True
+        try:
+            return bool(self._health_check(link))
+        except Exception:
+            self._logger.exception(f"The health check raised an exception")
+            return False
+
+    def _check_periodically(self):
+        while not self._stopped.wait(self._health_check_interval):
+            self.check_health()
+
+    def connect(self):
+        """Connects to every host. Hosts that cannot be reached are left off the ring until a
+        later :meth:`check_health` reaches them.
+
+        Returns
+        -------
+        :class:`frozenset`
+            The ``(ip_address, port)`` pairs of the hosts that were connected to.
+        """
+        self._logger.info("Starting to connect to the hosts...")
+        for host in self.hosts:
+            if host not in self._clients:
+                self._connect_host(host)
+        if self._health_check_interval is not None and self._checker is None:
+            self._checker = threading.Thread(target=self._check_periodically, name='IPyCHealthChecker', daemon=True)
+            self._checker.start()
+        return self._ring.nodes
+
+    def add_host(self, ip_address: str, port: int) -> bool:
+        """Adds a host and connects to it. Once connected, it takes over its share of the keys.
+
+        Returns
+        --------
+        :class:`bool`
+            ``True`` if the host was connected to, ``False`` if it will be retried on a later health check.
+        """
+        host = (ip_address, port)
+        with self._state_lock:
+            if host not in self._hosts:
+                self._hosts.append(host)
+        return self._connect_host(host)
+
+    def remove_host(self, ip_address: str, port: int):
+        """Removes a host and closes its connection. Its keys move to the remaining hosts."""
+        host = (ip_address, port)
+        with self._state_lock:
+            if host in self._hosts:
+                self._hosts.remove(host)
+            self._drop_host(host)
+
+    def check_health(self):
+        """Checks every host, taking the failed ones off the ring and reconnecting to the ones
+        that failed before.
+
+        Returns
+        --------
+        :class:`frozenset`
+            The ``(ip_address, port)`` pairs of the hosts that are healthy.
+        """
+        with self._state_lock:
+            links = [(host, self._clients[host]._link if host in self._clients else None) for host in self._hosts]
+        # Checks and reconnections run outside the lock so that sends to other hosts are not held up
+        for host, link in links:
+            if self._closed:
+                break
+            if link is None:
+                self._connect_host(host)
+            elif not self._is_healthy(link):
+                self._mark_unhealthy(host, link)
+        return self._ring.nodes
+
+    def host_for(self, key):
+        """Returns the ``(ip_address, port)`` pair of the host a key is routed to.
+
+        Raises
+        -------
+        ConnectionError
+            No host is healthy.
+        """
+        host = self._ring.get(key)
+        if host is None:
+            raise ConnectionError('None of the hosts are connected')
+        return host
+
+    def link_for(self, key) -> IPyCLink:
+        """Returns the :class:`IPyCLink` connection of the host a key is routed to.
+
+        Raises
+        -------
+        ConnectionError
+            No host is healthy.
+        """
+        return self._route(key)[1]
+
+    def _route(self, key):
+        with self._state_lock:
+            host = self.host_for(key)
+            return host, self._clients[host]._link
+
+    def send(self, key, serializable_object: object, **kwargs):
+        """Send a serializable object to the host a key is routed to. If that host turns out to
+        have failed, it is taken off the ring and the object is sent to the key's new host.
+        Any keyword arguments are passed to :meth:`IPyCLink.send`.
+
+        Parameters
+        ------------
+        key: :class:`object`
+            The routing key. See :meth:`~ipyc.sharding.HashRing.get`.
+        serializable_object: :class:`object`
+            The object to be sent to the host.
+
+        Returns
+        --------
+        Tuple[:class:`str`, :class:`int`]
+            The ``(ip_address, port)`` pair of the host the object was sent to.
+
+        Raises
+        -------
+        ConnectionError
+            No host is healthy.
+        """
+        while True:
+            host, link = self._route(key)
+            if link.is_active():
+                try:
+                    link.send(serializable_object, **kwargs)
+                    return host
+                except OSError:
+                    self._logger.debug(f"Lost the connection to the host {host[0]}:{host[1]} while sending")
+            self._mark_unhealthy(host, link)
+
+    def receive(self, key, **kwargs):
+        """Receive a serializable object from the host a key is routed to. Replies the host still owes
+        to a :meth:`scatter_gather` that timed out are read and discarded first.
+        Any keyword arguments are passed to :meth:`IPyCLink.receive`.
+
+        Returns
+        --------
+        Optional[:class:`object`]
+            The object that was sent from the host. See :meth:`IPyCLink.receive`.
+        """
+        link = self.link_for(key)
+        self._discard_late_replies(link, **kwargs)
+        return link.receive(**kwargs)
+
+    def broadcast(self, serializable_object: object, **kwargs):
+        """Send a serializable object to every healthy host. Hosts that fail while sending are
+        taken off the ring. Any keyword arguments are passed to :meth:`IPyCLink.send`.
+
+        Returns
+        --------
+        :class:`list`
+            The ``(ip_address, port)`` pairs of the hosts the object was sent to.
+        """
+        return [host for host, _ in self._broadcast(serializable_object, kwargs)]
+
+    def _broadcast(self, serializable_object: object, kwargs: dict) -> list:
+        with self._state_lock:
+            targets = [(host, self._clients[host]._link) for host in self._ring.nodes]
+        sent = []
+        for host, link in targets:
+            if not link.is_active():
+                self._mark_unhealthy(host, link)
+                continue
+            try:
+                link.send(serializable_object, **kwargs)
+                sent.append((host, link))
+            except OSError:
+                self._logger.debug(f"Lost the connection to the host {host[0]}:{host[1]} while broadcasting")
+                self._mark_unhealthy(host, link)
+        return sent
+
+    def scatter_gather(self, serializable_object: object, timeout=None, encoding='utf-8', **kwargs):
+        """Send a serializable object to every healthy host and collect one reply from each.
+        The replies are waited for together, so the whole exchange takes as long as the slowest
+        host rather than the sum of all of them. Any keyword arguments are passed to :meth:`IPyCLink.send`.
+
+        Parameters
+        ------------
+        serializable_object: :class:`object`
+            The object to be sent to the hosts.
+        timeout: Optional[:class:`float`]
+            The number of seconds to wait for the replies. Hosts that have not replied by then are
+            left out of the result, but stay on the ring. Their replies are read and discarded once
+            they arrive, during later calls, so they are never taken for the reply to another object.
+            Defaults to ``None``, waiting for every host.
+        encoding: Optional[:class:`str`]
+            The encoding used to send and receive. See :meth:`IPyCLink.send`. Defaults to ``utf-8``.
+
+        Returns
+        --------
+        :class:`dict`
+            The replies, keyed by the ``(ip_address, port)`` pair of the host that sent them.
+            Hosts that closed their connection instead of replying are taken off the ring.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        kwargs['encoding'] = encoding
+        pending = {link: host for host, link in self._broadcast(serializable_object, kwargs)}
+        replies = {}
+        while pending:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            # Wait on every connection at once and read the replies in the order they arrive
+            ready = _wait_readable(list(pending), remaining)
+            if not ready:
+                break
+            for link in ready:
+                reply = link.receive(encoding=encoding)
+                if self._owed.get(link) and link.is_active():
+                    # A late reply to an earlier call, the reply to this one comes after it
+                    self._owed[link] -= 1
+                    continue
+                host = pending.pop(link)
+                self._owed.pop(link, None)
+                if reply is None and not link.is_active():
+                    self._mark_unhealthy(host, link)
+                    continue
+                replies[host] = reply
+        for link in pending:
+            self._owed[link] = self._owed.get(link, 0) + 1
+        return replies
+
+    def close(self):
+        """Stops checking health and closes the connections to every host."""
+        if self._closed:
+            return
+        self._closed = True
+        self._stopped.set()
+        with self._state_lock:
+            for host in list(self._clients):
+                self._drop_host(host)
+
+
+class IPyCShardedSlave(IPyCShardedClient):
+    """Pseudo-class for IPyCShardedClient"""
+    pass
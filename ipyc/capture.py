@@ -0,0 +1,256 @@
+import collections
+import mmap
+import struct
+import threading
+import time
+
+SENT = 0
+RECEIVED = 1
+# Set on records whose payload was not captured, such as file transfers
+OMITTED = 2
+
+MAGIC = b'IPYCCAP\x01'
+
+_RECORD = struct.Struct('!QBIQ')
+
+ReplayReport = collections.namedtuple(
+    'ReplayReport',
+    'frames bytes skipped duration frames_per_second bytes_per_second latency_p50 latency_p99 latency_max'
+)
+ReplayReport.__doc__ = """The outcome of replaying a capture. Latencies are in seconds: the time each frame took
+to be written or, when replies were expected, to be answered."""
+
+
+def _percentile(ordered: list, fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _report(frames: int, size: int, skipped: int, duration: float, latencies: list) -> ReplayReport:
+    latencies.sort()
+    return ReplayReport(
+        frames=frames,
+        bytes=size,
+        skipped=skipped,
+        duration=duration,
+        frames_per_second=frames / duration if duration else 0.0,
+        bytes_per_second=size / duration if duration else 0.0,
+        latency_p50=_percentile(latencies, 0.5),
+        latency_p99=_percentile(latencies, 0.99),
+        latency_max=latencies[-1] if latencies else 0.0,
+    )
+
+
+class CaptureWriter:
+    """Records the frames a link sends and receives, with the time each one passed through it,
+    to a compact binary file that :class:`CaptureReader` and :func:`replay` read back.
+
+    Every record is a 21 byte header, holding the nanoseconds since the capture started, the
+    direction, and the sizes of the frame and its raw payload, followed by the frame and payload
+    exactly as they appear on the wire.
+
+    Links create their writer through :meth:`IPyCLink.start_capture` and
+    :meth:`AsyncIPyCLink.start_capture`; it typically should not be instantiated on its own.
+    It may be used from multiple threads.
+
+    Parameters
+    -----------
+    file: Union[:class:`str`, :class:`os.PathLike`, :term:`file object`]
+        A path, which is created or truncated, or a file object opened for writing in binary mode.
+    """
+    def __init__(self, file):
+        if hasattr(file, 'write'):
+            self._file, self._owned = file, False
+        else:
+            self._file, self._owned = open(file, 'wb'), True
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._records = 0
+        self._file.write(MAGIC)
+
+    @property
+    def records(self):
+        """:class:`int`: The number of frames recorded so far."""
+        return self._records
+
+    def record(self, direction: int, frame: bytes, payload=None):
+        """Append a frame to the capture. Recording on a closed writer does nothing.
+
+        Parameters
+        ------------
+        direction: :class:`int`
+            ``SENT`` or ``RECEIVED``, optionally combined with ``OMITTED`` when the payload was left out.
+        frame: :class:`bytes`
+            The frame line.
+        payload: Optional[:term:`bytes-like object`]
+            The raw payload that followed a buffer frame.
+        """
+        elapsed = int((time.perf_counter() - self._start) * 1e9)
+        payload = b'' if payload is None else memoryview(payload).cast('B')
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(_RECORD.pack(elapsed, direction, len(frame), len(payload)))
+            self._file.write(frame)
+            self._file.write(payload)
+            self._records += 1
+
+    def close(self):
+        """Flush the capture and close the file, if it was opened from a path."""
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.flush()
+            if self._owned:
+                self._file.close()
+            self._file = None
+
+
+class CaptureReader:
+    """Reads a capture written by :class:`CaptureWriter` through a memory map, so that captures
+    larger than memory can be replayed. Iterating over the reader yields a tuple of
+    ``(seconds, direction, frame, payload)`` for every record, where ``frame`` and ``payload``
+    are :class:`memoryview` slices of the map that are only valid until the reader is closed.
+
+    The reader can be used as a context manager.
+
+    Parameters
+    -----------
+    path: Union[:class:`str`, :class:`os.PathLike`]
+        The capture file.
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        if self._view[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f'{path!r} is not an IPyC capture')
+
+    def __iter__(self):
+        offset, end = len(MAGIC), len(self._view)
+        while offset + _RECORD.size <= end:
+            elapsed, direction, frame_size, payload_size = _RECORD.unpack_from(self._view, offset)
+            offset += _RECORD.size
+            frame = self._view[offset:offset + frame_size]
+            offset += frame_size
+            payload = self._view[offset:offset + payload_size]
+            offset += payload_size
+            if offset > end:
+                # The capture was cut off in the middle of this record
+                return
+            yield elapsed / 1e9, direction, frame, payload
+
+    def close(self):
+        """Release the memory map."""
+        if self._map is None:
+            return
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            # Records are still referenced, the map is released along with the last of them
+            pass
+        self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _schedule(path, direction: int, speed):
+    # Yields the frames to replay with the time each is due, relative to the start of the replay
+    with CaptureReader(path) as reader:
+        first = None
+        for elapsed, flags, frame, payload in reader:
+            try:
+                if flags & ~OMITTED != direction:
+                    continue
+                if flags & OMITTED:
+                    yield None, None, None
+                    continue
+                first = elapsed if first is None else first
+                due = (elapsed - first) / speed if speed else 0.0
+                # Copies outlive the map, since a link may still hold on to them once the reader is closed
+                yield due, bytes(frame), bytes(payload) if payload.nbytes else None
+            finally:
+                # The map cannot be closed while any view of it is alive
+                frame.release()
+                payload.release()
+
+
+def replay(link, path, speed=1.0, direction=SENT, expect_replies=False) -> ReplayReport:
+    """Send the frames of a capture over an :class:`IPyCLink`, byte for byte as they were captured,
+    reproducing their original timing and mix of types and sizes.
+
+    Frames are sent as-is, so when the captured link used interning, the capture must have started
+    together with the link and the receiving end must enable interning as well. File transfers are
+    captured without their contents and are skipped.
+
+    Parameters
+    ------------
+    link: :class:`IPyCLink`
+        The link to send the frames over, typically from an :class:`IPyCClient` connected to the host under test.
+    path: Union[:class:`str`, :class:`os.PathLike`]
+        The capture file.
+    speed: Optional[:class:`float`]
+        How much faster than the original the frames are sent. ``2`` halves every gap between frames.
+        ``0`` or ``None`` sends them as fast as possible. Defaults to ``1``, the original timing.
+    direction: Optional[:class:`int`]
+        Which frames to replay, ``SENT`` or ``RECEIVED``. Replaying what a host received from one of
+        its clients reproduces that client. Defaults to ``SENT``.
+    expect_replies: Optional[:class:`bool`]
+        Whether to wait for one reply from the other end after every frame. Latency is then measured
+        up to the reply, rather than up to the frame being written. Defaults to ``False``.
+
+    Returns
+    --------
+    :class:`ReplayReport`
+        The throughput and latency of the replay.
+    """
+    latencies, frames, size, skipped = [], 0, 0, 0
+    start = time.perf_counter()
+    for due, frame, payload in _schedule(path, direction, speed):
+        if due is None:
+            skipped += 1
+            continue
+        delay = start + due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        sent = time.perf_counter()
+        link._send_raw(frame, payload)
+        if expect_replies:
+            link.receive()
+        latencies.append(time.perf_counter() - sent)
+        frames += 1
+        size += len(frame) + (len(payload) if payload else 0)
+    return _report(frames, size, skipped, time.perf_counter() - start, latencies)
+
+
+async def replay_async(link, path, speed=1.0, direction=SENT, expect_replies=False) -> ReplayReport:
+    """|coro|
+
+    The :class:`AsyncIPyCLink` counterpart of :func:`replay`, taking the same arguments.
+    """
+    import asyncio
+
+    latencies, frames, size, skipped = [], 0, 0, 0
+    start = time.perf_counter()
+    for due, frame, payload in _schedule(path, direction, speed):
+        if due is None:
+            skipped += 1
+            continue
+        delay = start + due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        sent = time.perf_counter()
+        await link._send_raw(frame, payload)
+        if expect_replies:
+            await link.receive()
+        latencies.append(time.perf_counter() - sent)
+        frames += 1
+        size += len(frame) + (len(payload) if payload else 0)
+    return _report(frames, size, skipped, time.perf_counter() - start, latencies)
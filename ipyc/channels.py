@@ -0,0 +1,457 @@
+import asyncio
+import collections
+import logging
+import queue
+import threading
+
+from .packets import ChannelChunk
+from .protocol import _byte_view, _decode_message, _encode_message
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_CHANNEL = 0
+
+
+class _OutgoingMessage:
+    def __init__(self, pieces: list, done):
+        self._pieces = collections.deque(_byte_view(piece) for piece in pieces)
+        self.done = done
+        self.result = None
+
+    @property
+    def finished(self):
+        return not self._pieces
+
+    def next_chunk(self, size: int):
+        parts = []
+        while self._pieces and size:
+            piece = self._pieces.popleft()
+            if piece.nbytes > size:
+                self._pieces.appendleft(piece[size:])
+                piece = piece[:size]
+            parts.append(piece)
+            size -= piece.nbytes
+        while self._pieces and not self._pieces[0].nbytes:
+            self._pieces.popleft()
+        return parts[0] if len(parts) == 1 else b''.join(parts)
+
+
+class _ChannelScheduler:
+    def __init__(self, chunk_size: int, encoding: str):
+        self._chunk_size = chunk_size
+        self._encoding = encoding
+        self._ready = {}
+        self._outgoing = {}
+        self._partial = {}
+
+    def _schedule(self, channel, message: _OutgoingMessage):
+        pending = self._outgoing.setdefault(channel.id, collections.deque())
+        pending.append(message)
+        if len(pending) == 1:
+            self._ready.setdefault(channel.priority, collections.deque()).append(channel)
+
+    def _has_ready(self):
+        return any(self._ready.values())
+
+    def _next_chunk(self):
+        # The lowest priority value goes first, channels of equal priority take turns chunk by chunk
+        priority = min(priority for priority, channels in self._ready.items() if channels)
+        channel = self._ready[priority].popleft()
+        pending = self._outgoing[channel.id]
+        message = pending[0]
+        chunk = message.next_chunk(self._chunk_size)
+        if message.finished:
+            pending.popleft()
+        if pending:
+            self._ready[priority].append(channel)
+        return message, ChannelChunk(channel.id, message.finished, chunk)
+
+    def _drop_pending(self):
+        messages = [message for pending in self._outgoing.values() for message in pending]
+        self._ready.clear()
+        self._outgoing.clear()
+        return messages
+
+    def _reassemble(self, chunk: ChannelChunk):
+        partial = self._partial.setdefault(chunk.channel, bytearray())
+        partial += chunk.data
+        if not chunk.final:
+            return False, None
+        del self._partial[chunk.channel]
+        return True, _decode_message(partial, self._encoding)
+
+
+class Channel:
+    """A logical channel of a :class:`ChannelMultiplexer`. Objects sent on a channel are received
+    in order on the channel with the same id at the other end. Channels are created through
+    :meth:`ChannelMultiplexer.channel` and should not be instantiated on their own.
+    """
+    def __init__(self, multiplexer, channel_id: int, priority: int):
+        self._multiplexer = multiplexer
+        self.id = channel_id
+        self.priority = priority
+
+    def send(self, serializable_object: object, wait_for_flush=False):
+        """Queue a serializable object to be sent on this channel. See :meth:`IPyCLink.send` for how
+        objects are serialized.
+
+        Parameters
+        ------------
+        serializable_object: :class:`object`
+            The object to be sent to the receiving end.
+        wait_for_flush: Optional[:class:`bool`]
+            Whether to block until the last chunk of the object has been written to the link,
+            rather than returning as soon as it is queued. Channels queue without a bound, so a
+            sender outpacing the link should wait. Defaults to ``False``, as for :meth:`AsyncChannel.send`.
+
+        Returns
+        --------
+        Optional[:class:`bool`]
+            When waiting for the flush, ``False`` if the object could not be written, ``True`` otherwise.
+        """
+        return self._multiplexer._send(self, serializable_object, wait_for_flush)
+
+    def receive(self, timeout=None):
+        """Receive the next object sent on this channel.
+
+        Parameters
+        ------------
+        timeout: Optional[:class:`float`]
+            The number of seconds to wait for an object. If set to ``None``, wait until one arrives.
+            Defaults to ``None``.
+
+        Returns
+        --------
+        Optional[:class:`object`]
+            The object that was sent, or ``None`` if the link was closed or the timeout expired.
+        """
+        return self._multiplexer._receive(self.id, timeout)
+
+
+class ChannelMultiplexer:
+    """Multiplexes logical channels with priorities over a single :class:`IPyCLink`.
+
+    Objects sent on a channel are split into chunks of at most ``chunk_size`` bytes. A writer thread
+    always sends the next chunk of the highest priority channel that has something queued, so a small
+    message on an urgent channel waits for at most one chunk of a large transfer instead of the whole
+    of it. Channels of the same priority take turns chunk by chunk. Objects on a single channel are
+    always delivered in the order they were sent.
+
+    Both ends of the link must multiplex it. Once a channel has been received from, a reader thread
+    owns the receiving side of the link; objects sent on the link directly, outside any channel, are
+    delivered to channel ``0``.
+
+    Example
+    ---------
+    .. code-block:: python3
+
+        multiplexer = ChannelMultiplexer(client.connect())
+        control = multiplexer.channel(1, priority=0)
+        bulk = multiplexer.channel(2, priority=10)
+        bulk.send(large_payload)
+        control.send('cancel')  # goes out after at most one chunk of large_payload
+
+    Parameters
+    -----------
+    link: :class:`IPyCLink`
+        The link to multiplex. Interning on the link is supported, but the messages inside the
+        channels themselves are not interned.
+    chunk_size: Optional[:class:`int`]
+        The largest number of bytes of a message sent in one go. Defaults to ``65536``.
+    encoding: Optional[:class:`str`]
+        The encoding schema of the serializations sent on the channels. Both ends must use
+        the same encoding. Defaults to ``utf-8``.
+    """
+    def __init__(self, link, chunk_size=DEFAULT_CHUNK_SIZE, encoding='utf-8'):
+        self._link = link
+        self._scheduler = _ChannelScheduler(chunk_size, encoding)
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._condition = threading.Condition()
+        self._channels = {}
+        self._inboxes = {}
+        self._inbox_lock = threading.Lock()
+        self._closed = False
+        self._eof = False
+        self._writer_thread = threading.Thread(target=self._writer_loop, name='IPyCChannelWriter', daemon=True)
+        self._writer_thread.start()
+        self._reader_thread = None
+
+    def channel(self, channel_id: int, priority=0) -> Channel:
+        """Return the channel with the given id, creating it on first use.
+
+        Parameters
+        ------------
+        channel_id: :class:`int`
+            The id of the channel. Objects are delivered to the channel with the same id at the other end.
+        priority: Optional[:class:`int`]
+            The priority of the channel, lower values go first. Only used when the channel is created.
+            Defaults to ``0``.
+
+        Returns
+        --------
+        :class:`Channel`
+            The channel.
+        """
+        if channel_id not in self._channels:
+            self._channels[channel_id] = Channel(self, channel_id, priority)
+        return self._channels[channel_id]
+
+    def close(self):
+        """Stop the writer thread once every queued chunk has been written. The link is left open."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._writer_thread is not threading.current_thread():
+            self._writer_thread.join()
+
+    def _send(self, channel: Channel, serializable_object: object, wait: bool):
+        if self._closed or not self._link.is_active():
+            self._logger.debug(f"Attempted to send data when the multiplexer or link is closed! Ignoring.")
+            return False if wait else None
+        message = _OutgoingMessage(_encode_message(serializable_object, self._scheduler._encoding),
+                                   threading.Event() if wait else None)
+        with self._condition:
+            self._scheduler._schedule(channel, message)
+            self._condition.notify()
+        if wait:
+            message.done.wait()
+            return message.result
+
+    def _finish(self, message: _OutgoingMessage, result: bool):
+        message.result = result
+        if message.done:
+            message.done.set()
+
+    def _writer_loop(self):
+        while True:
+            with self._condition:
+                while not self._closed and not self._scheduler._has_ready():
+                    self._condition.wait()
+                if not self._scheduler._has_ready():
+                    return
+                message, chunk = self._scheduler._next_chunk()
+            try:
+                self._link.send(chunk)
+            except OSError:
+                self._logger.debug(f"The channel writer failed to write to the link", exc_info=True)
+            if not self._link.is_active():
+                with self._condition:
+                    dropped = self._scheduler._drop_pending()
+                for pending in dropped + [message]:
+                    self._finish(pending, False)
+                continue
+            if chunk.final:
+                self._finish(message, True)
+
+    def _inbox(self, channel_id: int) -> queue.Queue:
+        with self._inbox_lock:
+            if channel_id not in self._inboxes:
+                self._inboxes[channel_id] = queue.Queue()
+                if self._eof:
+                    self._inboxes[channel_id].put(None)
+            return self._inboxes[channel_id]
+
+    def _reader_loop(self):
+        while True:
+            received = self._link.receive()
+            if received is None and not self._link.is_active():
+                break
+            if not isinstance(received, ChannelChunk):
+                self._inbox(DEFAULT_CHANNEL).put(received)
+                continue
+            complete, message = self._scheduler._reassemble(received)
+            if complete:
+                self._inbox(received.channel).put(message)
+        self._logger.debug(f"The multiplexed link was closed")
+        with self._inbox_lock:
+            self._eof = True
+            for inbox in self._inboxes.values():
+                inbox.put(None)
+
+    def _receive(self, channel_id: int, timeout):
+        with self._inbox_lock:
+            if self._reader_thread is None:
+                self._reader_thread = threading.Thread(target=self._reader_loop, name='IPyCChannelReader', daemon=True)
+                self._reader_thread.start()
+        inbox = self._inbox(channel_id)
+        try:
+            message = inbox.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if message is None and self._eof:
+            # Leave the marker for any other receiver of this channel
+            inbox.put(None)
+        return message
+
+
+class AsyncChannel:
+    """A logical channel of a :class:`AsyncChannelMultiplexer`. Objects sent on a channel are received
+    in order on the channel with the same id at the other end. Channels are created through
+    :meth:`AsyncChannelMultiplexer.channel` and should not be instantiated on their own.
+    """
+    def __init__(self, multiplexer, channel_id: int, priority: int):
+        self._multiplexer = multiplexer
+        self.id = channel_id
+        self.priority = priority
+
+    async def send(self, serializable_object: object, wait_for_flush=False):
+        """|coro|
+
+        Queue a serializable object to be sent on this channel. See :meth:`AsyncIPyCLink.send` for how
+        objects are serialized.
+
+        Parameters
+        ------------
+        serializable_object: :class:`object`
+            The object to be sent to the receiving end.
+        wait_for_flush: Optional[:class:`bool`]
+            Whether to wait until the last chunk of the object has been written to the link,
+            rather than returning as soon as it is queued. Channels queue without a bound, and
+            a send that does not wait does not let the writer task run either, so a sender
+            outpacing the link should wait. Defaults to ``False``, as for :meth:`Channel.send`.
+
+        Returns
+        --------
+        Optional[:class:`bool`]
+            When waiting for the flush, ``False`` if the object could not be written, ``True`` otherwise.
+        """
+        return await self._multiplexer._send(self, serializable_object, wait_for_flush)
+
+    async def receive(self):
+        """|coro|
+
+        Receive the next object sent on this channel.
+
+        Returns
+        --------
+        Optional[:class:`object`]
+            The object that was sent, or ``None`` if the link was closed.
+        """
+        return await self._multiplexer._receive(self.id)
+
+
+class AsyncChannelMultiplexer:
+    """Multiplexes logical channels with priorities over a single :class:`AsyncIPyCLink`.
+    This is the asynchronous counterpart of :class:`ChannelMultiplexer`; the writer and reader
+    threads are tasks on the running event loop instead.
+
+    Example
+    ---------
+    .. code-block:: python3
+
+        multiplexer = AsyncChannelMultiplexer(await client.connect())
+        control = multiplexer.channel(1, priority=0)
+        bulk = multiplexer.channel(2, priority=10)
+        await bulk.send(large_payload)
+        await control.send('cancel')  # goes out after at most one chunk of large_payload
+
+    Parameters
+    -----------
+    link: :class:`AsyncIPyCLink`
+        The link to multiplex. Interning on the link is supported, but the messages inside the
+        channels themselves are not interned.
+    chunk_size: Optional[:class:`int`]
+        The largest number of bytes of a message sent in one go. Defaults to ``65536``.
+    encoding: Optional[:class:`str`]
+        The encoding schema of the serializations sent on the channels. Both ends must use
+        the same encoding. Defaults to ``utf-8``.
+    """
+    def __init__(self, link, chunk_size=DEFAULT_CHUNK_SIZE, encoding='utf-8'):
+        self._link = link
+        self._scheduler = _ChannelScheduler(chunk_size, encoding)
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._ready = asyncio.Event()
+        self._channels = {}
+        self._inboxes = {}
+        self._closed = False
+        self._eof = False
+        self._writer_task = None
+        self._reader_task = None
+
+    def channel(self, channel_id: int, priority=0) -> AsyncChannel:
+        """Return the channel with the given id, creating it on first use.
+        See :meth:`ChannelMultiplexer.channel`.
+        """
+        if channel_id not in self._channels:
+            self._channels[channel_id] = AsyncChannel(self, channel_id, priority)
+        return self._channels[channel_id]
+
+    async def close(self):
+        """|coro|
+
+        Stop the writer task once every queued chunk has been written. The link is left open.
+        """
+        self._closed = True
+        self._ready.set()
+        if self._writer_task is not None:
+            await self._writer_task
+
+    async def _send(self, channel: AsyncChannel, serializable_object: object, wait: bool):
+        if self._closed or not self._link.is_active():
+            self._logger.debug(f"Attempted to send data when the multiplexer or link is closed! Ignoring.")
+            return False if wait else None
+        message = _OutgoingMessage(_encode_message(serializable_object, self._scheduler._encoding),
+                                   asyncio.get_event_loop().create_future() if wait else None)
+        self._scheduler._schedule(channel, message)
+        self._ready.set()
+        if self._writer_task is None:
+            self._writer_task = asyncio.ensure_future(self._writer_loop())
+        if wait:
+            return await message.done
+
+    def _finish(self, message: _OutgoingMessage, result: bool):
+        message.result = result
+        if message.done and not message.done.done():
+            message.done.set_result(result)
+
+    async def _writer_loop(self):
+        while True:
+            if not self._scheduler._has_ready():
+                if self._closed:
+                    return
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            message, chunk = self._scheduler._next_chunk()
+            try:
+                await self._link.send(chunk)
+            except OSError:
+                self._logger.debug(f"The channel writer failed to write to the link", exc_info=True)
+            if not self._link.is_active():
+                for pending in self._scheduler._drop_pending() + [message]:
+                    self._finish(pending, False)
+                continue
+            if chunk.final:
+                self._finish(message, True)
+
+    def _inbox(self, channel_id: int) -> asyncio.Queue:
+        if channel_id not in self._inboxes:
+            self._inboxes[channel_id] = asyncio.Queue()
+            if self._eof:
+                self._inboxes[channel_id].put_nowait(None)
+        return self._inboxes[channel_id]
+
+    async def _reader_loop(self):
+        while True:
+            received = await self._link.receive()
+            if received is None and not self._link.is_active():
+                break
+            if not isinstance(received, ChannelChunk):
+                self._inbox(DEFAULT_CHANNEL).put_nowait(received)
+                continue
+            complete, message = self._scheduler._reassemble(received)
+            if complete:
+                self._inbox(received.channel).put_nowait(message)
+        self._logger.debug(f"The multiplexed link was closed")
+        self._eof = True
+        for inbox in self._inboxes.values():
+            inbox.put_nowait(None)
+
+    async def _receive(self, channel_id: int):
+        if self._reader_task is None:
+            self._reader_task = asyncio.ensure_future(self._reader_loop())
+        inbox = self._inbox(channel_id)
+        message = await inbox.get()
+        if message is None and self._eof:
+            # Leave the marker for any other receiver of this channel
+            inbox.put_nowait(None)
+        return message
@@ -0,0 +1,114 @@
+"""The IPyC wire protocol, shared by every link so that any host and client can talk to each other,
+whether they are blocking or asynchronous.
+
+A connection carries a stream of frames in both directions, with no handshake and nothing else in
+between. There are two kinds of frames:
+
+* A text frame is a single line, ``\\x01<name>\\x02<serialization>\\n``.
+* A buffer frame is a line, ``\\x03<name>\\x02<header>\\x02<size>\\n``, followed right away by
+  ``<size>`` bytes of raw payload.
+
+The name is the type name of the object, or an interned reference to it when both ends enable
+interning. Newlines in the serialization and the header are sent as ``\\x1a``, so a line always ends
+at the first newline. Lines are encoded with the encoding both ends agree on, UTF-8 by default, and
+the payload is sent as-is.
+"""
+import threading
+
+TEXT_FRAME = b'\x01'
+BUFFER_FRAME = b'\x03'
+SEPARATOR = b'\x02'
+TERMINATOR = b'\n'
+
+_SHARED = threading.local()
+
+
+def shared_buffer(size: int) -> bytearray:
+    """Return a scratch buffer of at least ``size`` bytes, shared by everything running on the calling
+    thread. Links read from their sockets into it and keep only the bytes they have to, so that idle
+    connections hold no read buffer of their own. Its contents are overwritten by the next read.
+
+    Parameters
+    ------------
+    size: :class:`int`
+        The smallest size of the buffer.
+    """
+    buffer = getattr(_SHARED, 'buffer', None)
+    if buffer is None or len(buffer) < size:
+        buffer = _SHARED.buffer = bytearray(size)
+    return buffer
+
+
+def payload_size(line: bytes):
+    """Return the size of the raw payload that follows a frame line, or ``None`` if the line is not
+    a valid buffer frame line.
+
+    Parameters
+    ------------
+    line: :term:`bytes-like object`
+        A frame line, including its newline.
+    """
+    # Buffer frames end their header line with the size of the raw payload that follows it
+    if not line.startswith(BUFFER_FRAME):
+        return None
+    try:
+        size = int(line[:-1].rsplit(SEPARATOR, 1)[1])
+    except (IndexError, ValueError):
+        return None
+    return size if size >= 0 else None
+
+
+class FrameSplitter:
+    """Splits a byte stream into frames as it arrives, in pieces of any size.
+
+    Every complete frame is returned as a tuple of its line, including the newline, and its payload,
+    which is ``None`` for text frames. Only the bytes of the frame that is still incomplete are kept
+    between calls to :meth:`feed`.
+    """
+    __slots__ = ('_pending', '_scanned', '_line', '_size')
+
+    def __init__(self):
+        self._pending = bytearray()
+        self._scanned = 0
+        self._line = None
+        self._size = 0
+
+    @property
+    def pending(self):
+        """:class:`int`: The number of bytes of the incomplete frame held so far."""
+        return len(self._pending)
+
+    def feed(self, data) -> list:
+        """Add the next bytes of the stream and return the frames they complete, oldest first.
+
+        Parameters
+        ------------
+        data: :term:`bytes-like object`
+            The bytes received. They are copied, so the caller may reuse the buffer.
+        """
+        pending = self._pending
+        pending += data
+        frames, offset = [], 0
+        while True:
+            if self._line is not None:
+                if len(pending) - offset < self._size:
+                    break
+                frames.append((self._line, pending[offset:offset + self._size]))
+                offset += self._size
+                self._line = None
+                continue
+            end = pending.find(TERMINATOR, max(offset, self._scanned))
+            if end < 0:
+                # Do not search the same bytes of a long line again on the next call
+                self._scanned = len(pending)
+                break
+            line = bytes(pending[offset:end + 1])
+            offset = self._scanned = end + 1
+            size = payload_size(line)
+            if size is None:
+                frames.append((line, None))
+            else:
+                self._line, self._size = line, size
+        del pending[:offset]
+        self._scanned -= min(offset, self._scanned)
+        return frames
@@ -0,0 +1,151 @@
+"""Hands the sockets of a running host over to the process replacing it, so that a host can be restarted
+without its listener ever refusing a connection.
+
+The running host waits on a Unix socket for its successor. Once the successor connects, it is sent the
+listening sockets of the host, and possibly some of its established connections, as file descriptors
+with ``SCM_RIGHTS``. The successor acknowledges them and serves them from then on, while the
+predecessor stops accepting and closes the links it still has once they are done.
+
+Each message carries a fixed header, ``!III``: the number of sockets it carries, the number still to
+come in later messages, and the number of listening sockets among all of them, which come first.
+Sockets are sent in batches as the kernel limits the number of descriptors in a single message.
+
+This is only available where Unix sockets can pass file descriptors, that is on POSIX systems.
+"""
+import array
+import os
+import socket
+import struct
+import sys
+import time
+
+MAX_SOCKETS_PER_MESSAGE = 250
+
+_HEADER = struct.Struct('!III')
+_ACKNOWLEDGEMENT = b'\x06'
+_RETRY_INTERVAL = 0.1
+
+
+def _unlink(path: str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _adopt(descriptor: int) -> socket.socket:
+    if sys.version_info >= (3, 7):
+        return socket.socket(fileno=descriptor)
+    # Older versions cannot detect the family of a descriptor, every socket of a host is a TCP one
+    sock = socket.fromfd(descriptor, socket.AF_INET, socket.SOCK_STREAM)
+    os.close(descriptor)
+    return sock
+
+
+def _receive_message(channel: socket.socket) -> tuple:
+    data, descriptors = b'', array.array('i')
+    while len(data) < _HEADER.size:
+        chunk, ancillary, flags, _ = channel.recvmsg(_HEADER.size - len(data),
+                                                     socket.CMSG_SPACE(MAX_SOCKETS_PER_MESSAGE * descriptors.itemsize))
+        for level, kind, payload in ancillary:
+            if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                descriptors.frombytes(payload[:len(payload) - len(payload) % descriptors.itemsize])
+        if not chunk or flags & socket.MSG_CTRUNC:
+            for descriptor in descriptors:
+                os.close(descriptor)
+            raise ConnectionError('The hand-off was interrupted')
+        data += chunk
+    return _HEADER.unpack(data), list(descriptors)
+
+
+def hand_off_sockets(path: str, listeners: list, connections=(), timeout=None) -> bool:
+    """Wait for a successor to connect to a Unix socket at ``path``, and hand it the given sockets.
+    The sockets remain open in this process; close them once this returns ``True``, without shutting
+    them down, as that would affect the successor's copies as well.
+
+    Parameters
+    ------------
+    path: :class:`str`
+        The path of the Unix socket. An existing file at that path is replaced.
+    listeners: List[:class:`socket.socket`]
+        The listening sockets.
+    connections: Union[List[:class:`socket.socket`], Callable[[], List[:class:`socket.socket`]]]
+        The established connections, or a function returning them, called once the successor has
+        connected so that connections can be handed over in the state they are in at that moment.
+        Defaults to none.
+    timeout: Optional[:class:`float`]
+        The number of seconds to wait for a successor. Defaults to ``None``, waiting forever.
+
+    Returns
+    --------
+    :class:`bool`
+        Whether the successor acknowledged the sockets. If not, it has not taken them over.
+    """
+    _unlink(path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(path)
+        server.listen(1)
+        server.settimeout(timeout)
+        try:
+            channel, _ = server.accept()
+        except socket.timeout:
+            return False
+        finally:
+            _unlink(path)
+
+    with channel:
+        connections = list(connections() if callable(connections) else connections)
+        sockets = list(listeners) + connections
+        try:
+            for start in range(0, max(len(sockets), 1), MAX_SOCKETS_PER_MESSAGE):
+                batch = sockets[start:start + MAX_SOCKETS_PER_MESSAGE]
+                remaining = len(sockets) - start - len(batch)
+                header = _HEADER.pack(len(batch), remaining, len(listeners))
+                descriptors = array.array('i', (sock.fileno() for sock in batch))
+                channel.sendmsg([header], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, descriptors)] if batch else [])
+            channel.settimeout(timeout)
+            return channel.recv(1) == _ACKNOWLEDGEMENT
+        except OSError:
+            return False
+
+
+def take_over_sockets(path: str, timeout=0.0):
+    """Connect to a predecessor waiting in :func:`hand_off_sockets` at ``path`` and take over its sockets.
+
+    Parameters
+    ------------
+    path: :class:`str`
+        The path of the Unix socket.
+    timeout: Optional[:class:`float`]
+        The number of seconds to keep trying to reach a predecessor. Defaults to ``0``, trying once.
+
+    Returns
+    --------
+    Optional[Tuple[List[:class:`socket.socket`], List[:class:`socket.socket`]]]
+        The listening sockets and the established connections, or ``None`` if no predecessor could be reached.
+    """
+    deadline = time.monotonic() + timeout
+    channel = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with channel:
+        while True:
+            try:
+                channel.connect(path)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() >= deadline:
+                    return None
+                time.sleep(_RETRY_INTERVAL)
+
+        sockets, remaining, listeners = [], None, 0
+        try:
+            while remaining != 0:
+                (count, remaining, listeners), descriptors = _receive_message(channel)
+                sockets.extend(_adopt(descriptor) for descriptor in descriptors)
+                if len(descriptors) != count:
+                    raise ConnectionError('The hand-off lost sockets on the way')
+            channel.sendall(_ACKNOWLEDGEMENT)
+        except OSError:
+            for sock in sockets:
+                sock.close()
+            raise
+    return sockets[:listeners], sockets[listeners:]
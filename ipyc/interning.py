@@ -0,0 +1,114 @@
+import json
+
+DEFAULT_TABLE_SIZE = 4096
+MAX_INTERNED_LENGTH = 64
+
+
+class InternTable:
+    """A bounded table of strings, and dictionary key sets, that one side of a link has already sent.
+
+    Each side of a link keeps one table for what it sends and one for what it receives. Both tables
+    are updated by the exact same sequence of operations, so an entry is always found at the same
+    index on both ends and never has to be announced explicitly: the first occurrence of a value is
+    sent as-is and added by both sides, later occurrences are sent as an index. When the table is
+    full it is cleared, again identically on both sides.
+
+    Parameters
+    -----------
+    max_entries: Optional[:class:`int`]
+        The number of entries the table holds before it is cleared. Both ends of a link must use
+        the same size. Defaults to ``4096``.
+    """
+    __slots__ = ('_max_entries', '_indices', '_values')
+
+    def __init__(self, max_entries=DEFAULT_TABLE_SIZE):
+        self._max_entries = max_entries
+        self._indices = {}
+        self._values = []
+
+    def __len__(self):
+        return len(self._values)
+
+    def reset(self):
+        """Forget every entry."""
+        self._indices.clear()
+        self._values.clear()
+
+    def add(self, value):
+        """Add a value that was just sent or received as-is."""
+        if len(self._values) >= self._max_entries:
+            self.reset()
+        self._indices[value] = len(self._values)
+        self._values.append(value)
+
+    def index(self, value):
+        """Return the index of a value about to be sent, or ``None`` after adding it if it is new."""
+        index = self._indices.get(value)
+        if index is None:
+            self.add(value)
+        return index
+
+    def get(self, index: int):
+        """Return the value a received index refers to."""
+        return self._values[index]
+
+
+def encode_name(class_name: str, table: InternTable) -> str:
+    index = table.index(class_name)
+    return class_name if index is None else f'#{index}'
+
+
+def decode_name(class_name: str, table: InternTable) -> str:
+    if class_name.startswith('#'):
+        return table.get(int(class_name[1:]))
+    table.add(class_name)
+    return class_name
+
+
+def _key(key) -> str:
+    # Mirrors how json.dumps converts non-string keys
+    return key if isinstance(key, str) else json.dumps(key)
+
+
+def _encode(value, table: InternTable):
+    if isinstance(value, dict):
+        keys = tuple(_key(key) for key in value)
+        index = table.index(keys)
+        return {'': [list(keys) if index is None else index] + [_encode(item, table) for item in value.values()]}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item, table) for item in value]
+    if isinstance(value, str) and len(value) <= MAX_INTERNED_LENGTH:
+        index = table.index(value)
+        return value if index is None else {'s': index}
+    return value
+
+
+def _decode(value, table: InternTable):
+    if isinstance(value, dict):
+        if 's' in value:
+            return table.get(value['s'])
+        keys, *items = value['']
+        if isinstance(keys, int):
+            keys = table.get(keys)
+        else:
+            keys = tuple(keys)
+            table.add(keys)
+        return dict(zip(keys, [_decode(item, table) for item in items]))
+    if isinstance(value, list):
+        return [_decode(item, table) for item in value]
+    if isinstance(value, str) and len(value) <= MAX_INTERNED_LENGTH:
+        table.add(value)
+    return value
+
+
+def dumps(obj, table: InternTable) -> str:
+    """Serialize ``obj`` like :func:`json.dumps`, replacing dictionary key sets and short strings that
+    were already sent with their index in ``table``. Every dictionary is sent as an object with a single
+    ``""`` key holding its key set followed by its values, and every interned string as ``{"s": index}``.
+    """
+    return json.dumps(_encode(obj, table), separators=(',', ':'))
+
+
+def loads(serialization: str, table: InternTable):
+    """Deserialize a string produced by :func:`dumps` with the peer's matching ``table``."""
+    return _decode(json.loads(serialization), table)
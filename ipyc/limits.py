@@ -0,0 +1,179 @@
+"""Token buckets limiting how fast connections are accepted and read from, so that one client cannot
+take over a host at the expense of the others.
+
+Limits are enforced by backpressure: a connection over its rate is not read from until it is back
+under it, which in turn fills the socket buffers of the client until its writes wait as well. Buckets
+may run into debt, so that a message larger than the burst of a byte limit is still read, and the
+connection then waits as long as that message costs.
+"""
+import asyncio
+import time
+
+
+class TokenBucket:
+    """A bucket of tokens refilled at a fixed rate up to a burst, taken from for every unit of work.
+    It performs no waiting itself, it only tells how long to wait.
+
+    Parameters
+    -----------
+    rate: :class:`float`
+        The number of tokens added per second.
+    burst: Optional[:class:`float`]
+        The number of tokens the bucket holds at most, and starts with. Defaults to ``rate``, one second worth.
+    """
+    __slots__ = ('_rate', '_burst', '_tokens', '_updated')
+
+    def __init__(self, rate: float, burst=None):
+        if rate <= 0:
+            raise ValueError('The rate must be positive')
+        self._rate = rate
+        self._burst = rate if burst is None else burst
+        self._tokens = self._burst
+        self._updated = time.monotonic()
+
+    @property
+    def rate(self):
+        """:class:`float`: The number of tokens added per second."""
+        return self._rate
+
+    @property
+    def burst(self):
+        """:class:`float`: The number of tokens the bucket holds at most."""
+        return self._burst
+
+    @property
+    def available(self):
+        """:class:`float`: The number of tokens in the bucket, negative while it is in debt."""
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+        return self._tokens
+
+    def take(self, amount=1.0):
+        """Take tokens from the bucket, running into debt if it holds too few.
+
+        Parameters
+        ------------
+        amount: Optional[:class:`float`]
+            The number of tokens to take. Defaults to ``1``.
+        """
+        self._tokens = self.available - amount
+
+    def wait_time(self, amount=0.0) -> float:
+        """Return the number of seconds until the bucket holds a number of tokens, ``0`` if it already does.
+
+        Parameters
+        ------------
+        amount: Optional[:class:`float`]
+            The number of tokens needed. Defaults to ``0``, that is until the bucket is out of debt.
+        """
+        return max(amount - self.available, 0.0) / self._rate
+
+
+class RateLimiter:
+    """Limits the rate of the messages and bytes received on a connection, with a :class:`TokenBucket`
+    for each. See :meth:`AsyncIPyCLink.limit_rate`.
+
+    Parameters
+    -----------
+    messages_per_second: Optional[:class:`float`]
+        The number of messages that may be received per second. Defaults to ``None``, unlimited.
+    bytes_per_second: Optional[:class:`float`]
+        The number of bytes that may be received per second. Defaults to ``None``, unlimited.
+    message_burst: Optional[:class:`float`]
+        The number of messages that may be received at once after the connection was idle.
+        Defaults to one second worth.
+    byte_burst: Optional[:class:`float`]
+        The number of bytes that may be received at once after the connection was idle.
+        Defaults to one second worth.
+    statistics: Optional[:class:`HostStatistics`]
+        Statistics the throttling of the connection is counted in as well, such as those of its host.
+        Defaults to ``None``.
+    """
+    __slots__ = ('_messages', '_bytes', '_statistics', '_throttled', '_throttled_time')
+
+    def __init__(self, messages_per_second=None, bytes_per_second=None, message_burst=None, byte_burst=None,
+                 statistics=None):
+        self._messages = None if messages_per_second is None else TokenBucket(messages_per_second, message_burst)
+        self._bytes = None if bytes_per_second is None else TokenBucket(bytes_per_second, byte_burst)
+        self._statistics = statistics
+        self._throttled = 0
+        self._throttled_time = 0.0
+
+    @property
+    def throttled(self):
+        """:class:`int`: The number of times the connection was paused for going over its rate."""
+        return self._throttled
+
+    @property
+    def throttled_time(self):
+        """:class:`float`: The number of seconds the connection was paused for in total."""
+        return self._throttled_time
+
+    def delay(self) -> float:
+        """Return the number of seconds to wait before receiving the next message."""
+        delay = 0.0
+        if self._messages is not None:
+            delay = self._messages.wait_time(min(self._messages.burst, 1.0))
+        if self._bytes is not None:
+            delay = max(delay, self._bytes.wait_time())
+        return delay
+
+    def record(self, size: int):
+        """Count a message received.
+
+        Parameters
+        ------------
+        size: :class:`int`
+            The number of bytes of the message on the wire.
+        """
+        if self._messages is not None:
+            self._messages.take()
+        if self._bytes is not None:
+            self._bytes.take(size)
+
+    async def throttle(self):
+        """|coro|
+
+        Wait until the next message may be received.
+        """
+        delay = self.delay()
+        if not delay:
+            return
+        self._throttled += 1
+        self._throttled_time += delay
+        if self._statistics is not None:
+            self._statistics.throttled += 1
+            self._statistics.throttled_time += delay
+        await asyncio.sleep(delay)
+
+
+class HostStatistics:
+    """Counters of the admission control and rate limiting of a host, see :attr:`AsyncIPyCHost.statistics`.
+
+    Attributes
+    -----------
+    accepted: :class:`int`
+        The number of connections admitted.
+    rejected: :class:`int`
+        The number of connections closed right away, because the host had ``max_connections`` already
+        or too many connections were waiting to be admitted.
+    delayed: :class:`int`
+        The number of connections that waited to be admitted under the accept rate.
+    throttled: :class:`int`
+        The number of times a connection was paused for going over its message or byte rate.
+    throttled_time: :class:`float`
+        The number of seconds connections were paused for in total.
+    """
+    __slots__ = ('accepted', 'rejected', 'delayed', 'throttled', 'throttled_time')
+
+    def __init__(self):
+        self.accepted = 0
+        self.rejected = 0
+        self.delayed = 0
+        self.throttled = 0
+        self.throttled_time = 0.0
+
+    def __repr__(self):
+        return f'<HostStatistics accepted={self.accepted} rejected={self.rejected} delayed={self.delayed} ' \
+               f'throttled={self.throttled} throttled_time={self.throttled_time:.3f}>'
@@ -1,11 +1,145 @@
-import asyncio
+import collections
+import itertools
+import json
 import logging
-import sys
-
-from multiprocessing.connection import Connection
-
-from .packets import CommunicationPacket
-from . import serialization
+import os
+import selectors
+import socket
+import queue
+import threading
+import time
+
+from .capture import CaptureWriter, SENT, RECEIVED, OMITTED
+from .framing import payload_size, shared_buffer
+from .packets import BufferPacket, SequencedMessage
+from .interning import DEFAULT_TABLE_SIZE
+from .protocol import IPyCProtocol, _byte_view
+from . import reliability
+
+
+FILE_CLASS_NAME = 'IPyCFile'
+FILE_CHUNK_SIZE = 1024 * 1024
+# Seconds close gives the frames still queued by a spilling or thread safe link to reach the peer
+DEFAULT_CLOSE_TIMEOUT = 30.0
+
+
+def _open_file(file, mode: str):
+    # Returns the file object and whether this link is responsible for closing it
+    if isinstance(file, int):
+        return os.fdopen(file, mode, closefd=False), True
+    if hasattr(file, 'fileno'):
+        return file, False
+    return open(file, mode), True
+
+
+def _file_header(file_object) -> str:
+    name = getattr(file_object, 'name', None)
+    return json.dumps({'name': os.path.basename(name) if isinstance(name, str) else None})
+
+
+def _file_count(file_object, offset: int, count):
+    available = max(os.fstat(file_object.fileno()).st_size - offset, 0)
+    return available if count is None else min(count, available)
+
+
+def _write_all(fd: int, view: memoryview):
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def _wait_readable(links, timeout=None) -> list:
+    # Returns the links that can be received from without blocking, those with buffered data first
+    ready = [link for link in links if link._reader.buffered]
+    if ready:
+        return ready
+    with selectors.DefaultSelector() as selector:
+        for link in links:
+            selector.register(link._socket, selectors.EVENT_READ, link)
+        return [key.data for key, _ in selector.select(timeout)]
+
+
+def _remaining(deadline):
+    # Seconds left until a time.monotonic() deadline, None when there is no deadline
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def _send_all(sock: socket.socket, chunks: list):
+    if not hasattr(sock, 'sendmsg'):
+        sock.sendall(b''.join(chunks))
+        return
+    # Empty chunks would never be counted as sent
+    views = [view for view in map(_byte_view, chunks) if view.nbytes]
+    index = 0
+    while index < len(views):
+        sent = sock.sendmsg(views[index:index + 1024])
+        while sent and index < len(views):
+            if sent >= views[index].nbytes:
+                sent -= views[index].nbytes
+                index += 1
+            else:
+                views[index] = views[index][sent:]
+                sent = 0
+
+
+class _SocketReader:
+    # Reads frame lines and payloads from a blocking socket, keeping what was read past them for the next read
+    __slots__ = ('_socket', '_buffer', '_scanned', '_read_size')
+
+    def __init__(self, sock: socket.socket, read_size=64 * 1024):
+        self._socket = sock
+        self._buffer = bytearray()
+        self._scanned = 0
+        self._read_size = read_size
+
+    @property
+    def buffered(self):
+        return len(self._buffer)
+
+    def readline(self) -> bytes:
+        while True:
+            end = self._buffer.find(b'\n', self._scanned)
+            if end >= 0:
+                line = bytes(self._buffer[:end + 1])
+                del self._buffer[:end + 1]
+                self._scanned = 0
+                return line
+            self._scanned = len(self._buffer)
+            scratch = shared_buffer(self._read_size)
+            size = self._socket.recv_into(scratch, self._read_size)
+            if not size:
+                raise EOFError
+            self._buffer += memoryview(scratch)[:size]
+
+    def read_into(self, view: memoryview) -> int:
+        # Reads at least one byte and at most as many as fit in the view
+        if self._buffer:
+            size = min(len(self._buffer), view.nbytes)
+            view[:size] = self._buffer[:size]
+            del self._buffer[:size]
+            return size
+        size = self._socket.recv_into(view)
+        if not size:
+            raise EOFError
+        return size
+
+    def read_exactly_into(self, view: memoryview):
+        while view:
+            view = view[self.read_into(view):]
+
+    def skip(self, size: int):
+        scratch = memoryview(shared_buffer(self._read_size))
+        while size:
+            size -= self.read_into(scratch[:min(size, len(scratch))])
+
+
+class _WriteRequest:
+    __slots__ = ('payload', 'done', 'result')
+
+    def __init__(self, payload, wait: bool):
+        # The payload is either a list of chunks to write or a callable taking the socket
+        self.payload = payload
+        self.done = threading.Event() if wait else None
+        self.result = None
 
 
 class IPyCLink:
@@ -16,37 +150,307 @@ class IPyCLink:
 
     Parameters
     -----------
-    connection: :class:`multiprocessing.connection.Connection`
-        The managed socket connection.
+    connection: :class:`socket.socket`
+        The managed, blocking socket connection. Frames are read from and written to it directly,
+        as described in :mod:`ipyc.framing`.
     client: Union[:class:`IPyCHost`, :class:`IPyCClient`]
         The communication object that is responsible for managing this connection.
+    thread_safe: Optional[:class:`bool`]
+        Whether multiple threads may send on this link at once. When enabled, sends are handed
+        to a dedicated writer thread through a bounded queue, and frames that are pending at
+        the same time are coalesced into a single socket write. Receiving is unaffected.
+        Defaults to ``False``.
+    max_pending_frames: Optional[:class:`int`]
+        The number of frames that may wait for the writer thread before :meth:`send` blocks.
+        Only used when ``thread_safe`` is enabled.
+        Defaults to ``1024``.
+    interning: Optional[:class:`bool`]
+        Whether to intern type names, dictionary key sets, and short strings on this link. Each side
+        keeps a bounded table of what it has already sent, and later occurrences are sent as a short
+        index instead. Both ends of the link must enable it. The tables start empty on every new link.
+        Defaults to ``False``.
+    intern_table_size: Optional[:class:`int`]
+        The number of entries each interning table holds before it is cleared. Both ends of the link
+        must use the same size.
+        Defaults to ``4096``.
     """
-    def __init__(self, connection: Connection, client):
-        self._connection = connection
-        self._logger = logging.getLogger(self.__class__.__name__)
+    # Links hold no __dict__ and share their class logger, as hosts may keep tens of thousands of them
+    __slots__ = ('_socket', '_reader', '_closed', '_active', '_client', '_protocol', '_intern_lock', '_writer_queue',
+                 '_writer_thread', '_spill', '_spill_thread', '_capture', '_received_frame')
+
+    _logger = logging.getLogger('IPyCLink')
+
+    def __init__(self, connection, client, thread_safe=False, max_pending_frames=1024, interning=False,
+                 intern_table_size=DEFAULT_TABLE_SIZE):
+        self._socket = connection
+        self._reader = None if connection is None else _SocketReader(connection)
+        self._closed = False
         self._logger.debug(f"Established link")
         self._active = True
         self._client = client
-
-    def close(self):
+        self._protocol = IPyCProtocol(interning=interning, intern_table_size=intern_table_size)
+        self._intern_lock = threading.Lock() if interning else None
+        self._writer_queue = None
+        self._writer_thread = None
+        self._spill = None
+        self._spill_thread = None
+        self._capture = None
+        self._received_frame = None
+        if thread_safe:
+            self._writer_queue = queue.Queue(maxsize=max_pending_frames)
+            self._writer_thread = threading.Thread(target=self._writer_loop, name='IPyCLinkWriter', daemon=True)
+            self._writer_thread.start()
+
+    def close(self, timeout=DEFAULT_CLOSE_TIMEOUT):
         """Closes the socket channel with a peer and attempts to send them EOF.
         Informs the parent :class:`IPyCHost` or :class:`IPyCClient` of the
-        closed connection.
+        closed connection. Closing an already closed link does nothing.
+
+        Parameters
+        ------------
+        timeout: Optional[:class:`float`]
+            The number of seconds frames still queued by spilling, or by the writer thread of a
+            ``thread_safe`` link, have to reach the peer. Once it expires, for example because the
+            peer stopped reading, the socket is shut down and the remaining frames are discarded.
+            ``None`` waits as long as it takes. Defaults to ``30``.
         """
+        if self._closed:
+            return
+        self._closed = True
         self._logger.debug(f"Beginning to close link")
-        self._connection.close()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if self._spill is not None:
+            # Let the spiller write what is still queued, from memory and from disk
+            self._spill.finish()
+            self._join_before(self._spill_thread, deadline)
+            self._spill.close()
+        if self._writer_thread:
+            # Let the writer flush what is already queued before the socket goes away
+            try:
+                self._writer_queue.put(None, timeout=_remaining(deadline))
+            except queue.Full:
+                # The writer fails fast once the socket is shut down, and makes room
+                self._shutdown_before_close()
+                self._writer_queue.put(None)
+            self._join_before(self._writer_thread, deadline)
+            self._writer_thread = None
+        self._socket.close()
         self._active = False
+        self.stop_capture()
         self._client.connections.remove(self)
         self._logger.debug(f"Closed link")
 
+    def _shutdown_before_close(self):
+        if self._active:
+            self._logger.warning(f"The peer did not read the frames still queued before the close timeout, discarding them")
+        self._active = False
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def _join_before(self, thread: threading.Thread, deadline):
+        if thread is threading.current_thread():
+            return
+        thread.join(_remaining(deadline))
+        if thread.is_alive():
+            # Writing to a socket that was shut down fails right away, which ends the thread
+            self._shutdown_before_close()
+            thread.join()
+
+    def abort(self):
+        """Shuts the socket down in both directions without closing the link. Any thread blocked
+        receiving on this link wakes up as if the peer had closed the connection, and further
+        sends fail. The link still has to be closed with :meth:`close`.
+        """
+        if self._closed:
+            return
+        self._logger.debug(f"Aborting link")
+        self._active = False
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
     def is_active(self):
         """:class:`bool`: Indicates if the socket connection is closed, at EOF, or no longer viable."""
         # Quickly check if the state of the reader changed from the remote
-        if not self._connection or self._connection.closed:
+        if self._closed:
             self._active = False
         return self._active
 
-    def send(self, serializable_object: object, encoding='utf-8'):
+    def fileno(self) -> int:
+        """:class:`int`: The file descriptor of the socket."""
+        return self._socket.fileno()
+
+    def _ignore_send(self, what: str):
+        self._logger.debug(f"Attempted to send {what} when the link is closed! Ignoring.")
+
+    def _writer_loop(self):
+        failed = False
+        while True:
+            requests = [self._writer_queue.get()]
+            while True:
+                try:
+                    requests.append(self._writer_queue.get_nowait())
+                except queue.Empty:
+                    break
+            chunks, written = [], []
+            for request in requests + [None]:
+                if request is not None and not callable(request.payload):
+                    chunks.extend(request.payload)
+                    written.append(request)
+                    continue
+                # Flush everything coalesced so far before running a callable or stopping
+                if chunks and not failed:
+                    try:
+                        _send_all(self._socket, chunks)
+                    except OSError:
+                        self._logger.debug(f"The writer thread failed to write to the socket", exc_info=True)
+                        failed = True
+                        self._active = False
+                for pending in written:
+                    pending.result = not failed
+                    if pending.done:
+                        pending.done.set()
+                chunks, written = [], []
+                if request is not None:
+                    if not failed:
+                        try:
+                            request.result = request.payload(self._socket)
+                        except OSError:
+                            self._logger.debug(f"The writer thread failed to write to the socket", exc_info=True)
+                            failed = True
+                            self._active = False
+                    if request.done:
+                        request.done.set()
+            if None in requests:
+                return
+
+    def _enqueue(self, payload, wait: bool) -> _WriteRequest:
+        request = _WriteRequest(payload, wait)
+        self._writer_queue.put(request)
+        return request
+
+    @staticmethod
+    def _wait(request):
+        if request is not None and request.done:
+            request.done.wait()
+            return request.result
+
+    def _send_frame(self, frame: bytes, buffer=None, wait_for_flush=False):
+        if self._capture is not None:
+            self._capture.record(SENT, frame, buffer)
+        chunks = [frame] if buffer is None else [frame, buffer]
+        if self._writer_queue is None and self._spill is None:
+            _send_all(self._socket, chunks)
+            return None
+        if self._spill is not None:
+            ticket = self._spill.put(b''.join(chunks))
+            if wait_for_flush:
+                self._spill.wait_acked(ticket)
+            return None
+        return self._enqueue(chunks, wait_for_flush)
+
+    def _send_raw(self, frame: bytes, payload=None):
+        # Sends a frame exactly as given, bypassing serialization, to replay captured traffic
+        self._wait(self._send_frame(frame, None if payload is None else _byte_view(payload)))
+
+    def _record_received(self, payload=None, flags=0):
+        if self._capture is not None and self._received_frame is not None:
+            self._capture.record(RECEIVED | flags, self._received_frame, payload)
+        self._received_frame = None
+
+    def start_capture(self, file) -> CaptureWriter:
+        """Start recording every frame this link sends and receives, with its timing, to a capture
+        file that :func:`~ipyc.capture.replay` can play back against a host. Starting a capture while
+        one is running stops the running one first.
+
+        Parameters
+        ------------
+        file: Union[:class:`str`, :class:`os.PathLike`, :term:`file object`]
+            A path, which is created or truncated, or a file object opened for writing in binary mode.
+
+        Returns
+        --------
+        :class:`CaptureWriter`
+            The writer of the capture.
+        """
+        self.stop_capture()
+        self._capture = CaptureWriter(file)
+        return self._capture
+
+    def stop_capture(self):
+        """Stop recording and close the capture file. Stopping when no capture is running does nothing."""
+        capture, self._capture = self._capture, None
+        if capture is not None:
+            capture.close()
+
+    def _spill_loop(self):
+        while self._spill.wait():
+            frames = self._spill.take()
+            try:
+                _send_all(self._socket, frames)
+            except OSError:
+                self._logger.debug(f"The spiller thread failed to write to the socket", exc_info=True)
+                self._active = False
+                # The peer is gone, so nothing queued can be delivered anymore
+                self._spill.close()
+                return
+            self._spill.ack(len(frames))
+
+    def enable_spilling(self, max_memory=None, directory=None, segment_size=None):
+        """Queue outbound frames instead of writing them to the socket directly, so that :meth:`send`
+        never waits for a slow peer. Frames are held in memory up to ``max_memory`` bytes and
+        spilled to memory-mapped segment files past that. A background thread writes them to the
+        socket in order as the peer reads, and deletes each segment file once all of its frames are
+        written. Frames still queued when the link is closed are written before it closes.
+
+        Call this before sending from other threads. Enabling it again does nothing.
+
+        Parameters
+        ------------
+        max_memory: Optional[:class:`int`]
+            The number of bytes of frames held in memory. Defaults to 64 MiB.
+        directory: Optional[:class:`str`]
+            The directory of the segment files. Defaults to a temporary directory.
+        segment_size: Optional[:class:`int`]
+            The size of each segment file. Defaults to 64 MiB.
+
+        Returns
+        --------
+        :class:`SpillQueue`
+            The queue of the link, whose properties show how much is queued and where.
+        """
+        if self._spill is not None:
+            return self._spill
+        from .spill import SpillQueue, DEFAULT_MAX_MEMORY, DEFAULT_SEGMENT_SIZE
+
+        # Frames already handed to the writer thread must reach the socket before spilled ones
+        self.flush()
+        self._spill = SpillQueue(max_memory=DEFAULT_MAX_MEMORY if max_memory is None else max_memory,
+                                 directory=directory,
+                                 segment_size=DEFAULT_SEGMENT_SIZE if segment_size is None else segment_size)
+        self._spill_thread = threading.Thread(target=self._spill_loop, name='IPyCLinkSpiller', daemon=True)
+        self._spill_thread.start()
+        return self._spill
+
+    def flush(self):
+        """Block until every frame sent so far has been written to the socket. This is a no-op
+        unless the link is ``thread_safe`` or spilling is enabled.
+
+        Returns
+        --------
+        :class:`bool`
+            ``False`` if the writer thread failed to write to the socket, ``True`` otherwise.
+        """
+        if self._spill is not None:
+            return self._spill.wait_acked() and self.is_active()
+        if self._writer_queue is None or not self._writer_thread:
+            return self.is_active()
+        return bool(self._wait(self._enqueue(lambda sock: True, wait=True)))
+
+    def send(self, serializable_object: object, encoding='utf-8', wait_for_flush=False):
         """Send a serializable object to the receiving end. If the object is not a custom
         serializable object, python's builtins will be used. If the object is a custom
         serializable, the receiving end must also have this object in their list of custom
@@ -55,7 +459,8 @@ class IPyCLink:
         .. warning::
             After the result of serialization, either via custom or builtin, the bytes ``0x01`` and ``0x02``
             must not appear anywhere. If your payload does contain these bytes or chars, you must
-            substitute them prior to this function call.
+            substitute them prior to this function call. Objects with a registered buffer serialization,
+            such as :class:`bytes` or :class:`array.array`, are sent as raw bytes and are not subject to this rule.
 
         Parameters
         ------------
@@ -66,22 +471,54 @@ class IPyCLink:
             in non UTF-8 encoding characters, a different encoding scheme must be used. The
             receiving end must also use this same encoding to decode properly.
             Defaults to ``utf-8``.
+        wait_for_flush: Optional[:class:`bool`]
+            When the link is ``thread_safe``, whether to block until the writer thread has written
+            this object to the socket, rather than returning as soon as it is queued.
+            Defaults to ``False``.
 
         """
         if not self.is_active():
-            self._logger.debug(f"Attempted to send data when the link is closed! Ignoring.")
+            self._ignore_send('data')
             return
 
-        if type(serializable_object).__name__ not in serialization.IPYC_CUSTOM_SERIALIZATIONS:
-            self._logger.debug(f"Serializing {type(serializable_object).__name__} as a default python type")
-            serialized_string = str(serializable_object)
+        if self._intern_lock is None:
+            request = self._send(serializable_object, encoding, wait_for_flush)
         else:
-            self._logger.debug(f"Serializing {type(serializable_object).__name__} using a custom defined serialization")
-            serialized_string = serialization.IPYC_CUSTOM_SERIALIZATIONS[type(serializable_object).__name__](serializable_object)
-
-        packet = CommunicationPacket(type(serializable_object).__name__, serialized_string)
-        self._logger.debug(f"Sending {len(packet.object_serialization)} bytes of '{packet.class_name}'")
-        self._connection.send(packet.construct(encoding=encoding))
+            # Interning tables must see frames in the exact order they are written
+            with self._intern_lock:
+                request = self._send(serializable_object, encoding, wait_for_flush)
+        self._wait(request)
+
+    def _send(self, serializable_object: object, encoding: str, wait_for_flush: bool):
+        frame, buffer = self._protocol.encode(serializable_object, encoding=encoding)
+        if self._logger.isEnabledFor(logging.DEBUG):
+            size = len(frame) if buffer is None else buffer.nbytes
+            self._logger.debug(f"Sending {size} bytes of '{type(serializable_object).__name__}'")
+        return self._send_frame(frame, buffer, wait_for_flush=wait_for_flush)
+
+    def _receive_packet(self, encoding: str, return_on_error: bool):
+        self._logger.debug(f"Waiting for communication from the other side")
+        try:
+            while True:
+                data = self._reader.readline()
+                packet = self._protocol.parse(data, encoding=encoding)
+                if packet:
+                    break
+                size = payload_size(data)
+                if size:
+                    # Keep the stream in sync by reading past the payload of the discarded frame
+                    self._reader.skip(size)
+                if return_on_error:
+                    self._logger.debug(f"Packet received was not a valid communication packet, return_on_error was set to true. Returning.")
+                    return None
+                self._logger.debug(f"Packet received was not a valid communication packet... waiting for another")
+        except (EOFError, OSError):
+            self._logger.debug(f"The downstream connection was aborted")
+            self.close()
+            return None
+        if self._capture is not None:
+            self._received_frame = data
+        return packet
 
     def receive(self, encoding='utf-8', return_on_error=False):
         """Receive a serializable object from the other end. If the object is not a custom
@@ -107,44 +544,167 @@ class IPyCLink:
             and ``return_on_error`` was set to ``True``, or EOF was encountered resulting in a closed
             connection, ``None`` is returned.
         """
+        while True:
+            received = self._receive_object(encoding, return_on_error)
+            if type(received) is not SequencedMessage:
+                return received
+            # Copies of messages already received are acknowledged but not delivered again
+            fresh = reliability.RECEIVER.accept(received)
+            self._acknowledge(received.session, force=not self._reader.buffered)
+            if fresh:
+                return reliability._unwrap(received, encoding)
+
+    def _receive_object(self, encoding: str, return_on_error: bool):
         if not self.is_active():
             self._logger.debug(f"Attempted to read data when link is closed! Returning nothing.")
             return None
 
-        self._logger.debug(f"Waiting for communication from the other side")
-        try:
-            data = self._connection.recv()
-        except (EOFError, ConnectionAbortedError):
-            self._logger.debug(f"The downstream connection was aborted")
-            self.close()
+        packet = self._receive_packet(encoding=encoding, return_on_error=return_on_error)
+        if not packet:
             return None
-        packet = CommunicationPacket.extract(data, encoding=encoding)
-        while not packet and not return_on_error:
-            self._logger.debug(f"Packet received was not a valid communication packet... waiting for another")
-            if self._connection.closed:
-                self._logger.debug(f"The downstream connection was closed")
-                self.close()
-                return None
+
+        if isinstance(packet, BufferPacket):
+            buffer = bytearray(packet.size)
             try:
-                data = self._connection.recv()
-            except (EOFError, ConnectionAbortedError):
+                self._reader.read_exactly_into(memoryview(buffer))
+            except (EOFError, OSError):
                 self._logger.debug(f"The downstream connection was aborted")
                 self.close()
                 return None
-            packet = CommunicationPacket.extract(data, encoding=encoding)
-        if self._connection.closed:
-            self._logger.debug(f"The downstream connection as closed")
-            self.close()
+            self._record_received(buffer)
+            return self._protocol.decode(packet, buffer)
+        self._record_received()
+        return self._protocol.decode(packet)
+
+    def _acknowledge(self, session: str, force: bool):
+        # Acknowledges a reliable sender once per burst of messages read together, or every few messages
+        acknowledgement = reliability.RECEIVER.acknowledgement(session, force=force)
+        if acknowledgement is None:
+            return
+        try:
+            self.send(acknowledgement)
+        except OSError:
+            # The sender sends the messages again once it has reconnected
+            self._logger.debug(f"Could not acknowledge the messages received", exc_info=True)
+
+    def send_file(self, file, offset=0, count=None, encoding='utf-8'):
+        """Send the contents of a file to the receiving end. After a small header frame, the file
+        is copied to the socket by the kernel via :func:`os.sendfile` where available, so its
+        contents never pass through Python. On platforms without it, the file is sent in chunks.
+        On a ``thread_safe`` link, the transfer runs on the writer thread and this call waits for it.
+
+        Parameters
+        ------------
+        file: Union[:class:`str`, :class:`os.PathLike`, :class:`int`, :term:`file object`]
+            A path, an open file descriptor, or a file object opened in binary mode.
+        offset: Optional[:class:`int`]
+            The position in the file to start sending from.
+            Defaults to ``0``.
+        count: Optional[:class:`int`]
+            The number of bytes to send. If ``None``, the file is sent until EOF.
+            Defaults to ``None``.
+        encoding: Optional[:class:`str`]
+            The encoding schema of the header frame.
+            Defaults to ``utf-8``.
+
+        Returns
+        --------
+        :class:`int`
+            The number of bytes of the file that were sent.
+        """
+        if not self.is_active():
+            self._ignore_send('a file')
+            return 0
+
+        if self._spill is not None:
+            # The file is copied straight to the socket, so everything queued before it goes first
+            self.flush()
+
+        file_object, owned = _open_file(file, 'rb')
+        try:
+            count = _file_count(file_object, offset, count)
+            self._logger.debug(f"Sending {count} bytes of file {file_object.name!r}")
+
+            def transfer(sock: socket.socket):
+                sock.sendall(frame)
+                return sock.sendfile(file_object, offset=offset, count=count) if count else 0
+
+            if self._intern_lock:
+                self._intern_lock.acquire()
+            try:
+                frame = self._protocol.frame(FILE_CLASS_NAME, _file_header(file_object), count, encoding=encoding)
+                if self._capture is not None:
+                    self._capture.record(SENT | OMITTED, frame)
+                if self._writer_queue is None:
+                    request, sent = None, transfer(self._socket)
+                else:
+                    request = self._enqueue(transfer, wait=True)
+            finally:
+                if self._intern_lock:
+                    self._intern_lock.release()
+            if request is not None:
+                sent = self._wait(request) or 0
+        finally:
+            if owned:
+                file_object.close()
+        return sent
+
+    def receive_file(self, destination, encoding='utf-8', return_on_error=False):
+        """Receive a file, or any other raw payload, sent with :meth:`send_file` and write it straight
+        into ``destination`` in chunks, without building the contents in memory.
+
+        .. note::
+            Calling :meth:`receive` on a file transfer reads the entire file into memory and returns
+            a :class:`memoryview` over it.
+
+        Parameters
+        ------------
+        destination: Union[:class:`str`, :class:`os.PathLike`, :class:`int`, :term:`file object`]
+            A path, a file descriptor opened for writing, or a file object opened in binary mode.
+            Paths are created or truncated.
+        encoding: Optional[:class:`str`]
+            The encoding schema of the header frame.
+            Defaults to ``utf-8``.
+        return_on_error: Optional[:class:`bool`]
+            Whether to continue to listen or return if an invalid frame was received.
+            Defaults to ``False``.
+
+        Returns
+        --------
+        Optional[:class:`int`]
+            The number of bytes written. If the next frame is not a raw payload, it is discarded and
+            ``None`` is returned. ``None`` is also returned if EOF was encountered.
+        """
+        if not self.is_active():
+            self._logger.debug(f"Attempted to read a file when link is closed! Returning nothing.")
             return None
+
+        packet = self._receive_packet(encoding=encoding, return_on_error=return_on_error)
         if not packet:
-            self._logger.debug(f"Packet received was not a valid communication packet, return_on_error was set to true. Returning.")
+            return None
+        self._record_received(flags=OMITTED)
+        if not isinstance(packet, BufferPacket):
+            self._logger.warning(f"Expected a file transfer but received '{packet.class_name}', discarding it.")
             return None
 
-        self._logger.debug(f"Received {len(packet.object_serialization)} bytes of '{packet.class_name}'")
-        if packet.class_name not in serialization.IPYC_CUSTOM_DESERIALIZATIONS:
-            return eval(packet.class_name)(packet.object_serialization)
-        else:
-            return serialization.IPYC_CUSTOM_DESERIALIZATIONS[packet.class_name](packet.object_serialization)
+        file_object, owned = _open_file(destination, 'wb')
+        try:
+            file_object.flush()
+            remaining = packet.size
+            chunk = memoryview(bytearray(min(remaining, FILE_CHUNK_SIZE)))
+            while remaining:
+                received = self._reader.read_into(chunk[:min(remaining, len(chunk))])
+                _write_all(file_object.fileno(), chunk[:received])
+                remaining -= received
+        except (EOFError, OSError):
+            self._logger.debug(f"The downstream connection was aborted")
+            self.close()
+            return None
+        finally:
+            if owned:
+                file_object.close()
+        self._logger.debug(f"Received {packet.size} raw bytes of '{packet.class_name}' into a file")
+        return packet.size
 
     def poll(self, timeout=0.0):
         """Return whether there is any data available to be read from the downstream connection.
@@ -161,168 +721,161 @@ class IPyCLink:
         :class:`bool`
             ``True`` if data is ready to be received, ``False`` otherwise.
         """
-        return self._connection.poll(timeout=timeout)
+        if self._closed:
+            return False
+        return bool(_wait_readable([self], timeout))
 
 
-class AsyncIPyCLink:
-    """Represents an abstracted async socket connection that handles
-    communication between a :class:`AsyncIPyCHost` and a :class:`AsyncIPyCClient`
-    This class is internally managed and typically should not be instantiated on
-    its own.
+class IPyCSelectorLink(IPyCLink):
+    """Represents a connection of an :class:`IPyCSelectorHost`. The socket is non-blocking and
+    is driven by the host's :meth:`~IPyCSelectorHost.serve_forever` loop: received objects are
+    delivered to the host's :meth:`~IPyCSelectorHost.on_message` handlers, so :meth:`receive`,
+    :meth:`receive_file`, and :meth:`poll` are not available.
+
+    :meth:`send` never blocks. Frames that the socket cannot take right away are queued on the
+    link and written by the host's loop as the peer reads them. It may be called from any thread.
+    This class is internally managed and typically should not be instantiated on its own.
 
     Parameters
     -----------
-    reader: :class:`asyncio.StreamReader`
-        The managed inbound data reader.
-    writer: :class:`asyncio.StreamWriter`
-        The managed outbound data writer
-    client: Union[:class:`AsyncIPyCHost`, :class:`AsyncIPyCClient`]
-        The communication object that is responsible for managing this connection.
+    sock: :class:`socket.socket`
+        The accepted, non-blocking socket.
+    host: :class:`IPyCSelectorHost`
+        The host that is responsible for managing this connection.
+    interning: Optional[:class:`bool`]
+        See :class:`IPyCLink`.
+    intern_table_size: Optional[:class:`int`]
+        See :class:`IPyCLink`.
     """
-    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, client):
-        self._reader = reader
-        self._writer = writer
-        self._logger = logging.getLogger(self.__class__.__name__)
-        self._logger.debug(f"Established link")
-        self._active = True
-        self._client = client
+    __slots__ = ('_outgoing', '_write_lock', '_detached')
+
+    _logger = logging.getLogger('IPyCSelectorLink')
 
-    async def close(self):
-        """|coro|
+    def __init__(self, sock: socket.socket, host, interning=False, intern_table_size=DEFAULT_TABLE_SIZE):
+        super().__init__(None, host, interning=interning, intern_table_size=intern_table_size)
+        self._socket = sock
+        self._outgoing = collections.deque()
+        self._write_lock = threading.Lock()
+        # Set while the connection is being, or has been, handed over to another host
+        self._detached = False
 
-        Closes all communication channels with a peer and attempts to send them EOF.
-        Informs the parent :class:`AsyncIPyCHost` or :class:`AsyncIPyCClient` of the
-        closed connection.
+    def close(self):
+        """Closes the socket and informs the parent :class:`IPyCSelectorHost` of the closed connection.
+        Frames still queued on the link are discarded. Closing an already closed link does nothing.
         """
-        self._logger.debug(f"Beginning to close link")
-        self._reader = None
-        if self._writer.can_write_eof():
-            self._writer.write_eof()
-            try:
-                await self._writer.drain()
-            except ConnectionAbortedError:
-                pass
-        self._writer.close()
-        if sys.version_info >= (3, 7):
-            await self._writer.wait_closed()
-        self._writer = None
-        self._active = False
-        self._client.connections.remove(self)
-        self._logger.debug(f"Closed link")
+        self._client._close_link(self)
+
+    def abort(self):
+        """Shuts the socket down in both directions. The host's loop then closes the link."""
+        if not self._active:
+            return
+        self._logger.debug(f"Aborting link")
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
 
     def is_active(self):
-        """:class:`bool`: Indicates if the communication channels are closed, at EOF, or no longer viable."""
-        # Quickly check if the state of the reader changed from the remote
-        if not self._reader or self._reader.at_eof() or not self._writer:
-            self._active = False
+        """:class:`bool`: Indicates if the socket connection is closed, at EOF, or no longer viable."""
         return self._active
 
-    async def send(self, serializable_object: object, drain_immediately=True, encoding='utf-8'):
-        """|coro|
-
-        Send a serializable object to the receiving end. If the object is not a custom
-        serializable object, python's builtins will be used. If the object is a custom
-        serializable, the receiving end must also have this object in their list of custom
-        deserializers.
-
-        .. warning::
-            After the result of serialization, either via custom or builtin, the bytes ``0x01`` and ``0x02``
-            must not appear anywhere. If your payload does contain these bytes or chars, you must
-            substitute them prior to this function call.
-
-        Parameters
-        ------------
-        serializable_object: :class:`object`
-            The object to be sent to the receiving end.
-        drain_immediately: Optional[:class:`bool`]
-            Whether to flush the output buffer right now or not.
-            Defaults to ``True``.
-        encoding: Optional[:class:`str`]
-            The encoding schema of the serialization. If your object serialization results
-            in non UTF-8 encoding characters, a different encoding scheme must be used. The
-            receiving end must also use this same encoding to decode properly.
-            Defaults to ``utf-8``.
-
-        """
-        if not self.is_active():
-            self._logger.debug(f"Attempted to send data when the writer or link is closed! Ignoring.")
+    def _ignore_send(self, what: str):
+        if self._detached:
+            # Unlike sends on a closed link, the caller could not have known, and the peer is still there
+            self._logger.warning(f"Attempted to send {what} on a connection being handed over to another host! "
+                                 f"It was not sent.")
             return
-
-        if type(serializable_object).__name__ not in serialization.IPYC_CUSTOM_SERIALIZATIONS:
-            self._logger.debug(f"Serializing {type(serializable_object).__name__} as a default python type")
-            serialized_string = str(serializable_object)
-        else:
-            self._logger.debug(f"Serializing {type(serializable_object).__name__} using a custom defined serialization")
-            serialized_string = serialization.IPYC_CUSTOM_SERIALIZATIONS[type(serializable_object).__name__](serializable_object)
-
-        packet = CommunicationPacket(type(serializable_object).__name__, serialized_string)
-        self._logger.debug(f"Sending {len(packet.object_serialization)} bytes of '{packet.class_name}'")
-        self._writer.write(packet.construct(encoding=encoding))
-        if drain_immediately:
-            self._logger.debug(f"Draining the writer")
-            await self._writer.drain()
-
-    async def receive(self, encoding='utf-8', return_on_error=False):
-        """|coro|
-
-        Receive a serializable object from the other end. If the object is not a custom
-        serializable object, python's builtins will be used, otherwise the custom defined
-        deserializer will be used.
-
-        Parameters
-        ------------
-        encoding: Optional[:class:`str`]
-            The encoding schema of the serialization. If your object serialization results
-            in non UTF-8 encoding characters, a different encoding scheme must be used. The
-            receiving end must also use this same encoding to decode properly.
-            Defaults to ``utf-8``.
-        return_on_error: Optional[:class:`bool`]
-            Whether to continue to listen or return if a deserialization error occurred. Otherwise,
-            wait until the next valid deserialization occurs.
-            Defaults to ``False``.
-
-        Returns
-        --------
-        Optional[:class:`object`]
-            The object that was sent from the sending end. If the deserialization was not successful
-            and ``return_on_error`` was set to ``True``, or EOF was encountered resulting in a closed
-            connection, ``None`` is returned.
+        super()._ignore_send(what)
+
+    def _send_frame(self, frame: bytes, buffer=None, wait_for_flush=False):
+        if self._capture is not None:
+            self._capture.record(SENT, frame, buffer)
+        chunks = [frame] if buffer is None else [frame, buffer]
+        with self._write_lock:
+            if self._detached:
+                # Detached after the send checked the link, the frame must not be left on the handed over socket
+                self._ignore_send('data')
+                return
+            idle = not self._outgoing
+            self._outgoing.extend(view for view in map(_byte_view, chunks) if view.nbytes)
+        if idle:
+            self._client._want_write(self)
+
+    def _write(self) -> bool:
+        # Writes as much as the socket takes, returns whether anything is left queued
+        with self._write_lock:
+            while self._outgoing:
+                try:
+                    sent = self._socket.sendmsg(list(itertools.islice(self._outgoing, 0, 1024)))
+                except (BlockingIOError, InterruptedError):
+                    break
+                while sent:
+                    if sent >= self._outgoing[0].nbytes:
+                        sent -= self._outgoing.popleft().nbytes
+                    else:
+                        self._outgoing[0] = self._outgoing[0][sent:]
+                        sent = 0
+            return bool(self._outgoing)
+
+    def send_file(self, file, offset=0, count=None, encoding='utf-8'):
+        """Send the contents of a file to the receiving end, see :meth:`IPyCLink.send_file`.
+
+        .. note::
+            As the socket is non-blocking, the file is read into memory and queued like any other frame.
         """
         if not self.is_active():
-            self._logger.debug(f"Attempted to read data when the writer or link is closed! Returning nothing.")
-            return None
+            self._ignore_send('a file')
+            return 0
 
-        self._logger.debug(f"Waiting for communication from the other side")
+        file_object, owned = _open_file(file, 'rb')
         try:
-            data = await self._reader.readline()
-        except ConnectionAbortedError:
-            self._logger.debug(f"The downstream connection was aborted")
-            await self.close()
-            return None
-        packet = CommunicationPacket.extract(data, encoding=encoding)
-        while not packet and not return_on_error:
-            self._logger.debug(f"Packet received was not a valid communication packet... waiting for another")
-            if self._reader.at_eof():
-                self._logger.debug(f"The downstream writer closed the connection")
-                await self.close()
-                return None
-            try:
-                data = await self._reader.readline()
-            except ConnectionAbortedError:
-                self._logger.debug(f"The downstream connection was aborted")
-                await self.close()
-                return None
-            packet = CommunicationPacket.extract(data, encoding=encoding)
-        if self._reader.at_eof():
-            self._logger.debug(f"The downstream writer closed the connection")
-            await self.close()
-            return None
-        if not packet:
-            self._logger.debug(f"Packet received was not a valid communication packet, return_on_error was set to true. Returning.")
-            return None
-
-        self._logger.debug(f"Received {len(packet.object_serialization)} bytes of '{packet.class_name}'")
-        if packet.class_name not in serialization.IPYC_CUSTOM_DESERIALIZATIONS:
-            return eval(packet.class_name)(packet.object_serialization)
-        else:
-            return serialization.IPYC_CUSTOM_DESERIALIZATIONS[packet.class_name](packet.object_serialization)
+            count = _file_count(file_object, offset, count)
+            file_object.seek(offset)
+            contents = memoryview(file_object.read(count))
+            header = _file_header(file_object)
+        finally:
+            if owned:
+                file_object.close()
+        self._logger.debug(f"Sending {count} bytes of file {header}")
+        if self._intern_lock:
+            self._intern_lock.acquire()
+        try:
+            self._send_frame(self._protocol.frame(FILE_CLASS_NAME, header, contents.nbytes, encoding=encoding), contents)
+        finally:
+            if self._intern_lock:
+                self._intern_lock.release()
+        return contents.nbytes
+
+    def _not_available(self, *args, **kwargs):
+        raise RuntimeError('Objects received by an IPyCSelectorHost are delivered to its on_message handlers')
+
+    receive = receive_file = poll = _not_available
+
+    def enable_spilling(self, *args, **kwargs):
+        raise RuntimeError('Frames sent on an IPyCSelectorLink are queued and written by its IPyCSelectorHost')
+
+    def _consume(self, data: memoryview, encoding: str) -> list:
+        # Decodes the frames the data completes, the protocol keeps only the bytes of an incomplete frame
+        received, sessions = [], set()
+        for received_object, frame, payload in self._protocol.receive_data(data, encoding=encoding):
+            if self._capture is not None:
+                self._received_frame = frame
+            self._record_received(payload)
+            if type(received_object) is SequencedMessage:
+                sessions.add(received_object.session)
+                if not reliability.RECEIVER.accept(received_object):
+                    continue
+                received_object = reliability._unwrap(received_object, encoding)
+            received.append(received_object)
+        # Everything read at once is acknowledged at once
+        for session in sessions:
+            self._acknowledge(session, force=True)
+        return received
+
+
+def __getattr__(name):
+    # The asynchronous links moved to their own module so that importing this one does not import asyncio
+    if name in ('AsyncIPyCLink', 'AsyncIPyCProtocolLink'):
+        from . import asynclinks
+        return getattr(asynclinks, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,8 +1,16 @@
 class CommunicationPacket:
+    __slots__ = ('__name', '__object_serialization')
+
     def __init__(self, class_name: str, object_serialization: str):
         self.__name = class_name
         self.__object_serialization = object_serialization
 
+    def _reuse(self, class_name: str, object_serialization: str):
+        # Lets a sender frame message after message with the same packet instead of allocating one each time
+        self.__name = class_name
+        self.__object_serialization = object_serialization
+        return self
+
     @property
     def class_name(self):
         return self.__name
@@ -25,3 +33,135 @@ class CommunicationPacket:
             return CommunicationPacket(name, serialization.replace('\x1a', '\n'))
         except (MemoryError, RuntimeError, ValueError, UnicodeError, UnicodeDecodeError):
             return None
+
+
+class BufferPacket:
+    __slots__ = ('__name', '__header', '__size')
+
+    def __init__(self, class_name: str, header: str, size: int):
+        self.__name = class_name
+        self.__header = header
+        self.__size = size
+
+    @property
+    def class_name(self):
+        return self.__name
+
+    @property
+    def header(self):
+        return self.__header
+
+    @property
+    def size(self):
+        return self.__size
+
+    def construct(self, encoding: str) -> bytes:
+        return "\x03{}\x02{}\x02{}\n".format(self.__name, self.__header.replace('\n', '\x1a'), self.__size).encode(encoding)
+
+    @staticmethod
+    def extract(packet: bytes, encoding: str):
+        try:
+            packet = packet.decode(encoding)
+            if not packet.startswith('\x03') or not packet.endswith('\n'):
+                raise ValueError
+            name, header, size = packet[1:-1].split('\x02')
+            size = int(size)
+            if size < 0:
+                raise ValueError
+            return BufferPacket(name, header.replace('\x1a', '\n'), size)
+        except (MemoryError, RuntimeError, ValueError, UnicodeError, UnicodeDecodeError):
+            return None
+
+
+def extract_packet(packet: bytes, encoding: str):
+    if packet.startswith(b'\x03'):
+        return BufferPacket.extract(packet, encoding=encoding)
+    return CommunicationPacket.extract(packet, encoding=encoding)
+
+
+class ChannelChunk:
+    __slots__ = ('__channel', '__final', '__data')
+
+    def __init__(self, channel: int, final: bool, data):
+        self.__channel = channel
+        self.__final = final
+        self.__data = data
+
+    @property
+    def channel(self):
+        return self.__channel
+
+    @property
+    def final(self):
+        return self.__final
+
+    @property
+    def data(self):
+        return self.__data
+
+    def serialize(self):
+        return "{} {}".format(self.__channel, int(self.__final)), self.__data
+
+    @classmethod
+    def deserialize(cls, header: str, buffer: memoryview):
+        channel, final = header.split(' ')
+        return cls(int(channel), final == '1', buffer)
+
+
+class SequencedMessage:
+    __slots__ = ('__session', '__sequence', '__line', '__data')
+
+    def __init__(self, session: str, sequence: int, line: int, data):
+        self.__session = session
+        self.__sequence = sequence
+        self.__line = line
+        self.__data = data
+
+    @property
+    def session(self):
+        return self.__session
+
+    @property
+    def sequence(self):
+        return self.__sequence
+
+    @property
+    def line(self):
+        # The length of the frame line of the message, which its raw payload follows
+        return self.__line
+
+    @property
+    def data(self):
+        return self.__data
+
+    def serialize(self):
+        return "{} {} {}".format(self.__session, self.__sequence, self.__line), self.__data
+
+    @classmethod
+    def deserialize(cls, header: str, buffer: memoryview):
+        session, sequence, line = header.split(' ')
+        return cls(session, int(sequence), int(line), buffer)
+
+
+class Acknowledgement:
+    __slots__ = ('__session', '__sequence')
+
+    def __init__(self, session: str, sequence: int):
+        self.__session = session
+        self.__sequence = sequence
+
+    @property
+    def session(self):
+        return self.__session
+
+    @property
+    def sequence(self):
+        return self.__sequence
+
+    def serialize(self):
+        return "{} {}".format(self.__session, self.__sequence)
+
+    @classmethod
+    def deserialize(cls, serialization: str):
+        session, sequence = serialization.split(' ')
+        return cls(session, int(sequence))
@@ -0,0 +1,321 @@
+import collections
+import threading
+import time
+
+from . import packets
+from . import serialization
+
+DEFAULT_SAMPLES = 4096
+
+# Registry attribute of the serialization module and the operation its functions perform
+_REGISTRIES = (
+    ('IPYC_CUSTOM_SERIALIZATIONS', 'serialize'),
+    ('IPYC_CUSTOM_DESERIALIZATIONS', 'deserialize'),
+    ('IPYC_CUSTOM_BUFFER_SERIALIZATIONS', 'serialize'),
+    ('IPYC_CUSTOM_BUFFER_DESERIALIZATIONS', 'deserialize'),
+)
+
+# Packet class, method name, and whether it is a staticmethod parsing frames rather than building them
+_FRAMING = (
+    (packets.CommunicationPacket, 'construct', False),
+    (packets.BufferPacket, 'construct', False),
+    (packets.CommunicationPacket, 'extract', True),
+    (packets.BufferPacket, 'extract', True),
+)
+
+_PROFILES = {}
+_PROFILES_LOCK = threading.Lock()
+_samples = DEFAULT_SAMPLES
+_enabled = False
+
+
+def _size(value):
+    # Sizes are only counted for what is cheap to measure: text, bytes-like objects, and buffer serializations
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    if isinstance(value, memoryview):
+        return value.nbytes
+    if isinstance(value, tuple) and len(value) == 2 and isinstance(value[0], str):
+        buffer = _size(value[1])
+        return None if buffer is None else len(value[0]) + buffer
+    return None
+
+
+class TypeProfile:
+    """The profiling statistics of one operation on one type name, collected while
+    profiling is enabled with :func:`enable_profiling`.
+
+    Operations are ``serialize`` and ``deserialize`` for the registered serialization functions,
+    and ``frame`` and ``unframe`` for building and parsing the wire frames of the type. Type names
+    are the names on the wire, so interned names show up as their short references.
+
+    Times are in seconds. Percentiles are computed over the most recent calls only, as set by
+    ``samples`` in :func:`enable_profiling`. Sizes are in bytes, and only count text, bytes-like
+    objects, and buffer serializations.
+    """
+    def __init__(self, name: str, operation: str, samples: int):
+        self._name = name
+        self._operation = operation
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._total_time = 0.0
+        self._max_time = 0.0
+        self._bytes_in = 0
+        self._bytes_out = 0
+        self._samples = collections.deque(maxlen=samples)
+
+    def __repr__(self):
+        return f'<TypeProfile name={self._name!r} operation={self._operation!r} calls={self._calls} ' \
+               f'total_time={self._total_time:.6f}>'
+
+    @property
+    def name(self):
+        """:class:`str`: The type name."""
+        return self._name
+
+    @property
+    def operation(self):
+        """:class:`str`: The operation, ``serialize``, ``deserialize``, ``frame``, or ``unframe``."""
+        return self._operation
+
+    @property
+    def calls(self):
+        """:class:`int`: The number of calls."""
+        return self._calls
+
+    @property
+    def total_time(self):
+        """:class:`float`: The time spent in all calls."""
+        return self._total_time
+
+    @property
+    def mean_time(self):
+        """:class:`float`: The average time of a call."""
+        return self._total_time / self._calls if self._calls else 0.0
+
+    @property
+    def max_time(self):
+        """:class:`float`: The time of the slowest call."""
+        return self._max_time
+
+    @property
+    def bytes_in(self):
+        """:class:`int`: The total size of the inputs that could be measured."""
+        return self._bytes_in
+
+    @property
+    def bytes_out(self):
+        """:class:`int`: The total size of the outputs that could be measured."""
+        return self._bytes_out
+
+    def percentile(self, fraction: float) -> float:
+        """Return the time below which the given fraction of the recent calls completed.
+
+        Parameters
+        ------------
+        fraction: :class:`float`
+            The fraction between ``0`` and ``1``, ``0.99`` for the 99th percentile.
+        """
+        with self._lock:
+            ordered = sorted(self._samples)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def record(self, elapsed: float, size_in=None, size_out=None):
+        """Add a call to the statistics. Called by the profiled functions themselves."""
+        with self._lock:
+            self._calls += 1
+            self._total_time += elapsed
+            if elapsed > self._max_time:
+                self._max_time = elapsed
+            self._samples.append(elapsed)
+            if size_in is not None:
+                self._bytes_in += size_in
+            if size_out is not None:
+                self._bytes_out += size_out
+
+    def as_dict(self) -> dict:
+        """Return the statistics as a dictionary, with the 50th, 90th, and 99th percentiles."""
+        return {
+            'name': self._name,
+            'operation': self._operation,
+            'calls': self._calls,
+            'total_time': self._total_time,
+            'mean_time': self.mean_time,
+            'p50_time': self.percentile(0.5),
+            'p90_time': self.percentile(0.9),
+            'p99_time': self.percentile(0.99),
+            'max_time': self._max_time,
+            'bytes_in': self._bytes_in,
+            'bytes_out': self._bytes_out,
+        }
+
+
+def _profile(name: str, operation: str) -> TypeProfile:
+    key = (name, operation)
+    profile = _PROFILES.get(key)
+    if profile is None:
+        with _PROFILES_LOCK:
+            profile = _PROFILES.setdefault(key, TypeProfile(name, operation, _samples))
+    return profile
+
+
+def _profiled(name: str, operation: str, function):
+    if getattr(function, '_ipyc_profiled', False):
+        return function
+    clock = time.perf_counter
+
+    def profiled(*args):
+        start = clock()
+        result = function(*args)
+        _profile(name, operation).record(clock() - start, _size(args[-1]), _size(result))
+        return result
+
+    profiled.__wrapped__ = function
+    profiled._ipyc_profiled = True
+    return profiled
+
+
+def _profiled_frame(function):
+    clock = time.perf_counter
+
+    def construct(packet, encoding: str) -> bytes:
+        start = clock()
+        frame = function(packet, encoding)
+        _profile(packet.class_name, 'frame').record(clock() - start, None, len(frame))
+        return frame
+
+    construct.__wrapped__ = function
+    return construct
+
+
+def _profiled_unframe(function):
+    clock = time.perf_counter
+
+    def extract(packet: bytes, encoding: str):
+        start = clock()
+        result = function(packet, encoding)
+        elapsed = clock() - start
+        _profile(result.class_name if result else '<invalid>', 'unframe').record(elapsed, len(packet), None)
+        return result
+
+    extract.__wrapped__ = function
+    return staticmethod(extract)
+
+
+def enable_profiling(samples=DEFAULT_SAMPLES):
+    """Start profiling every registered serialization and deserialization function, and the
+    framing of every message, by type name. Functions registered while profiling is enabled are
+    profiled as well. Statistics collected earlier are kept; see :func:`reset_profiles`.
+
+    When profiling is disabled, the registered functions are called directly and cost nothing extra.
+
+    Parameters
+    ------------
+    samples: Optional[:class:`int`]
+        The number of recent calls per type and operation kept to compute percentiles.
+        Defaults to ``4096``.
+    """
+    global _enabled, _samples
+    if _enabled:
+        return
+    _enabled, _samples = True, samples
+    for attribute, operation in _REGISTRIES:
+        registry = getattr(serialization, attribute)
+        for name, function in list(registry.items()):
+            registry[name] = _profiled(name, operation, function)
+    for packet_class, method, static in _FRAMING:
+        function = packet_class.__dict__[method]
+        if static:
+            setattr(packet_class, method, _profiled_unframe(function.__func__))
+        else:
+            setattr(packet_class, method, _profiled_frame(function))
+    serialization._profile_wrapper = _profiled
+
+
+def disable_profiling():
+    """Stop profiling and restore the registered functions. The statistics collected so far
+    remain available."""
+    global _enabled
+    if not _enabled:
+        return
+    _enabled = False
+    serialization._profile_wrapper = None
+    for attribute, _ in _REGISTRIES:
+        registry = getattr(serialization, attribute)
+        for name, function in list(registry.items()):
+            if getattr(function, '_ipyc_profiled', False):
+                registry[name] = function.__wrapped__
+    for packet_class, method, static in _FRAMING:
+        function = packet_class.__dict__[method]
+        function = function.__func__ if static else function
+        setattr(packet_class, method, staticmethod(function.__wrapped__) if static else function.__wrapped__)
+
+
+def is_profiling() -> bool:
+    """:class:`bool`: Whether profiling is enabled."""
+    return _enabled
+
+
+def reset_profiles():
+    """Discard the statistics collected so far."""
+    with _PROFILES_LOCK:
+        _PROFILES.clear()
+
+
+def get_profile(name: str, operation: str):
+    """Return the statistics of an operation on a type name, or ``None`` if it has not been profiled.
+
+    Parameters
+    ------------
+    name: :class:`str`
+        The type name, such as ``'dict'``.
+    operation: :class:`str`
+        ``serialize``, ``deserialize``, ``frame``, or ``unframe``.
+
+    Returns
+    --------
+    Optional[:class:`TypeProfile`]
+        The statistics.
+    """
+    return _PROFILES.get((name, operation))
+
+
+def get_profiles() -> list:
+    """Return the statistics of every profiled type and operation, the most expensive first.
+
+    Returns
+    --------
+    List[:class:`TypeProfile`]
+        The statistics, ordered by total time.
+    """
+    with _PROFILES_LOCK:
+        profiles = list(_PROFILES.values())
+    return sorted(profiles, key=lambda profile: profile.total_time, reverse=True)
+
+
+def profile_report(limit=None) -> str:
+    """Return a table of the statistics of every profiled type and operation, the most expensive
+    first, with times in microseconds.
+
+    Parameters
+    ------------
+    limit: Optional[:class:`int`]
+        The number of rows to include at most. Defaults to ``None``, including every row.
+
+    Returns
+    --------
+    :class:`str`
+        The report.
+    """
+    header = f"{'type':<24} {'operation':<11} {'calls':>9} {'total ms':>10} {'mean us':>9} {'p50 us':>9} " \
+             f"{'p99 us':>9} {'max us':>9} {'bytes in':>12} {'bytes out':>12}"
+    lines = [header, '-' * len(header)]
+    for profile in get_profiles()[:limit]:
+        lines.append(
+            f'{profile.name[:24]:<24} {profile.operation:<11} {profile.calls:>9} {profile.total_time * 1e3:>10.3f} '
+            f'{profile.mean_time * 1e6:>9.1f} {profile.percentile(0.5) * 1e6:>9.1f} {profile.percentile(0.99) * 1e6:>9.1f} '
+            f'{profile.max_time * 1e6:>9.1f} {profile.bytes_in:>12} {profile.bytes_out:>12}'
+        )
+    return '\n'.join(lines)
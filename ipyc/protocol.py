@@ -0,0 +1,312 @@
+import json
+import logging
+
+from .framing import FrameSplitter
+from .interning import InternTable, DEFAULT_TABLE_SIZE
+from .packets import CommunicationPacket, BufferPacket, extract_packet
+from . import arrays
+from . import interning
+from . import serialization
+
+
+def _byte_view(buffer) -> memoryview:
+    view = memoryview(buffer)
+    if view.format != 'B' or view.ndim != 1:
+        view = view.cast('B')
+    return view
+
+
+_EVALUATED_NAMES = {}
+
+# Packets recycled to frame text messages, shared by every protocol. Taking and returning one is a single
+# list.pop or list.append, which are atomic, so threads framing at once each get their own without a lock.
+_FREE_PACKETS = []
+
+
+def _deserialize_text(packet: CommunicationPacket):
+    if packet.class_name not in serialization.IPYC_CUSTOM_DESERIALIZATIONS:
+        # Compiling the name on every message costs more than the rest of the receive path
+        constructor = _EVALUATED_NAMES.get(packet.class_name)
+        if constructor is None:
+            constructor = _EVALUATED_NAMES[packet.class_name] = eval(packet.class_name)
+        return constructor(packet.object_serialization)
+    else:
+        return serialization.IPYC_CUSTOM_DESERIALIZATIONS[packet.class_name](packet.object_serialization)
+
+
+def _text_frame(class_name: str, serialization_string: str, encoding: str) -> bytes:
+    try:
+        packet = _FREE_PACKETS.pop()
+    except IndexError:
+        packet = CommunicationPacket(None, None)
+    frame = packet._reuse(class_name, serialization_string).construct(encoding=encoding)
+    # Do not keep the serialization alive while the packet waits to be reused
+    _FREE_PACKETS.append(packet._reuse(None, None))
+    return frame
+
+
+def _renamed(packet, class_name: str):
+    if isinstance(packet, BufferPacket):
+        return BufferPacket(class_name, packet.header, packet.size)
+    return CommunicationPacket(class_name, packet.object_serialization)
+
+
+def _interns_dicts() -> bool:
+    # Dictionary payloads are only interned while the builtin json codec is in charge of them,
+    # looking through the wrappers ipyc.profiling puts around registered functions
+    serializer = serialization.IPYC_CUSTOM_SERIALIZATIONS.get(dict.__name__)
+    deserializer = serialization.IPYC_CUSTOM_DESERIALIZATIONS.get(dict.__name__)
+    return getattr(serializer, '__wrapped__', serializer) is json.dumps and \
+        getattr(deserializer, '__wrapped__', deserializer) is json.loads
+
+
+class IPyCProtocol:
+    """The transport-independent core of every link: it turns objects into the bytes of their frames,
+    and bytes received into objects, following :mod:`ipyc.framing`. It performs no I/O of its own,
+    so the same logic serves the blocking and asynchronous links alike, and it can be benchmarked
+    or fuzzed on its own.
+
+    A link owns one protocol per connection, as the interning tables it keeps follow the frames of
+    that connection in order. It is not safe to use from multiple threads at once.
+
+    Example
+    ---------
+    .. code-block:: python3
+
+        sender, receiver = IPyCProtocol(), IPyCProtocol()
+        frame, buffer = sender.encode({'a': 1})
+        for message, _, _ in receiver.receive_data(frame):
+            print(message)
+
+    Parameters
+    -----------
+    interning: Optional[:class:`bool`]
+        Whether to intern type names, dictionary key sets, and short strings, as described in :class:`IPyCLink`.
+        Defaults to ``False``.
+    intern_table_size: Optional[:class:`int`]
+        The number of entries each interning table holds before it is cleared.
+        Defaults to ``4096``.
+    """
+    __slots__ = ('_outbound', '_inbound', '_splitter')
+
+    _logger = logging.getLogger('IPyCProtocol')
+
+    def __init__(self, interning=False, intern_table_size=DEFAULT_TABLE_SIZE):
+        self._outbound = InternTable(intern_table_size) if interning else None
+        self._inbound = InternTable(intern_table_size) if interning else None
+        self._splitter = None
+
+    @property
+    def interning(self):
+        """:class:`bool`: Whether interning is enabled."""
+        return self._outbound is not None
+
+    def interns(self, class_name: str) -> bool:
+        """Return whether objects of a type are serialized and deserialized through the interning tables.
+        Those must be encoded in the order their frames are written, and decoded in the order they were
+        received, so they cannot be handed off to another thread.
+
+        Parameters
+        ------------
+        class_name: :class:`str`
+            The type name.
+        """
+        return self._outbound is not None and class_name == dict.__name__ and _interns_dicts()
+
+    def serialize(self, serializable_object: object) -> tuple:
+        """Serialize an object with the function registered for its type, or python's builtins.
+        This touches no state of the protocol, so it may run in another thread. Types for which
+        :meth:`interns` is true are serialized without the interning tables; use :meth:`encode` for those.
+
+        Parameters
+        ------------
+        serializable_object: :class:`object`
+            The object to serialize.
+
+        Returns
+        --------
+        Tuple[:class:`str`, :class:`str`, Optional[:class:`memoryview`]]
+            The type name, the serialization, and for types with a buffer serialization, the raw
+            payload, in which case the serialization is its header.
+        """
+        class_name = type(serializable_object).__name__
+        debug = self._logger.isEnabledFor(logging.DEBUG)
+        if class_name not in serialization.IPYC_CUSTOM_SERIALIZATIONS and \
+                class_name in serialization.IPYC_CUSTOM_BUFFER_SERIALIZATIONS:
+            if debug:
+                self._logger.debug(f"Serializing {class_name} using a custom defined buffer serialization")
+            header, buffer = serialization.IPYC_CUSTOM_BUFFER_SERIALIZATIONS[class_name](serializable_object)
+            return class_name, header, _byte_view(buffer)
+        elif class_name not in serialization.IPYC_CUSTOM_SERIALIZATIONS:
+            if debug:
+                self._logger.debug(f"Serializing {class_name} as a default python type")
+            return class_name, str(serializable_object), None
+        else:
+            if debug:
+                self._logger.debug(f"Serializing {class_name} using a custom defined serialization")
+            return class_name, serialization.IPYC_CUSTOM_SERIALIZATIONS[class_name](serializable_object), None
+
+    def frame(self, class_name: str, serialization_string: str, size=None, encoding='utf-8') -> bytes:
+        """Build the frame line of a serialization, interning its type name.
+
+        Parameters
+        ------------
+        class_name: :class:`str`
+            The type name.
+        serialization_string: :class:`str`
+            The serialization, or the header of a raw payload.
+        size: Optional[:class:`int`]
+            The size of the raw payload that follows the frame. Defaults to ``None``, for a text frame.
+        encoding: Optional[:class:`str`]
+            The encoding of the frame line. Defaults to ``utf-8``.
+
+        Returns
+        --------
+        :class:`bytes`
+            The frame line.
+        """
+        if self._outbound is not None:
+            class_name = interning.encode_name(class_name, self._outbound)
+        if size is None:
+            return _text_frame(class_name, serialization_string, encoding)
+        return BufferPacket(class_name, serialization_string, size).construct(encoding=encoding)
+
+    def encode(self, serializable_object: object, encoding='utf-8') -> tuple:
+        """Serialize an object and frame it.
+
+        Parameters
+        ------------
+        serializable_object: :class:`object`
+            The object to encode.
+        encoding: Optional[:class:`str`]
+            The encoding of the frame line. Defaults to ``utf-8``.
+
+        Returns
+        --------
+        Tuple[:class:`bytes`, Optional[:class:`memoryview`]]
+            The frame line and the raw payload to write right after it, if any.
+        """
+        class_name = type(serializable_object).__name__
+        if self.interns(class_name):
+            # The receiving end resolves the name before the payload, so the name is interned first
+            if self._logger.isEnabledFor(logging.DEBUG):
+                self._logger.debug(f"Serializing {class_name} using the interning table")
+            wire_name = interning.encode_name(class_name, self._outbound)
+            serialization_string = interning.dumps(serializable_object, self._outbound)
+            return _text_frame(wire_name, serialization_string, encoding), None
+        class_name, serialization_string, buffer = self.serialize(serializable_object)
+        frame = self.frame(class_name, serialization_string, None if buffer is None else buffer.nbytes, encoding)
+        return frame, buffer
+
+    def parse(self, line: bytes, encoding='utf-8'):
+        """Parse a frame line and resolve its interned type name.
+
+        A ``None`` result for a line that announces a raw payload, as told by
+        :func:`~ipyc.framing.payload_size`, still has to have that payload read past to keep the
+        stream in sync.
+
+        Parameters
+        ------------
+        line: :class:`bytes`
+            The frame line, including its newline.
+        encoding: Optional[:class:`str`]
+            The encoding of the frame line. Defaults to ``utf-8``.
+
+        Returns
+        --------
+        Optional[Union[:class:`CommunicationPacket`, :class:`BufferPacket`]]
+            The packet, or ``None`` if the line is not a valid frame.
+        """
+        packet = extract_packet(line, encoding=encoding)
+        if not packet:
+            self._logger.debug(f"Packet received was not a valid communication packet")
+            return None
+        if self._inbound is None:
+            return packet
+        try:
+            return _renamed(packet, interning.decode_name(packet.class_name, self._inbound))
+        except (IndexError, ValueError):
+            self._logger.warning(f"Received a reference to an unknown interned name '{packet.class_name}', discarding the packet.")
+            return None
+
+    def decode(self, packet, payload=None) -> object:
+        """Deserialize the object of a parsed packet.
+
+        Parameters
+        ------------
+        packet: Union[:class:`CommunicationPacket`, :class:`BufferPacket`]
+            A packet returned by :meth:`parse`.
+        payload: Optional[:term:`bytes-like object`]
+            The raw payload that followed a buffer frame.
+
+        Returns
+        --------
+        :class:`object`
+            The object.
+        """
+        debug = self._logger.isEnabledFor(logging.DEBUG)
+        if isinstance(packet, BufferPacket):
+            if debug:
+                self._logger.debug(f"Received {packet.size} raw bytes of '{packet.class_name}'")
+            deserializer = serialization.IPYC_CUSTOM_BUFFER_DESERIALIZATIONS.get(packet.class_name, arrays.deserialize_memoryview)
+            return deserializer(packet.header, memoryview(payload))
+
+        if debug:
+            self._logger.debug(f"Received {len(packet.object_serialization)} bytes of '{packet.class_name}'")
+        if self.interns(packet.class_name):
+            return interning.loads(packet.object_serialization, self._inbound)
+        return _deserialize_text(packet)
+
+    def receive_data(self, data, encoding='utf-8') -> list:
+        """Take the next bytes received, in pieces of any size, and return the objects of the frames
+        they complete. Invalid frames are skipped. Only the bytes of an incomplete frame are kept
+        between calls.
+
+        Parameters
+        ------------
+        data: :term:`bytes-like object`
+            The bytes received. They are copied, so the caller may reuse the buffer.
+        encoding: Optional[:class:`str`]
+            The encoding of the frame lines. Defaults to ``utf-8``.
+
+        Returns
+        --------
+        List[Tuple[:class:`object`, :class:`bytes`, Optional[:class:`bytearray`]]]
+            For every complete frame, oldest first, the object, the frame line, and the raw payload, if any.
+        """
+        if self._splitter is None:
+            self._splitter = FrameSplitter()
+        received = []
+        for line, payload in self._splitter.feed(data):
+            packet = self.parse(line, encoding)
+            if packet is not None:
+                received.append((self.decode(packet, payload), line, payload))
+        return received
+
+    @property
+    def pending(self):
+        """:class:`int`: The number of bytes of an incomplete frame held by :meth:`receive_data`."""
+        return 0 if self._splitter is None else self._splitter.pending
+
+
+# Messages nested in other messages, such as those of channels, are never interned, so a single
+# stateless protocol serves them all
+_NESTED = IPyCProtocol()
+
+
+def _encode_message(serializable_object: object, encoding: str) -> list:
+    # The same frames a link would write, kept as pieces so large buffers are never joined
+    frame, buffer = _NESTED.encode(serializable_object, encoding=encoding)
+    return [frame] if buffer is None else [frame, buffer]
+
+
+def _decode_message(message, encoding: str, end=None):
+    # The end of the frame line can be given for memoryviews, which cannot be searched
+    if end is None:
+        end = message.find(b'\n') + 1
+    packet = _NESTED.parse(bytes(message[:end]), encoding=encoding)
+    if not packet:
+        return None
+    if isinstance(packet, BufferPacket):
+        return _NESTED.decode(packet, memoryview(message)[end:end + packet.size])
+    return _NESTED.decode(packet)
@@ -0,0 +1,201 @@
+"""At-least-once delivery over connections that may drop, for senders that reconnect.
+
+A reliable sender wraps every message in a :class:`~ipyc.packets.SequencedMessage` carrying the id of
+its session, which outlives any one connection, and a sequence number. It keeps the messages the
+receiving end has not acknowledged yet, up to a window, and sends them again in order once it has
+reconnected.
+
+Every link unwraps the sequenced messages it receives, whichever end it is on, and hands each message
+to its receiver only once per session, suppressing the copies sent again. It acknowledges them with a
+cumulative :class:`~ipyc.packets.Acknowledgement` of the last sequence number received, sent once per
+burst of messages read together, or every :data:`DEFAULT_ACK_EVERY` messages, rather than once per
+message. Acknowledgements are sent when messages are received, before they are handled.
+
+Sessions are kept per process, so a receiving process that restarts, or takes over connections with
+:mod:`ipyc.handoff`, starts without them and may receive again a message its predecessor had received
+but not yet acknowledged.
+"""
+import binascii
+import collections
+import os
+import threading
+
+from .packets import SequencedMessage, Acknowledgement
+from .protocol import _decode_message, _encode_message
+
+DEFAULT_WINDOW = 1024
+DEFAULT_ACK_EVERY = 64
+DEFAULT_MAX_SESSIONS = 65536
+
+
+class ReliableSender:
+    """The state of a reliable sender: its session, the next sequence number, and the window of
+    messages sent but not acknowledged yet. It performs no I/O, the client owning it sends and
+    resends the messages it wraps.
+
+    Parameters
+    -----------
+    window: Optional[:class:`int`]
+        The number of unacknowledged messages kept. Defaults to ``1024``.
+    """
+    def __init__(self, window=DEFAULT_WINDOW):
+        if window < 1:
+            raise ValueError('The window must hold at least one message')
+        self.session = binascii.hexlify(os.urandom(8)).decode('ascii')
+        self._window = window
+        self._next_sequence = 1
+        self._acknowledged = 0
+        self._unacknowledged = collections.deque()
+
+    @property
+    def window(self):
+        """:class:`int`: The number of unacknowledged messages kept at most."""
+        return self._window
+
+    @property
+    def acknowledged(self):
+        """:class:`int`: The sequence number of the last message acknowledged, along with every message before it."""
+        return self._acknowledged
+
+    @property
+    def in_flight(self):
+        """:class:`int`: The number of messages sent but not acknowledged yet."""
+        return len(self._unacknowledged)
+
+    @property
+    def full(self):
+        """:class:`bool`: Whether the window is full, in which case no message can be wrapped until
+        some are acknowledged."""
+        return len(self._unacknowledged) >= self._window
+
+    @property
+    def unacknowledged(self):
+        """List[:class:`~ipyc.packets.SequencedMessage`]: The messages to send again after reconnecting, oldest first."""
+        return list(self._unacknowledged)
+
+    def wrap(self, serializable_object: object, encoding='utf-8') -> SequencedMessage:
+        """Serialize an object into the next sequenced message and keep it until it is acknowledged.
+
+        Parameters
+        ------------
+        serializable_object: :class:`object`
+            The object to send.
+        encoding: Optional[:class:`str`]
+            The encoding of the serialization. Defaults to ``utf-8``.
+
+        Returns
+        --------
+        :class:`~ipyc.packets.SequencedMessage`
+            The message to send.
+
+        Raises
+        --------
+        RuntimeError
+            The window is full.
+        """
+        if self.full:
+            raise RuntimeError('The window of unacknowledged messages is full')
+        pieces = _encode_message(serializable_object, encoding)
+        message = SequencedMessage(self.session, self._next_sequence, len(pieces[0]), b''.join(pieces))
+        self._next_sequence += 1
+        self._unacknowledged.append(message)
+        return message
+
+    def acknowledge(self, acknowledgement: Acknowledgement) -> int:
+        """Release the messages an acknowledgement covers.
+
+        Parameters
+        ------------
+        acknowledgement: :class:`~ipyc.packets.Acknowledgement`
+            The acknowledgement received.
+
+        Returns
+        --------
+        :class:`int`
+            The number of messages released, ``0`` for an acknowledgement of another session.
+        """
+        if acknowledgement.session != self.session:
+            return 0
+        self._acknowledged = max(self._acknowledged, acknowledgement.sequence)
+        released = 0
+        while self._unacknowledged and self._unacknowledged[0].sequence <= acknowledgement.sequence:
+            self._unacknowledged.popleft()
+            released += 1
+        return released
+
+
+class ReliableReceiver:
+    """The state of the receiving end of reliable senders: for every session, the last sequence number
+    received and how many messages are not acknowledged yet. Sessions not heard from for the longest
+    time are forgotten past ``max_sessions``. It is safe to use from multiple threads.
+
+    Parameters
+    -----------
+    ack_every: Optional[:class:`int`]
+        The number of messages of a session after which it is acknowledged, even within a burst.
+        Defaults to ``64``.
+    max_sessions: Optional[:class:`int`]
+        The number of sessions remembered. Defaults to ``65536``.
+    """
+    def __init__(self, ack_every=DEFAULT_ACK_EVERY, max_sessions=DEFAULT_MAX_SESSIONS):
+        self._ack_every = ack_every
+        self._max_sessions = max_sessions
+        # Each session maps to the last sequence number received and the number received since the last acknowledgement
+        self._sessions = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def accept(self, message: SequencedMessage) -> bool:
+        """Record a sequenced message received and return whether it is new, rather than a copy of one
+        already received.
+
+        Parameters
+        ------------
+        message: :class:`~ipyc.packets.SequencedMessage`
+            The message received.
+        """
+        with self._lock:
+            state = self._sessions.get(message.session)
+            if state is None:
+                state = self._sessions[message.session] = [0, 0]
+                if len(self._sessions) > self._max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(message.session)
+            # A copy is acknowledged again, as the acknowledgement of the original may have been lost
+            state[1] += 1
+            if message.sequence <= state[0]:
+                return False
+            # Sequence numbers only skip ahead when the session was forgotten, which cannot be undone
+            state[0] = message.sequence
+            return True
+
+    def acknowledgement(self, session: str, force=False):
+        """Return the acknowledgement due for a session, if any.
+
+        Parameters
+        ------------
+        session: :class:`str`
+            The session.
+        force: Optional[:class:`bool`]
+            Whether to acknowledge every message received so far, at the end of a burst, rather than
+            only once ``ack_every`` messages are waiting. Defaults to ``False``.
+
+        Returns
+        --------
+        Optional[:class:`~ipyc.packets.Acknowledgement`]
+            The acknowledgement to send.
+        """
+        with self._lock:
+            state = self._sessions.get(session)
+            if state is None or not state[1] or (not force and state[1] < self._ack_every):
+                return None
+            state[1] = 0
+            return Acknowledgement(session, state[0])
+
+
+# Shared by every link of the process, so that a session is recognized on whichever connection it resumes
+RECEIVER = ReliableReceiver()
+
+
+def _unwrap(message: SequencedMessage, encoding: str):
+    return _decode_message(message.data, encoding, message.line)
@@ -1,13 +1,57 @@
+import array
 import json
 
+from . import arrays
+from .batches import RecordBatch
+from .packets import Acknowledgement, ChannelChunk, SequencedMessage
+
 IPYC_CUSTOM_SERIALIZATIONS = {
     dict.__name__: json.dumps,
+    Acknowledgement.__name__: Acknowledgement.serialize,
 }
 
 IPYC_CUSTOM_DESERIALIZATIONS = {
     dict.__name__: json.loads,
+    Acknowledgement.__name__: Acknowledgement.deserialize,
+}
+
+IPYC_CUSTOM_BUFFER_SERIALIZATIONS = {
+    array.array.__name__: arrays.serialize_array,
+    memoryview.__name__: arrays.serialize_buffer,
+    bytes.__name__: arrays.serialize_buffer,
+    bytearray.__name__: arrays.serialize_buffer,
+    RecordBatch.__name__: RecordBatch.serialize,
+    ChannelChunk.__name__: ChannelChunk.serialize,
+    SequencedMessage.__name__: SequencedMessage.serialize,
+    'ndarray': arrays.serialize_ndarray,
 }
 
+IPYC_CUSTOM_BUFFER_DESERIALIZATIONS = {
+    array.array.__name__: arrays.deserialize_array,
+    memoryview.__name__: arrays.deserialize_memoryview,
+    bytes.__name__: arrays.deserialize_bytes,
+    bytearray.__name__: arrays.deserialize_bytearray,
+    RecordBatch.__name__: RecordBatch.deserialize,
+    ChannelChunk.__name__: ChannelChunk.deserialize,
+    SequencedMessage.__name__: SequencedMessage.deserialize,
+    'ndarray': arrays.deserialize_ndarray,
+}
+
+IPYC_OFFLOADED_SERIALIZATIONS = set()
+
+IPYC_OFFLOAD_THRESHOLD = None
+
+IPYC_OFFLOAD_EXECUTOR = None
+
+# Set by ipyc.profiling while profiling is enabled, so that newly registered functions are profiled too
+_profile_wrapper = None
+
+
+def _register(registry: dict, operation: str, class_object: object, function):
+    if _profile_wrapper is not None:
+        function = _profile_wrapper(class_object.__name__, operation, function)
+    registry[class_object.__name__] = function
+
 
 def add_custom_serialization(class_object: object, class_serializer):
     """Register a serialization function for a particular object class. Only
@@ -26,7 +70,7 @@ def add_custom_serialization(class_object: object, class_serializer):
         The function to call when serialization is requested for the object. Must return a string.
 
     """
-    IPYC_CUSTOM_SERIALIZATIONS[class_object.__name__] = class_serializer
+    _register(IPYC_CUSTOM_SERIALIZATIONS, 'serialize', class_object, class_serializer)
 
 
 def update_custom_serialization(class_object: object, class_serializer):
@@ -68,7 +112,7 @@ def add_custom_deserialization(class_object: object, class_deserializer):
         The function to call when deserialization is requested for the object. Must return a :class:`object`.
 
     """
-    IPYC_CUSTOM_DESERIALIZATIONS[class_object.__name__] = class_deserializer
+    _register(IPYC_CUSTOM_DESERIALIZATIONS, 'deserialize', class_object, class_deserializer)
 
 
 def update_custom_deserialization(class_object: object, class_deserializer):
@@ -91,3 +135,183 @@ def remove_custom_deserialization(class_object: object):
     """
     if class_object.__name__ in IPYC_CUSTOM_DESERIALIZATIONS:
         del IPYC_CUSTOM_DESERIALIZATIONS[class_object.__name__]
+
+
+def add_custom_buffer_serialization(class_object: object, class_serializer):
+    """Register a buffer serialization function for a particular object class. Buffer
+    serializations skip string conversion entirely: the object is sent as a small header
+    followed by its raw bytes, so the payload may contain any byte including ``0x01`` and ``0x02``.
+    Only one buffer serialization method per object is allowed. The method must be a non-blocking function.
+
+    :class:`array.array`, :class:`memoryview`, :class:`bytes`, and :class:`bytearray` are registered
+    by default, as is :class:`numpy.ndarray`, which needs numpy on the receiving end to be rebuilt.
+    Any other object supporting the buffer protocol can be registered with :func:`ipyc.arrays.serialize_buffer`.
+
+    .. note::
+        A serializer registered with :meth:`add_custom_serialization` for the same class takes precedence.
+
+    Parameters
+    ------------
+    class_object: :class:`object`
+        The class or object type that will be serialized.
+    class_serializer: function
+        The function to call when serialization is requested for the object. Must return a tuple of
+        a header string and a bytes-like object.
+
+    """
+    _register(IPYC_CUSTOM_BUFFER_SERIALIZATIONS, 'serialize', class_object, class_serializer)
+
+
+def remove_custom_buffer_serialization(class_object: object):
+    """De-register a buffer serialization function for a particular object class.
+
+    Parameters
+    ------------
+    class_object: :class:`object`
+        The class or object type that will be removed from the custom buffer serializer dictionary.
+
+    """
+    if class_object.__name__ in IPYC_CUSTOM_BUFFER_SERIALIZATIONS:
+        del IPYC_CUSTOM_BUFFER_SERIALIZATIONS[class_object.__name__]
+
+
+def add_custom_buffer_deserialization(class_object: object, class_deserializer):
+    """Register a buffer deserialization function for a particular object class. Only
+    one buffer deserialization method per object is allowed. The method must be a non-
+    blocking function.
+
+    Parameters
+    ------------
+    class_object: :class:`object`
+        The class or object type that will be deserialized.
+    class_deserializer: function
+        The function to call when deserialization is requested for the object. It is called with the
+        header string and a :class:`memoryview` over the received bytes, and must return a :class:`object`.
+
+    """
+    _register(IPYC_CUSTOM_BUFFER_DESERIALIZATIONS, 'deserialize', class_object, class_deserializer)
+
+
+def remove_custom_buffer_deserialization(class_object: object):
+    """De-register a buffer deserialization function for a particular object class.
+
+    Parameters
+    ------------
+    class_object: :class:`object`
+        The class or object type that will be removed from the custom buffer deserializer dictionary.
+
+    """
+    if class_object.__name__ in IPYC_CUSTOM_BUFFER_DESERIALIZATIONS:
+        del IPYC_CUSTOM_BUFFER_DESERIALIZATIONS[class_object.__name__]
+
+
+def add_struct_serialization(class_object: object):
+    """Register a compiled binary serialization and deserialization for a dataclass or
+    :class:`typing.NamedTuple` whose fields are annotated as ``bool``, ``int``, ``float``, ``str``, or ``bytes``.
+    The record is packed with a :class:`struct.Struct` compiled once per class and sent as a raw buffer,
+    which is much cheaper than formatting and parsing a string. Both ends must register the class.
+
+    Example
+    ---------
+    .. code-block:: python3
+
+        class Reading(typing.NamedTuple):
+            sensor: str
+            timestamp: int
+            value: float
+
+        IPyCSerialization.add_struct_serialization(Reading)
+
+    Parameters
+    ------------
+    class_object: :class:`type`
+        The dataclass or NamedTuple class to register.
+
+    Raises
+    --------
+    TypeError
+        The class is not a dataclass or NamedTuple, or one of its fields has an unsupported annotation.
+
+    """
+    # Imported here as it pulls in typing and dataclasses, which most programs never need
+    from . import structs
+    codec = structs.compile_struct_codec(class_object)
+    add_custom_buffer_serialization(class_object, codec.serialize)
+    add_custom_buffer_deserialization(class_object, codec.deserialize)
+
+
+def remove_struct_serialization(class_object: object):
+    """De-register the compiled serialization and deserialization added by :meth:`add_struct_serialization`.
+
+    Parameters
+    ------------
+    class_object: :class:`type`
+        The dataclass or NamedTuple class to de-register.
+
+    """
+    remove_custom_buffer_serialization(class_object)
+    remove_custom_buffer_deserialization(class_object)
+
+
+def add_offloaded_serialization(class_object: object):
+    """Run the serialization and deserialization of a particular object class in an executor
+    when sending and receiving on an :class:`AsyncIPyCLink`, instead of on the event loop. Use this
+    for types whose custom serializers are expensive enough to stall other connections.
+
+    Parameters
+    ------------
+    class_object: :class:`object`
+        The class or object type whose serialization will be offloaded.
+
+    """
+    IPYC_OFFLOADED_SERIALIZATIONS.add(class_object.__name__)
+
+
+def remove_offloaded_serialization(class_object: object):
+    """Run the serialization and deserialization of a particular object class on the event loop again.
+
+    Parameters
+    ------------
+    class_object: :class:`object`
+        The class or object type whose serialization will no longer be offloaded.
+
+    """
+    IPYC_OFFLOADED_SERIALIZATIONS.discard(class_object.__name__)
+
+
+def set_offload_threshold(size):
+    """Set the frame size, in bytes or characters, at or above which an :class:`AsyncIPyCLink` decodes
+    a received frame and deserializes its object in an executor, and encodes a serialized object into
+    a frame in an executor when sending. Smaller messages are still handled inline on the event loop.
+
+    .. note::
+        The size of an object is only known once it is serialized, so the serializer itself is only
+        offloaded for classes registered with :meth:`add_offloaded_serialization`.
+
+    Parameters
+    ------------
+    size: Optional[:class:`int`]
+        The threshold, or ``None`` to disable size based offloading.
+
+    """
+    global IPYC_OFFLOAD_THRESHOLD
+    IPYC_OFFLOAD_THRESHOLD = size
+
+
+def set_offload_executor(executor):
+    """Set the executor offloaded serializations run in. Defaults to ``None``, which uses the event
+    loop's default :class:`concurrent.futures.ThreadPoolExecutor`.
+
+    .. warning::
+        A :class:`concurrent.futures.ProcessPoolExecutor` can be used to escape the GIL for very large
+        payloads, but then the offloaded serializers and deserializers, and the objects they handle,
+        must be picklable, and each offloaded call pays for copying its input and output between processes.
+
+    Parameters
+    ------------
+    executor: Optional[:class:`concurrent.futures.Executor`]
+        The executor to use.
+
+    """
+    global IPYC_OFFLOAD_EXECUTOR
+    IPYC_OFFLOAD_EXECUTOR = executor
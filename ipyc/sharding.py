@@ -0,0 +1,92 @@
+import bisect
+import hashlib
+
+DEFAULT_REPLICAS = 128
+
+
+def _hash(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+
+def _key_bytes(key) -> bytes:
+    if isinstance(key, (bytes, bytearray, memoryview)):
+        return bytes(key)
+    return str(key).encode('utf-8')
+
+
+def _label(node) -> str:
+    # Hosts are (ip_address, port) tuples, labelled the way they are usually written
+    if isinstance(node, tuple) and len(node) == 2:
+        return f'{node[0]}:{node[1]}'
+    return str(node)
+
+
+class HashRing:
+    """A consistent hash ring mapping keys to nodes.
+
+    Every node is placed on the ring at ``replicas`` pseudo-random points, and a key belongs to the
+    node owning the first point at or after the key's own hash. Adding or removing a node therefore
+    only moves the keys of the ring segments it gains or loses, about ``1 / len(nodes)`` of all keys,
+    while every other key stays on the node it was on.
+
+    Lookups may run concurrently with :meth:`add` and :meth:`remove` from other threads.
+
+    Parameters
+    -----------
+    nodes: Optional[Iterable]
+        The initial nodes. Nodes may be any hashable value; ``(ip_address, port)`` tuples are hashed
+        as ``'ip_address:port'``, anything else by its :class:`str` form.
+    replicas: Optional[:class:`int`]
+        The number of points per node. More points spread keys more evenly. Defaults to ``128``.
+    """
+    def __init__(self, nodes=(), replicas=DEFAULT_REPLICAS):
+        self._replicas = replicas
+        self._nodes = set()
+        # Points and their owners are replaced together so lookups never see a half updated ring
+        self._ring = ([], [])
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def nodes(self):
+        """:class:`frozenset`: The nodes currently on the ring."""
+        return frozenset(self._nodes)
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __contains__(self, node):
+        return node in self._nodes
+
+    def _rebuild(self):
+        label_points = sorted(
+            (_hash(f'{_label(node)}#{replica}'.encode('utf-8')), _label(node), node)
+            for node in self._nodes for replica in range(self._replicas)
+        )
+        self._ring = ([point for point, _, _ in label_points], [node for _, _, node in label_points])
+
+    def add(self, node):
+        """Place a node on the ring. Adding a node already on the ring does nothing."""
+        if node not in self._nodes:
+            self._nodes.add(node)
+            self._rebuild()
+
+    def remove(self, node):
+        """Take a node off the ring. Removing a node that is not on the ring does nothing."""
+        if node in self._nodes:
+            self._nodes.discard(node)
+            self._rebuild()
+
+    def get(self, key):
+        """Return the node a key belongs to, or ``None`` if the ring is empty.
+
+        Parameters
+        ------------
+        key: :class:`object`
+            The routing key. Bytes-like keys are hashed as-is, anything else by its :class:`str` form.
+        """
+        points, owners = self._ring
+        if not points:
+            return None
+        index = bisect.bisect_left(points, _hash(_key_bytes(key)))
+        return owners[index % len(owners)]
@@ -0,0 +1,268 @@
+import collections
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import threading
+
+DEFAULT_MAX_MEMORY = 64 * 1024 * 1024
+DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+DEFAULT_BATCH_SIZE = 1024 * 1024
+
+_RECORD_HEADER = struct.Struct('!I')
+
+
+class _Segment:
+    # An append-only file of length-prefixed records, mapped into memory while it is in use
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size
+        descriptor = os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            os.ftruncate(descriptor, size)
+            self.map = mmap.mmap(descriptor, size)
+        finally:
+            os.close(descriptor)
+        self.write_offset = 0
+        self.read_offset = 0
+        self.unread = 0
+        self.unacked = 0
+
+    def fits(self, size: int) -> bool:
+        return self.write_offset + _RECORD_HEADER.size + size <= self.size
+
+    def append(self, data):
+        start = self.write_offset + _RECORD_HEADER.size
+        _RECORD_HEADER.pack_into(self.map, self.write_offset, len(data))
+        self.map[start:start + len(data)] = data
+        self.write_offset = start + len(data)
+        self.unread += 1
+
+    def read(self) -> bytes:
+        size, = _RECORD_HEADER.unpack_from(self.map, self.read_offset)
+        start = self.read_offset + _RECORD_HEADER.size
+        self.read_offset = start + size
+        self.unread -= 1
+        self.unacked += 1
+        return self.map[start:start + size]
+
+    def delete(self):
+        self.map.close()
+        os.unlink(self.path)
+
+
+class SpillQueue:
+    """A first-in first-out queue of outbound frames that keeps frames in memory up to a limit
+    and spills the rest to memory-mapped, append-only segment files on disk.
+
+    Frames are always taken out in the order they were put in, whether they were held in memory
+    or on disk. A frame taken out stays accounted for until it is acknowledged with :meth:`ack`,
+    and a segment file is deleted as soon as every frame in it has been acknowledged.
+
+    Links create their queue through :meth:`IPyCLink.enable_spilling` and
+    :meth:`AsyncIPyCLink.enable_spilling`, which also start draining it to the socket; it
+    typically should not be instantiated on its own. It may be used from multiple threads.
+
+    Parameters
+    -----------
+    max_memory: Optional[:class:`int`]
+        The number of bytes of frames held in memory before new frames are written to disk.
+        Defaults to 64 MiB.
+    directory: Optional[:class:`str`]
+        The directory the segment files are created in. Defaults to ``None``, in which case a
+        temporary directory is created on the first spill and removed when the queue is closed.
+    segment_size: Optional[:class:`int`]
+        The size of each segment file. A frame larger than this gets a segment of its own.
+        Defaults to 64 MiB.
+    """
+    def __init__(self, max_memory=DEFAULT_MAX_MEMORY, directory=None, segment_size=DEFAULT_SEGMENT_SIZE):
+        self._max_memory = max_memory
+        self._directory = directory
+        self._owned_directory = None
+        self._segment_size = segment_size
+        self._segment_number = 0
+        self._memory = collections.deque()
+        self._memory_bytes = 0
+        self._segments = collections.deque()
+        self._taken = collections.deque()
+        self._condition = threading.Condition()
+        self._put_count = 0
+        self._acked_count = 0
+        self._spilled = 0
+        self._finished = False
+        self._closed = False
+
+    def __len__(self):
+        """The number of frames that have been put in and not yet taken out."""
+        return len(self._memory) + sum(segment.unread for segment in self._segments)
+
+    @property
+    def memory_bytes(self):
+        """:class:`int`: The number of bytes of frames currently held in memory."""
+        return self._memory_bytes
+
+    @property
+    def disk_bytes(self):
+        """:class:`int`: The number of bytes taken up by segment files on disk."""
+        return sum(segment.size for segment in self._segments)
+
+    @property
+    def spilled(self):
+        """:class:`int`: The number of frames that have been written to disk so far."""
+        return self._spilled
+
+    @property
+    def closed(self):
+        """:class:`bool`: Whether the queue has been closed."""
+        return self._closed
+
+    def _new_segment(self, size: int) -> _Segment:
+        if self._directory is None:
+            self._directory = self._owned_directory = tempfile.mkdtemp(prefix='ipyc-spill-')
+        self._segment_number += 1
+        path = os.path.join(self._directory, f'{os.getpid()}-{id(self):x}-{self._segment_number:08d}.spill')
+        segment = _Segment(path, max(size, self._segment_size))
+        self._segments.append(segment)
+        return segment
+
+    def put(self, data) -> int:
+        """Put a frame at the end of the queue.
+
+        Parameters
+        ------------
+        data: :term:`bytes-like object`
+            The frame. It is copied, so the caller may reuse the buffer.
+
+        Returns
+        --------
+        :class:`int`
+            A ticket to pass to :meth:`wait_acked` to wait for this frame to be acknowledged.
+        """
+        with self._condition:
+            if self._closed:
+                raise ValueError('The spill queue is closed')
+            size = len(data)
+            # Once anything is on disk, later frames must follow it there to keep them in order
+            on_disk = self._segments and self._segments[-1].unread
+            if not on_disk and self._memory_bytes + size <= self._max_memory:
+                self._memory.append(bytes(data))
+                self._memory_bytes += size
+            else:
+                segment = self._segments[-1] if self._segments else None
+                if segment is None or not segment.fits(size):
+                    segment = self._new_segment(_RECORD_HEADER.size + size)
+                segment.append(data)
+                self._spilled += 1
+            self._put_count += 1
+            self._condition.notify_all()
+            return self._put_count
+
+    def take(self, max_bytes=DEFAULT_BATCH_SIZE) -> list:
+        """Take frames from the front of the queue, without waiting. Taken frames must be
+        acknowledged with :meth:`ack` once they have been written.
+
+        Parameters
+        ------------
+        max_bytes: Optional[:class:`int`]
+            The number of bytes of frames to take at most, though at least one frame is taken
+            when the queue is not empty. Defaults to 1 MiB.
+
+        Returns
+        --------
+        List[:class:`bytes`]
+            The frames, oldest first. Empty if the queue is empty.
+        """
+        frames, size = [], 0
+        with self._condition:
+            while size < max_bytes and not self._closed:
+                if self._memory:
+                    frame = self._memory.popleft()
+                    self._memory_bytes -= len(frame)
+                    self._taken.append(None)
+                else:
+                    segment = next((segment for segment in self._segments if segment.unread), None)
+                    if segment is None:
+                        break
+                    frame = segment.read()
+                    self._taken.append(segment)
+                frames.append(frame)
+                size += len(frame)
+        return frames
+
+    def ack(self, count: int):
+        """Acknowledge the oldest ``count`` taken frames, deleting the segment files that no
+        longer hold any unacknowledged frame."""
+        with self._condition:
+            if self._closed:
+                return
+            for _ in range(min(count, len(self._taken))):
+                segment = self._taken.popleft()
+                if segment is not None:
+                    segment.unacked -= 1
+            while self._segments:
+                segment = self._segments[0]
+                # The last segment may still be appended to unless everything written to it is done
+                if segment.unread or segment.unacked or (segment is self._segments[-1] and segment.read_offset < segment.write_offset):
+                    break
+                self._segments.popleft()
+                segment.delete()
+            self._acked_count += count
+            self._condition.notify_all()
+
+    def wait(self, timeout=None) -> bool:
+        """Block until there is a frame to take.
+
+        Returns
+        --------
+        :class:`bool`
+            ``True`` if there is a frame to take, ``False`` if the queue was finished and is empty,
+            was closed, or the timeout expired.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: len(self) or self._finished or self._closed, timeout)
+            return bool(len(self)) and not self._closed
+
+    def wait_acked(self, ticket=None, timeout=None) -> bool:
+        """Block until the frame a ticket was returned for, and every frame before it, has been
+        acknowledged.
+
+        Parameters
+        ------------
+        ticket: Optional[:class:`int`]
+            A ticket returned by :meth:`put`. Defaults to ``None``, waiting for every frame put so far.
+        timeout: Optional[:class:`float`]
+            The number of seconds to wait at most. Defaults to ``None``, waiting forever.
+
+        Returns
+        --------
+        :class:`bool`
+            ``True`` if the frames were acknowledged, ``False`` if the queue was closed first or the
+            timeout expired.
+        """
+        with self._condition:
+            ticket = self._put_count if ticket is None else ticket
+            self._condition.wait_for(lambda: self._acked_count >= ticket or self._closed, timeout)
+            return self._acked_count >= ticket
+
+    def finish(self):
+        """Mark that no more frames will be put, waking up :meth:`wait` once the queue is empty."""
+        with self._condition:
+            self._finished = True
+            self._condition.notify_all()
+
+    def close(self):
+        """Discard every frame still in the queue and delete the segment files. Closing an already
+        closed queue does nothing."""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._memory.clear()
+            self._memory_bytes = 0
+            self._taken.clear()
+            while self._segments:
+                self._segments.popleft().delete()
+            if self._owned_directory is not None:
+                shutil.rmtree(self._owned_directory, ignore_errors=True)
+            self._condition.notify_all()
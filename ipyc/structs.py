@@ -0,0 +1,115 @@
+import struct
+import typing
+
+try:
+    import dataclasses
+except ImportError:
+    dataclasses = None
+
+_FIXED_FORMATS = {
+    bool: '?',
+    int: 'q',
+    float: 'd',
+}
+
+_VARIABLE_TYPES = (str, bytes)
+
+_CODECS = {}
+
+
+def _typed_fields(class_object):
+    hints = typing.get_type_hints(class_object)
+    if dataclasses is not None and dataclasses.is_dataclass(class_object):
+        fields = dataclasses.fields(class_object)
+        if any(not field.init for field in fields):
+            raise TypeError(f'{class_object.__name__} has fields that are not set by __init__')
+        names = [field.name for field in fields]
+    elif issubclass(class_object, tuple) and hasattr(class_object, '_fields'):
+        names = list(class_object._fields)
+    else:
+        raise TypeError(f'{class_object.__name__} is not a dataclass or a NamedTuple')
+
+    for name in names:
+        if hints.get(name) not in _FIXED_FORMATS and hints.get(name) not in _VARIABLE_TYPES:
+            raise TypeError(f'{class_object.__name__}.{name} must be annotated as one of bool, int, float, str, or bytes')
+    return [(name, hints[name]) for name in names]
+
+
+class StructCodec:
+    """A binary codec compiled from the typed fields of a dataclass or :class:`typing.NamedTuple`.
+
+    Fixed size fields (``bool``, ``int``, and ``float``) are packed with a single :class:`struct.Struct`
+    in field order. Variable length fields (``str`` and ``bytes``) take a 4 byte length slot in that
+    same struct, and their contents are appended after it in field order. ``str`` fields are UTF-8 encoded.
+
+    Codecs are typically built through :func:`compile_struct_codec`, which caches one codec per class.
+
+    Parameters
+    -----------
+    class_object: :class:`type`
+        The dataclass or :class:`typing.NamedTuple` to compile a codec for.
+
+    Raises
+    --------
+    TypeError
+        The class is not a dataclass or NamedTuple, or one of its fields has an unsupported annotation.
+    """
+    def __init__(self, class_object):
+        self._class = class_object
+        fields = _typed_fields(class_object)
+        self._names = [name for name, _ in fields]
+        self._struct = struct.Struct('<' + ''.join(_FIXED_FORMATS.get(kind, 'I') for _, kind in fields))
+        self._strings = [index for index, (_, kind) in enumerate(fields) if kind is str]
+        self._variables = [index for index, (_, kind) in enumerate(fields) if kind in _VARIABLE_TYPES]
+
+    @property
+    def struct(self):
+        """:class:`struct.Struct`: The compiled struct holding the fixed size part of every record."""
+        return self._struct
+
+    def serialize(self, record):
+        """Encode a record into a buffer serialization, see :func:`ipyc.IPyCSerialization.add_custom_buffer_serialization`.
+
+        Returns
+        --------
+        Tuple[:class:`str`, :class:`bytes`]
+            An empty header and the encoded record.
+        """
+        values = [getattr(record, name) for name in self._names]
+        if not self._variables:
+            return '', self._struct.pack(*values)
+        blobs = []
+        for index in self._variables:
+            blob = values[index].encode('utf-8') if index in self._strings else values[index]
+            blobs.append(blob)
+            values[index] = len(blob)
+        return '', b''.join([self._struct.pack(*values)] + blobs)
+
+    def deserialize(self, header: str, buffer: memoryview):
+        """Decode a record produced by :meth:`serialize`."""
+        values = list(self._struct.unpack_from(buffer, 0))
+        offset = self._struct.size
+        for index in self._variables:
+            end = offset + values[index]
+            values[index] = str(buffer[offset:end], 'utf-8') if index in self._strings else bytes(buffer[offset:end])
+            offset = end
+        return self._class(*values)
+
+
+def compile_struct_codec(class_object) -> StructCodec:
+    """Return the :class:`StructCodec` for a dataclass or :class:`typing.NamedTuple`, compiling it on first use.
+
+    Parameters
+    ------------
+    class_object: :class:`type`
+        The dataclass or :class:`typing.NamedTuple` with ``bool``, ``int``, ``float``, ``str``, or ``bytes`` fields.
+
+    Returns
+    --------
+    :class:`StructCodec`
+        The cached codec for the class.
+    """
+    codec = _CODECS.get(class_object)
+    if codec is None:
+        codec = _CODECS[class_object] = StructCodec(class_object)
+    return codec
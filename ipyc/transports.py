@@ -0,0 +1,235 @@
+import asyncio
+import collections
+
+from .framing import payload_size, shared_buffer
+
+DEFAULT_BUFFER_SIZE = 64 * 1024
+DEFAULT_MAX_QUEUED_FRAMES = 1024
+
+if not hasattr(asyncio, 'BufferedProtocol'):
+    raise ImportError('The protocol engine requires asyncio.BufferedProtocol, which exists from Python 3.7 onwards')
+
+
+class IPyCBufferedProtocol(asyncio.BufferedProtocol):
+    """An :class:`asyncio.BufferedProtocol` that splits the incoming byte stream into frames as it
+    arrives, without a coroutine or a copy per read.
+
+    The transport reads straight into a reusable buffer handed out by :meth:`get_buffer`. Frame lines
+    are cut out of it in :meth:`buffer_updated`. That buffer is shared by every connection of the thread,
+    and a connection only holds one of its own while a frame line it received is still incomplete, so
+    idle connections hold no receive buffer at all. The raw payload of a buffer frame is read by the
+    transport directly into a buffer of its own, which is then handed to the deserializer as-is.
+    Complete frames are queued until the link asks for them; when too many are waiting, reading from
+    the socket is paused until the link catches up.
+
+    The protocol also stands in for the :class:`asyncio.StreamWriter` of the link, writing through
+    the transport and honouring its flow control in :meth:`drain`.
+
+    This class is internally managed by :class:`AsyncIPyCHost` and :class:`AsyncIPyCClient` when
+    they use the ``protocol`` engine and typically should not be instantiated on its own.
+
+    Parameters
+    -----------
+    on_connect: Optional[Callable[[:class:`IPyCBufferedProtocol`], Coroutine]]
+        A coroutine function scheduled with the protocol once the connection is made.
+    buffer_size: Optional[:class:`int`]
+        The size of the receive buffer. It grows when a single frame line does not fit.
+        Defaults to ``65536``.
+    max_queued_frames: Optional[:class:`int`]
+        The number of received frames that may wait for the link before reading is paused.
+        Defaults to ``1024``.
+    """
+    __slots__ = ('_on_connect', '_loop', '_transport', '_buffer_size', '_buffer', '_shared', '_start', '_end',
+                 '_payload', '_payload_line', '_filled', '_frames', '_max_queued_frames', '_frame_waiter',
+                 '_reading_paused', '_writing_paused', '_drain_waiters', '_eof', '_connection_lost', '_closed',
+                 '_connect_task')
+
+    def __init__(self, on_connect=None, buffer_size=DEFAULT_BUFFER_SIZE, max_queued_frames=DEFAULT_MAX_QUEUED_FRAMES):
+        self._on_connect = on_connect
+        self._loop = asyncio.get_event_loop()
+        self._transport = None
+        self._buffer_size = buffer_size
+        self._buffer = None
+        self._shared = False
+        self._start = 0
+        self._end = 0
+        self._payload = None
+        self._payload_line = None
+        self._filled = 0
+        self._frames = collections.deque()
+        self._max_queued_frames = max_queued_frames
+        self._frame_waiter = None
+        self._reading_paused = False
+        self._writing_paused = False
+        self._drain_waiters = collections.deque()
+        self._eof = False
+        self._connection_lost = False
+        self._closed = self._loop.create_future()
+        self._connect_task = None
+
+    @property
+    def transport(self):
+        """:class:`asyncio.Transport`: The transport of the connection."""
+        return self._transport
+
+    def connection_made(self, transport):
+        self._transport = transport
+        if self._on_connect is not None:
+            self._connect_task = self._loop.create_task(self._on_connect(self))
+
+    def connection_lost(self, exc):
+        self._connection_lost = True
+        self._eof = True
+        self._wake_reader()
+        for waiter in self._drain_waiters:
+            if not waiter.done():
+                waiter.set_exception(exc if exc is not None else ConnectionResetError('Connection lost'))
+        self._drain_waiters.clear()
+        if not self._closed.done():
+            self._closed.set_result(None)
+
+    def eof_received(self):
+        self._eof = True
+        self._wake_reader()
+        # Keep the transport open so the link can still send its own EOF when it closes
+        return True
+
+    def pause_writing(self):
+        self._writing_paused = True
+
+    def resume_writing(self):
+        self._writing_paused = False
+        for waiter in self._drain_waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        self._drain_waiters.clear()
+
+    def get_buffer(self, sizehint):
+        if self._payload is not None:
+            return memoryview(self._payload)[self._filled:]
+        if self._buffer is None:
+            # Transports call buffer_updated right after get_buffer, before any other connection reads
+            self._buffer, self._shared = shared_buffer(self._buffer_size), True
+        elif self._end == len(self._buffer):
+            pending = self._end - self._start
+            if pending * 2 > len(self._buffer):
+                # A single frame line fills most of the buffer, make room for the rest of it
+                buffer = bytearray(len(self._buffer) * 2)
+                buffer[:pending] = self._buffer[self._start:self._end]
+                self._buffer = buffer
+            else:
+                self._buffer[:pending] = self._buffer[self._start:self._end]
+            self._start, self._end = 0, pending
+        return memoryview(self._buffer)[self._end:]
+
+    def buffer_updated(self, nbytes):
+        if self._payload is not None:
+            self._filled += nbytes
+            if self._filled == len(self._payload):
+                self._push(self._payload_line, self._payload)
+                self._payload = self._payload_line = None
+            return
+        self._end += nbytes
+        self._parse()
+
+    def _parse(self):
+        while self._start < self._end:
+            index = self._buffer.find(b'\n', self._start, self._end)
+            if index < 0:
+                break
+            line = bytes(self._buffer[self._start:index + 1])
+            self._start = index + 1
+            size = payload_size(line)
+            if size is None:
+                self._push(line, None)
+                continue
+            available = min(size, self._end - self._start)
+            payload = bytearray(size)
+            payload[:available] = self._buffer[self._start:self._start + available]
+            self._start += available
+            if available == size:
+                self._push(line, payload)
+            else:
+                # The rest of the payload is read by the transport straight into its own buffer
+                self._payload, self._payload_line, self._filled = payload, line, available
+        if self._start == self._end:
+            self._start = self._end = 0
+            self._buffer, self._shared = None, False
+        elif self._shared:
+            # Keep the incomplete frame line in a buffer of this connection before another one reads
+            pending = self._end - self._start
+            buffer = bytearray(max(self._buffer_size, pending * 2))
+            buffer[:pending] = self._buffer[self._start:self._end]
+            self._buffer, self._shared, self._start, self._end = buffer, False, 0, pending
+
+    def _push(self, line: bytes, payload):
+        self._frames.append((line, payload))
+        self._wake_reader()
+        if not self._reading_paused and len(self._frames) >= self._max_queued_frames:
+            self._reading_paused = True
+            self._transport.pause_reading()
+
+    def _wake_reader(self):
+        if self._frame_waiter is not None and not self._frame_waiter.done():
+            self._frame_waiter.set_result(None)
+
+    def at_eof(self):
+        """:class:`bool`: Whether the peer has closed the connection and every frame has been read."""
+        return self._eof and not self._frames
+
+    async def read_frame(self):
+        """|coro|
+
+        Return the next frame line and, for buffer frames, the raw payload that followed it.
+        At EOF, an empty line is returned.
+
+        Returns
+        --------
+        Tuple[:class:`bytes`, Optional[:class:`bytearray`]]
+            The frame line and the payload, if any.
+        """
+        while not self._frames:
+            if self._eof:
+                return b'', None
+            self._frame_waiter = self._loop.create_future()
+            try:
+                await self._frame_waiter
+            finally:
+                self._frame_waiter = None
+        frame = self._frames.popleft()
+        if self._reading_paused and len(self._frames) <= self._max_queued_frames // 2 and not self._connection_lost:
+            self._reading_paused = False
+            self._transport.resume_reading()
+        return frame
+
+    def write(self, data):
+        self._transport.write(data)
+
+    def writelines(self, data):
+        self._transport.writelines(data)
+
+    def can_write_eof(self):
+        return self._transport.can_write_eof()
+
+    def write_eof(self):
+        self._transport.write_eof()
+
+    def close(self):
+        self._transport.close()
+
+    async def wait_closed(self):
+        await asyncio.shield(self._closed)
+
+    async def drain(self):
+        """|coro|
+
+        Wait until the transport is ready to accept more data. Unlike :meth:`asyncio.StreamWriter.drain`,
+        this returns without suspending while the transport's write buffer is below its high-water mark.
+        """
+        if self._connection_lost:
+            raise ConnectionResetError('Connection lost')
+        if not self._writing_paused:
+            return
+        waiter = self._loop.create_future()
+        self._drain_waiters.append(waiter)
+        await waiter
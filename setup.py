@@ -17,7 +17,10 @@ extras_require = {
         'sphinx==3.0.3',
         'sphinxcontrib_trio==1.1.2',
         'sphinxcontrib-websupport',
-    ]
+    ],
+    'numpy': [
+        'numpy',
+    ],
 }
 
 